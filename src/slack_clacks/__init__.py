@@ -1,10 +1,38 @@
+import cProfile
+import os
+import sys
+import time
+
+from slack_clacks import tracing
 from slack_clacks.cli import generate_cli
+from slack_clacks.profiling import format_phases, phase_breakdown
 
 
 def main() -> None:
+    imported = time.perf_counter()
     parser = generate_cli()
     args = parser.parse_args()
-    args.func(args)
+    trace = args.trace or os.environ.get("CLACKS_TRACE")
+    # Profiles are broken down into phases by the spans of a trace.
+    if trace or args.profile:
+        tracer = tracing.start()
+        tracer.record("imports", "clacks", tracing.IMPORT_STARTED, imported)
+        tracer.record("parse_args", "clacks", imported, time.perf_counter())
+    profiler = cProfile.Profile() if args.profile else None
+    try:
+        with tracing.span("command", "clacks", handler=args.func.__name__):
+            if profiler is not None:
+                profiler.runcall(args.func, args)
+            else:
+                args.func(args)
+    finally:
+        tracing.stop()
+        if trace:
+            tracer.write(trace)
+        if profiler is not None:
+            profiler.dump_stats(args.profile)
+            phases = phase_breakdown(tracer, profiler)
+            print(format_phases(phases), file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,41 @@
+"""add confirmed_messages
+
+Revision ID: 2b7e4c91d0a5
+Revises: 6713eb6c63d1
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "2b7e4c91d0a5"
+down_revision: Union[str, Sequence[str], None] = "6713eb6c63d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "confirmed_messages",
+        sa.Column("workspace_id", sa.String(), nullable=False),
+        sa.Column("channel_id", sa.String(), nullable=False),
+        sa.Column("ts", sa.String(), nullable=False),
+        sa.Column("confirmed_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("workspace_id", "channel_id", "ts"),
+    )
+    op.create_index(
+        "ix_confirmed_messages_confirmed_at",
+        "confirmed_messages",
+        ["confirmed_at"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_confirmed_messages_confirmed_at", "confirmed_messages")
+    op.drop_table("confirmed_messages")
@@ -0,0 +1,50 @@
+"""add api_cache
+
+Revision ID: 5a0f2e8b9d16
+Revises: c4d9e0a7b312
+Create Date: 2026-10-19 12:05:38.774061
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5a0f2e8b9d16"
+down_revision: Union[str, Sequence[str], None] = "c4d9e0a7b312"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "api_cache",
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("method", sa.String(), nullable=False),
+        sa.Column("response", sa.Text(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("accessed_at", sa.DateTime(), nullable=False),
+        sa.Column("hits", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index("ix_api_cache_method", "api_cache", ["method"])
+    op.create_index("ix_api_cache_accessed_at", "api_cache", ["accessed_at"])
+    op.create_table(
+        "api_cache_stats",
+        sa.Column("method", sa.String(), nullable=False),
+        sa.Column("hits", sa.Integer(), nullable=False),
+        sa.Column("misses", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("method"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("api_cache_stats")
+    op.drop_index("ix_api_cache_accessed_at", "api_cache")
+    op.drop_index("ix_api_cache_method", "api_cache")
+    op.drop_table("api_cache")
@@ -0,0 +1,36 @@
+"""add thread_states
+
+Revision ID: 8f31a6d2c7e4
+Revises: 2b7e4c91d0a5
+Create Date: 2026-10-19 10:02:17.644920
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8f31a6d2c7e4"
+down_revision: Union[str, Sequence[str], None] = "2b7e4c91d0a5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "thread_states",
+        sa.Column("workspace_id", sa.String(), nullable=False),
+        sa.Column("channel_id", sa.String(), nullable=False),
+        sa.Column("thread_ts", sa.String(), nullable=False),
+        sa.Column("latest_reply", sa.String(), nullable=False),
+        sa.Column("harvested_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("workspace_id", "channel_id", "thread_ts"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("thread_states")
@@ -0,0 +1,44 @@
+"""add search_cache
+
+Revision ID: c4d9e0a7b312
+Revises: 8f31a6d2c7e4
+Create Date: 2026-10-19 11:20:53.102377
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4d9e0a7b312"
+down_revision: Union[str, Sequence[str], None] = "8f31a6d2c7e4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "search_cache",
+        sa.Column("workspace_id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("query", sa.String(), nullable=False),
+        sa.Column("sort", sa.String(), nullable=False),
+        sa.Column("sort_dir", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("page", sa.Integer(), nullable=False),
+        sa.Column("response", sa.Text(), nullable=False),
+        sa.Column("fetched_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "workspace_id", "user_id", "query", "sort", "sort_dir", "count", "page"
+        ),
+    )
+    op.create_index("ix_search_cache_fetched_at", "search_cache", ["fetched_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_search_cache_fetched_at", "search_cache")
+    op.drop_table("search_cache")
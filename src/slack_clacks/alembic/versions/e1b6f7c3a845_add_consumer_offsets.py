@@ -0,0 +1,36 @@
+"""add consumer_offsets
+
+Revision ID: e1b6f7c3a845
+Revises: 5a0f2e8b9d16
+Create Date: 2026-10-19 13:41:09.517386
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e1b6f7c3a845"
+down_revision: Union[str, Sequence[str], None] = "5a0f2e8b9d16"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "consumer_offsets",
+        sa.Column("consumer", sa.String(), nullable=False),
+        sa.Column("workspace_id", sa.String(), nullable=False),
+        sa.Column("channel_id", sa.String(), nullable=False),
+        sa.Column("ts", sa.String(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("consumer", "workspace_id", "channel_id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("consumer_offsets")
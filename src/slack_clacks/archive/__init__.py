@@ -0,0 +1,3 @@
+"""
+Local archive of Slack messages.
+"""
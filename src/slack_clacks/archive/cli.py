@@ -0,0 +1,607 @@
+import argparse
+import json
+import sys
+
+from slack_clacks.client import create_client
+from slack_clacks.configuration.cache import add_cache_arguments
+from slack_clacks.configuration.database import (
+    ensure_db_updated,
+    get_current_context,
+    get_session,
+)
+from slack_clacks.messaging.cli import open_renderer
+from slack_clacks.messaging.identifiers import is_permalink, parse_permalink
+from slack_clacks.messaging.operations import resolve_channel_id, resolve_user_id
+from slack_clacks.projection import add_projection_arguments
+from slack_clacks.ratelimit import RateLimiter
+from slack_clacks.sinks import add_sink_arguments, open_sink
+
+from .maintenance import (
+    DICTIONARY_SAMPLES,
+    compact_archive,
+    prune_archive,
+    vacuum_archive,
+)
+from .pipeline import PIPELINE_COMMIT_SIZE, PIPELINE_QUEUE_SIZE, sync_channels
+from .query import plan_query, run_query
+from .stats import compute_stats, load_columns, require_numpy
+from .store import (
+    clear_retention,
+    get_archive,
+    get_channel_names,
+    get_retention_policies,
+    resolve_archived_channels,
+    set_channel_state,
+    set_retention,
+)
+from .sync import archive_history
+
+
+def handle_sync(args: argparse.Namespace) -> None:
+    ensure_db_updated(config_dir=args.config_dir)
+    with get_session(args.config_dir) as session:
+        context = get_current_context(session)
+        if context is None:
+            raise ValueError(
+                "No active authentication context. Authenticate with: clacks auth login"
+            )
+        workspace_id = context.workspace_id
+        client = create_client(context.access_token)
+
+    channels = []
+    for channel in args.channel:
+        channel_id = resolve_channel_id(client, channel)
+        channels.append(
+            (channel_id, channel.lstrip("#") if channel_id != channel else None)
+        )
+
+    def write_result(result: dict) -> None:
+        args.outfile.write(json.dumps(result) + "\n")
+        args.outfile.flush()
+
+    with get_archive(args.config_dir, shards=args.shards) as archive:
+        stages = sync_channels(
+            archive,
+            client,
+            workspace_id,
+            channels,
+            oldest=args.oldest,
+            full=args.full,
+            fetch_workers=args.channel_workers,
+            max_workers=args.workers,
+            processes=args.processes,
+            limiter=RateLimiter(args.rate_limit),
+            queue_size=args.queue_size,
+            commit_size=args.commit_size,
+            on_channel=write_result,
+        )
+    if args.metrics:
+        write_result({"stages": stages})
+
+
+def generate_sync_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Copy channel history into the local message archive"
+    )
+    parser.add_argument(
+        "-D",
+        "--config-dir",
+        type=str,
+        help="Configuration directory (default: platform-specific user config dir)",
+    )
+    parser.add_argument(
+        "-c",
+        "--channel",
+        type=str,
+        action="append",
+        required=True,
+        help="Channel ID or name to archive (repeatable)",
+    )
+    parser.add_argument(
+        "--oldest",
+        type=str,
+        help="On a channel's first sync: only archive messages after this timestamp",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help=(
+            "Rescan the whole history window instead of continuing from the last "
+            "sync, picking up new replies to older threads"
+        ),
+    )
+    parser.add_argument(
+        "--channel-workers",
+        type=int,
+        default=4,
+        help="Channels fetched concurrently (default: 4)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Concurrent thread reply fetches per channel (default: 8)",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=50,
+        help="Max API requests per minute, shared by all fetches (default: 50)",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help=(
+            "Worker processes converting and compressing fetched messages "
+            "(default: 1, in a thread of this process)"
+        ),
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=PIPELINE_QUEUE_SIZE,
+        help=(
+            "Batches buffered between pipeline stages before the earlier stage "
+            f"waits (default: {PIPELINE_QUEUE_SIZE})"
+        ),
+    )
+    parser.add_argument(
+        "--commit-size",
+        type=int,
+        default=PIPELINE_COMMIT_SIZE,
+        help=f"Messages written per transaction (default: {PIPELINE_COMMIT_SIZE})",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Finally output the throughput of each pipeline stage",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        help=(
+            "Number of files to spread a new archive's messages over, so that "
+            "channels can be written and read in parallel (default: 1). Fixed "
+            "once the archive exists"
+        ),
+    )
+    parser.add_argument(
+        "-o",
+        "--outfile",
+        type=argparse.FileType("a"),
+        default=sys.stdout,
+        help="Output file for per-channel NDJSON summaries (default: stdout)",
+    )
+    parser.set_defaults(func=handle_sync)
+
+    return parser
+
+
+def handle_stats(args: argparse.Namespace) -> None:
+    require_numpy()
+    ensure_db_updated(config_dir=args.config_dir)
+    with get_session(args.config_dir) as session:
+        context = get_current_context(session)
+        if context is None:
+            raise ValueError(
+                "No active authentication context. Authenticate with: clacks auth login"
+            )
+        workspace_id = context.workspace_id
+
+    with get_archive(args.config_dir) as archive:
+        channel_ids = None
+        if args.channel:
+            channel_ids = resolve_archived_channels(
+                archive.catalog, workspace_id, args.channel
+            )
+        columns = load_columns(
+            archive,
+            workspace_id,
+            channel_ids=channel_ids,
+            oldest=args.oldest,
+            latest=args.latest,
+        )
+        channel_names = get_channel_names(archive.catalog, workspace_id)
+
+    stats = compute_stats(
+        columns,
+        top=args.top,
+        utc_offset_hours=args.utc_offset,
+        channel_names=channel_names,
+    )
+    with args.outfile as ofp:
+        json.dump(stats, ofp)
+
+
+def generate_stats_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Message volume, top posters, response latency and activity heatmap "
+            "of archived messages"
+        )
+    )
+    parser.add_argument(
+        "-D",
+        "--config-dir",
+        type=str,
+        help="Configuration directory (default: platform-specific user config dir)",
+    )
+    parser.add_argument(
+        "-c",
+        "--channel",
+        type=str,
+        action="append",
+        help="Archived channel ID or name to include (repeatable; default: all)",
+    )
+    parser.add_argument(
+        "--oldest",
+        type=str,
+        help="Only include messages at or after this timestamp",
+    )
+    parser.add_argument(
+        "--latest",
+        type=str,
+        help="Only include messages at or before this timestamp",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Number of top posters to list, overall and per channel (default: 10)",
+    )
+    parser.add_argument(
+        "--utc-offset",
+        type=float,
+        default=0,
+        help="Hours to shift timestamps by for the heatmap (default: 0, UTC)",
+    )
+    parser.add_argument(
+        "-o",
+        "--outfile",
+        type=argparse.FileType("a"),
+        default=sys.stdout,
+        help="Output file for JSON results (default: stdout)",
+    )
+    parser.set_defaults(func=handle_stats)
+
+    return parser
+
+
+def handle_query(args: argparse.Namespace) -> None:
+    if args.fetch and not args.channel:
+        raise ValueError("--fetch requires --channel.")
+
+    # The configuration session is not held through --fetch or the output.
+    workspace_id, token = get_active_context(args.config_dir)
+    client = create_client(token)
+    with get_archive(args.config_dir) as archive:
+        thread_ts = args.thread
+        if thread_ts and is_permalink(thread_ts):
+            _, message_ts, parent_ts = parse_permalink(thread_ts)
+            thread_ts = parent_ts or message_ts
+
+        channel_ids = None
+        if args.channel and args.fetch:
+            channel_ids = [resolve_channel_id(client, c) for c in args.channel]
+            limiter = RateLimiter(args.rate_limit)
+            for channel, channel_id in zip(args.channel, channel_ids):
+                # The time bounds are pushed down to conversations.history;
+                # every other filter is answered from the archive.
+                shard = archive.channel_shard(workspace_id, channel_id)
+                archive_history(
+                    archive.shard(shard),
+                    client,
+                    workspace_id,
+                    channel_id,
+                    oldest=args.oldest,
+                    latest=args.latest,
+                    inclusive=True,
+                    max_workers=args.workers,
+                    limiter=limiter,
+                    codec=archive.codec(workspace_id),
+                )
+                name = channel.lstrip("#") if channel_id != channel else None
+                archive.shard(shard).commit()
+                set_channel_state(
+                    archive.catalog, workspace_id, channel_id, name, None, shard
+                )
+                archive.catalog.commit()
+        elif args.channel:
+            channel_ids = resolve_archived_channels(
+                archive.catalog, workspace_id, args.channel
+            )
+
+        user_ids = None
+        if args.user:
+            user_ids = [resolve_user_id(client, user) for user in args.user]
+
+        plan = plan_query(
+            archive,
+            workspace_id,
+            channel_ids=channel_ids,
+            user_ids=user_ids,
+            oldest=args.oldest,
+            latest=args.latest,
+            thread_ts=thread_ts,
+            has_thread=args.has_thread,
+            has_reaction=args.has_reaction,
+            edited=args.edited,
+        )
+        if args.explain:
+            output = {
+                "index": plan.index_name,
+                "scans": [
+                    {"shard": shard, "sql": " ".join(sql.split()), "params": params}
+                    for shard, sql, params in plan.scans
+                ],
+            }
+            with args.outfile as ofp:
+                json.dump(output, ofp)
+            return
+
+        with (
+            open_renderer(args) as render,
+            open_sink(args, render=render) as sink,
+        ):
+            for count, message in enumerate(run_query(archive, plan), start=1):
+                sink.write(message)
+                if args.limit and count >= args.limit:
+                    break
+
+
+def generate_query_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Query archived messages by user, channel, time and flags"
+    )
+    parser.add_argument(
+        "-D",
+        "--config-dir",
+        type=str,
+        help="Configuration directory (default: platform-specific user config dir)",
+    )
+    parser.add_argument(
+        "-c",
+        "--channel",
+        type=str,
+        action="append",
+        help="Channel ID or name (repeatable)",
+    )
+    parser.add_argument(
+        "-u",
+        "--user",
+        type=str,
+        action="append",
+        help="Author's user ID or name (repeatable)",
+    )
+    parser.add_argument(
+        "-t",
+        "--thread",
+        type=str,
+        help="Thread timestamp or permalink: only the thread's messages",
+    )
+    parser.add_argument(
+        "--oldest",
+        type=str,
+        help="Only messages at or after this timestamp",
+    )
+    parser.add_argument(
+        "--latest",
+        type=str,
+        help="Only messages at or before this timestamp",
+    )
+    parser.add_argument(
+        "--has-thread",
+        action="store_true",
+        help="Only messages with thread replies",
+    )
+    parser.add_argument(
+        "--has-reaction",
+        action="store_true",
+        help="Only messages with reactions",
+    )
+    parser.add_argument(
+        "--edited",
+        action="store_true",
+        help="Only edited messages",
+    )
+    parser.add_argument(
+        "-l",
+        "--limit",
+        type=int,
+        help="Max messages to output (default: all)",
+    )
+    parser.add_argument(
+        "--fetch",
+        action="store_true",
+        help=(
+            "First archive the --oldest/--latest window of each --channel from "
+            "Slack, then query"
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="With --fetch: concurrent thread reply fetches (default: 8)",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=50,
+        help="With --fetch: max API requests per minute (default: 50)",
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="Output the query plan instead of running it",
+    )
+    parser.add_argument(
+        "-o",
+        "--outfile",
+        type=argparse.FileType("a"),
+        default=sys.stdout,
+        help="Output file for NDJSON results (default: stdout)",
+    )
+    add_projection_arguments(parser)
+    add_sink_arguments(parser)
+    add_cache_arguments(parser)
+    parser.set_defaults(func=handle_query)
+
+    return parser
+
+
+def get_active_context(config_dir: str | None) -> tuple[str, str]:
+    """Workspace ID and access token of the current context."""
+    ensure_db_updated(config_dir=config_dir)
+    with get_session(config_dir) as session:
+        context = get_current_context(session)
+        if context is None:
+            raise ValueError(
+                "No active authentication context. Authenticate with: clacks auth login"
+            )
+        return context.workspace_id, context.access_token
+
+
+def handle_compact(args: argparse.Namespace) -> None:
+    workspace_id, _ = get_active_context(args.config_dir)
+    with get_archive(args.config_dir) as archive:
+        output = compact_archive(
+            archive, workspace_id, train=not args.no_dictionary, samples=args.samples
+        )
+    with args.outfile as ofp:
+        json.dump(output, ofp)
+
+
+def handle_retention(args: argparse.Namespace) -> None:
+    if args.days is not None and args.clear:
+        raise ValueError("Use either --days or --clear, not both.")
+    workspace_id, token = get_active_context(args.config_dir)
+    channel_id = None
+    if args.channel:
+        channel_id = resolve_channel_id(create_client(token), args.channel)
+
+    with get_archive(args.config_dir) as archive:
+        if args.days is not None:
+            set_retention(archive.catalog, workspace_id, channel_id, args.days)
+        elif args.clear and not clear_retention(
+            archive.catalog, workspace_id, channel_id
+        ):
+            raise ValueError(
+                f"No retention policy for {args.channel or 'the workspace'}."
+            )
+        policies = get_retention_policies(archive.catalog, workspace_id)
+
+    output = {
+        "workspace_id": workspace_id,
+        "default_days": policies.pop(None, None),
+        "channels": [
+            {"channel_id": channel_id, "days": days}
+            for channel_id, days in sorted(policies.items())
+        ],
+    }
+    with args.outfile as ofp:
+        json.dump(output, ofp)
+
+
+def handle_prune(args: argparse.Namespace) -> None:
+    workspace_id, _ = get_active_context(args.config_dir)
+    with get_archive(args.config_dir) as archive:
+        output = prune_archive(archive, workspace_id)
+    with args.outfile as ofp:
+        json.dump(output, ofp)
+
+
+def handle_vacuum(args: argparse.Namespace) -> None:
+    with get_archive(args.config_dir) as archive:
+        output = vacuum_archive(archive)
+    with args.outfile as ofp:
+        json.dump(output, ofp)
+
+
+def generate_archive_cli() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Compress the local message archive and enforce retention"
+    )
+    parser.set_defaults(func=lambda _: parser.print_help())
+
+    subparsers = parser.add_subparsers(dest="archive_command")
+
+    def add_common_arguments(subparser: argparse.ArgumentParser) -> None:
+        subparser.add_argument(
+            "-D",
+            "--config-dir",
+            type=str,
+            default=None,
+            help="Configuration directory (default: platform-specific user config dir)",
+        )
+        subparser.add_argument(
+            "-o",
+            "--outfile",
+            type=argparse.FileType("a"),
+            default=sys.stdout,
+            help="Output file for JSON results (default: stdout)",
+        )
+
+    compact_parser = subparsers.add_parser(
+        "compact",
+        help=(
+            "Train a compression dictionary for the workspace (zstd extra only) "
+            "and recompress its archived messages"
+        ),
+    )
+    add_common_arguments(compact_parser)
+    compact_parser.add_argument(
+        "--samples",
+        type=int,
+        default=DICTIONARY_SAMPLES,
+        help="Messages sampled to train the dictionary (default: 20000)",
+    )
+    compact_parser.add_argument(
+        "--no-dictionary",
+        action="store_true",
+        help="Recompress with the current dictionary instead of training a new one",
+    )
+    compact_parser.set_defaults(func=handle_compact)
+
+    retention_parser = subparsers.add_parser(
+        "retention",
+        help="Set, clear or list how long archived messages are kept",
+    )
+    add_common_arguments(retention_parser)
+    retention_parser.add_argument(
+        "-c",
+        "--channel",
+        type=str,
+        help="Channel ID or name (default: the workspace default policy)",
+    )
+    retention_parser.add_argument(
+        "--days",
+        type=float,
+        help="Keep messages for this many days",
+    )
+    retention_parser.add_argument(
+        "--clear",
+        action="store_true",
+        help="Remove the policy",
+    )
+    retention_parser.set_defaults(func=handle_retention)
+
+    prune_parser = subparsers.add_parser(
+        "prune",
+        help="Delete archived messages older than their retention policy",
+    )
+    add_common_arguments(prune_parser)
+    prune_parser.set_defaults(func=handle_prune)
+
+    vacuum_parser = subparsers.add_parser(
+        "vacuum",
+        help=(
+            "Rewrite the archive files, switching older ones to incremental "
+            "vacuum (blocks syncs while it runs)"
+        ),
+    )
+    add_common_arguments(vacuum_parser)
+    vacuum_parser.set_defaults(func=handle_vacuum)
+
+    return parser
@@ -0,0 +1,103 @@
+"""
+Compression of archived message payloads.
+
+Payloads (the JSON of every message field without a column of its own) are
+compressed with zstd when the zstandard package is installed (pip install
+'slack-clacks[zstd]'), with the workspace's trained dictionary once it has one
+(see clacks archive compact), and with zlib otherwise. Each stored payload
+describes itself: JSON starts with "{", zlib streams with 0x78, and zstd
+frames with their magic number followed by the ID of the dictionary they were
+compressed with. Payloads that do not shrink are stored as they are.
+"""
+
+import zlib
+from typing import Sequence
+
+try:
+    import zstandard  # type: ignore[import-not-found]
+except ImportError:  # optional: pip install 'slack-clacks[zstd]'
+    zstandard = None  # type: ignore[assignment]
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+# Size of trained dictionaries (zstd's default) and the fewest payloads worth
+# training one on.
+DICTIONARY_SIZE = 112_640
+DICTIONARY_MIN_SAMPLES = 1000
+
+
+def train_dictionary(samples: Sequence[bytes]) -> tuple[int, bytes]:
+    """Train a zstd dictionary on payloads. Returns its ID and contents."""
+    dictionary = zstandard.train_dictionary(DICTIONARY_SIZE, [*samples])
+    return dictionary.dict_id(), dictionary.as_bytes()
+
+
+class PayloadCodec:
+    """
+    Compresses payloads for one workspace, with its dictionary if given, and
+    decompresses payloads compressed with any of dictionaries. Not safe for
+    concurrent use from several threads.
+    """
+
+    def __init__(
+        self,
+        dictionaries: dict[int, bytes] | None = None,
+        dictionary_id: int | None = None,
+    ) -> None:
+        self.dictionaries = dictionaries or {}
+        self.dictionary_id = dictionary_id
+        self._compressor = None
+        self._decompressors: dict[int, object] = {}
+
+    def compress(self, payload: bytes) -> bytes:
+        if not payload:
+            return payload
+        if zstandard is not None:
+            compressed = self._zstd_compressor().compress(payload)
+        else:
+            compressed = zlib.compress(payload, ZLIB_LEVEL)
+        return compressed if len(compressed) < len(payload) else payload
+
+    def decompress(self, payload: bytes) -> bytes:
+        if payload[:4] == ZSTD_MAGIC:
+            if zstandard is None:
+                raise ValueError(
+                    "The archive holds zstd-compressed messages, which require the "
+                    "zstandard package. Install with: pip install 'slack-clacks[zstd]'"
+                )
+            dictionary_id = zstandard.get_frame_parameters(payload).dict_id
+            return self._zstd_decompressor(dictionary_id).decompress(payload)
+        if payload[:1] == b"\x78":
+            return zlib.decompress(payload)
+        return payload
+
+    def _zstd_compressor(self):
+        if self._compressor is None:
+            dictionary = None
+            if self.dictionary_id is not None:
+                dictionary = zstandard.ZstdCompressionDict(
+                    self.dictionaries[self.dictionary_id]
+                )
+            self._compressor = zstandard.ZstdCompressor(
+                level=ZSTD_LEVEL, dict_data=dictionary
+            )
+        return self._compressor
+
+    def _zstd_decompressor(self, dictionary_id: int):
+        if dictionary_id not in self._decompressors:
+            dictionary = None
+            if dictionary_id:
+                if dictionary_id not in self.dictionaries:
+                    raise ValueError(
+                        f"Missing compression dictionary {dictionary_id} in the "
+                        "archive catalog."
+                    )
+                dictionary = zstandard.ZstdCompressionDict(
+                    self.dictionaries[dictionary_id]
+                )
+            self._decompressors[dictionary_id] = zstandard.ZstdDecompressor(
+                dict_data=dictionary
+            )
+        return self._decompressors[dictionary_id]
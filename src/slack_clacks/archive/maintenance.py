@@ -0,0 +1,233 @@
+"""
+Keeping the archive small: recompressing payloads and enforcing retention.
+
+Every step runs in short transactions of its own. Readers never wait on a
+writer in WAL mode, and syncs wait at most for one batch. Pruned pages are
+handed back to the filesystem with incremental vacuum, a step at a time,
+rather than by a VACUUM that rewrites (and locks) a whole file; files created
+before incremental auto-vacuum existed need one full VACUUM first (see
+vacuum_archive).
+"""
+
+import sqlite3
+import time
+
+from slack_clacks.messaging.records import micros_to_ts
+
+from . import codec as payload_codec
+from .codec import DICTIONARY_MIN_SAMPLES, train_dictionary
+from .store import Archive, get_retention_cutoff
+
+# Messages deleted or recompressed per transaction.
+MAINTENANCE_BATCH_SIZE = 2000
+
+# Pages returned to the filesystem per incremental vacuum step.
+VACUUM_STEP_PAGES = 1024
+
+# Payloads sampled to train a compression dictionary.
+DICTIONARY_SAMPLES = 20_000
+
+
+def unique_connections(archive: Archive) -> list[sqlite3.Connection]:
+    """The catalog and every shard, each once."""
+    return list(dict.fromkeys([archive.catalog, *archive.shards()]))
+
+
+def incremental_vacuum(
+    connection: sqlite3.Connection, step_pages: int = VACUUM_STEP_PAGES
+) -> int | None:
+    """
+    Return a file's free pages to the filesystem, step_pages per transaction.
+    Returns the number of pages freed, or None if the file does not use
+    incremental auto-vacuum.
+    """
+    (mode,) = connection.execute("PRAGMA auto_vacuum").fetchone()
+    if mode != 2:
+        return None
+    freed = 0
+    (free,) = connection.execute("PRAGMA freelist_count").fetchone()
+    while free:
+        connection.execute(f"PRAGMA incremental_vacuum({step_pages})").fetchall()
+        connection.commit()
+        (remaining,) = connection.execute("PRAGMA freelist_count").fetchone()
+        if remaining >= free:
+            break
+        freed += free - remaining
+        free = remaining
+    connection.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+    return freed
+
+
+def prune_archive(
+    archive: Archive,
+    workspace_id: str,
+    now: float | None = None,
+    batch_size: int = MAINTENANCE_BATCH_SIZE,
+) -> dict:
+    """
+    Delete the messages of a workspace's archived channels that are older
+    than their retention policies, then vacuum the freed pages. The thread
+    states of deleted threads go too, while the sync states stay, so that
+    pruned messages are not archived again.
+    """
+    channels = []
+    for channel_id, shard in archive.catalog.execute(
+        "SELECT channel_id, shard FROM channels WHERE workspace_id = ? "
+        "ORDER BY channel_id",
+        (workspace_id,),
+    ).fetchall():
+        cutoff = get_retention_cutoff(archive.catalog, workspace_id, channel_id, now)
+        if cutoff is None:
+            continue
+        connection = archive.shard(shard)
+        deleted = 0
+        while True:
+            cursor = connection.execute(
+                """
+                DELETE FROM messages
+                WHERE workspace_id = ? AND channel_id = ? AND ts IN (
+                    SELECT ts FROM messages
+                    WHERE workspace_id = ? AND channel_id = ? AND ts < ?
+                    ORDER BY ts LIMIT ?
+                )
+                """,
+                (
+                    workspace_id,
+                    channel_id,
+                    workspace_id,
+                    channel_id,
+                    cutoff,
+                    batch_size,
+                ),
+            )
+            connection.commit()
+            deleted += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                break
+        connection.execute(
+            "DELETE FROM threads WHERE workspace_id = ? AND channel_id = ? "
+            "AND latest_reply < ?",
+            (workspace_id, channel_id, cutoff),
+        )
+        connection.commit()
+        channels.append(
+            {
+                "channel_id": channel_id,
+                "shard": shard,
+                "cutoff": micros_to_ts(cutoff),
+                "deleted": deleted,
+            }
+        )
+
+    freed = [incremental_vacuum(c) for c in unique_connections(archive)]
+    return {
+        "channels": channels,
+        "deleted": sum(channel["deleted"] for channel in channels),
+        "pages_freed": sum(pages or 0 for pages in freed),
+        "incremental_vacuum": None not in freed,
+    }
+
+
+def sample_payloads(archive: Archive, workspace_id: str, count: int) -> list[bytes]:
+    """Up to count uncompressed payloads of a workspace, chosen at random."""
+    codec = archive.codec()
+    per_shard = -(-count // archive.shard_count)
+    return [
+        codec.decompress(payload)
+        for connection in archive.shards()
+        for (payload,) in connection.execute(
+            "SELECT payload FROM messages WHERE workspace_id = ? "
+            "AND length(payload) > 0 ORDER BY random() LIMIT ?",
+            (workspace_id, per_shard),
+        )
+    ]
+
+
+def compact_archive(
+    archive: Archive,
+    workspace_id: str,
+    train: bool = True,
+    samples: int = DICTIONARY_SAMPLES,
+    batch_size: int = MAINTENANCE_BATCH_SIZE,
+) -> dict:
+    """
+    Recompress a workspace's payloads with the current codec, first training
+    a new zstd dictionary on a sample of them if train is set, zstandard is
+    installed and there are enough payloads. Payloads archived before
+    compression existed are compressed too.
+    """
+    dictionary_id = None
+    if train and payload_codec.zstandard is not None:
+        sample = sample_payloads(archive, workspace_id, samples)
+        if len(sample) >= DICTIONARY_MIN_SAMPLES:
+            try:
+                dictionary_id, data = train_dictionary(sample)
+            except payload_codec.zstandard.ZstdError:
+                dictionary_id = None
+            if dictionary_id is not None:
+                archive.catalog.execute(
+                    "INSERT OR REPLACE INTO dictionaries VALUES (?, ?, ?, ?)",
+                    (dictionary_id, workspace_id, data, int(time.time())),
+                )
+                archive.catalog.commit()
+                archive.reset_codecs()
+
+    codec = archive.codec(workspace_id)
+    messages = bytes_before = bytes_after = 0
+    for connection in archive.shards():
+        last: tuple[str, int] = ("", 0)
+        while rows := connection.execute(
+            "SELECT channel_id, ts, payload FROM messages "
+            "WHERE workspace_id = ? AND (channel_id, ts) > (?, ?) "
+            "ORDER BY channel_id, ts LIMIT ?",
+            (workspace_id, *last, batch_size),
+        ).fetchall():
+            updates = []
+            for channel_id, ts, payload in rows:
+                compressed = codec.compress(codec.decompress(payload))
+                bytes_before += len(payload)
+                bytes_after += len(compressed)
+                if compressed != payload:
+                    updates.append((compressed, workspace_id, channel_id, ts))
+            connection.executemany(
+                "UPDATE messages SET payload = ? "
+                "WHERE workspace_id = ? AND channel_id = ? AND ts = ?",
+                updates,
+            )
+            connection.commit()
+            messages += len(rows)
+            last = rows[-1][:2]
+        incremental_vacuum(connection)
+
+    return {
+        "workspace_id": workspace_id,
+        "dictionary_id": dictionary_id or codec.dictionary_id,
+        "messages": messages,
+        "payload_bytes_before": bytes_before,
+        "payload_bytes_after": bytes_after,
+    }
+
+
+def vacuum_archive(archive: Archive) -> list[dict]:
+    """
+    Rewrite every file of the archive with a full VACUUM, switching it to
+    incremental auto-vacuum. This blocks other writers while it runs, and is
+    only needed once per file created by an older version.
+    """
+    results = []
+    for connection in unique_connections(archive):
+        connection.commit()
+        (before,) = connection.execute("PRAGMA page_count").fetchone()
+        connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        connection.execute("VACUUM")
+        (after,) = connection.execute("PRAGMA page_count").fetchone()
+        (page_size,) = connection.execute("PRAGMA page_size").fetchone()
+        path = connection.execute("PRAGMA database_list").fetchone()[2]
+        results.append(
+            {
+                "path": path,
+                "bytes_before": before * page_size,
+                "bytes_after": after * page_size,
+            }
+        )
+    return results
@@ -0,0 +1,345 @@
+"""
+Staged ingestion for clacks sync.
+
+Syncing many channels runs as a pipeline of three stages joined by bounded
+queues:
+
+    fetch      threads paging through channel histories and thread replies
+    transform  turning API messages into rows and compressing their payloads,
+               in a process pool (or a thread, with one process)
+    write      a single writer inserting rows, committing in large transactions
+
+A full queue blocks the stage feeding it, so a slow stage holds back the ones
+before it instead of buffering without bound. Each stage records its
+throughput, and the time it spent busy and blocked on the next stage.
+
+The archive keeps no full-text index, so the CPU-bound work of the transform
+stage is building rows and compressing payloads. An FTS5 index would be
+tokenized by SQLite inside the writer's inserts, not in the worker processes.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, NamedTuple
+
+from slack_sdk import WebClient
+
+from slack_clacks.ratelimit import RateLimiter
+
+from .codec import PayloadCodec
+from .store import (
+    Archive,
+    get_thread_states,
+    insert_message_rows,
+    message_rows,
+    set_channel_state,
+    set_thread_state,
+)
+from .sync import fetch_history, newest_ts, sync_window_start
+
+# Batches each queue holds before blocking the stage feeding it.
+PIPELINE_QUEUE_SIZE = 16
+
+# Rows the writer inserts per transaction.
+PIPELINE_COMMIT_SIZE = 10_000
+
+
+class Batch(NamedTuple):
+    """A page of a channel's history (thread_ts None) or a thread's replies."""
+
+    channel_id: str
+    thread_ts: int | None
+    messages: list
+
+
+class ChannelDone(NamedTuple):
+    """Every batch of a channel has been fetched."""
+
+    channel_id: str
+    newest: int | None
+
+
+class Failed(NamedTuple):
+    error: BaseException
+
+
+class StageMetrics:
+    """
+    Throughput of a pipeline stage. busy_seconds and blocked_seconds (waiting
+    for room in the next stage's queue) are summed over the stage's workers.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.batches = 0
+        self.messages = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, messages: int, busy: float) -> None:
+        with self.lock:
+            self.batches += 1
+            self.messages += messages
+            self.busy += busy
+
+    def to_dict(self) -> dict:
+        return {
+            "stage": self.name,
+            "batches": self.batches,
+            "messages": self.messages,
+            "busy_seconds": round(self.busy, 3),
+            "blocked_seconds": round(self.blocked, 3),
+            "messages_per_second": (
+                round(self.messages / self.busy, 1) if self.busy else None
+            ),
+        }
+
+
+def put(
+    target: queue.Queue, item: object, stop: threading.Event, metrics: StageMetrics
+) -> None:
+    """Put an item on a bounded queue, counting the time blocked."""
+    started = time.perf_counter()
+    try:
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    finally:
+        with metrics.lock:
+            metrics.blocked += time.perf_counter() - started
+
+
+# Codec of a transform worker process, set by init_transform().
+worker_codec: PayloadCodec | None = None
+
+
+def init_transform(dictionaries: dict[int, bytes], dictionary_id: int | None) -> None:
+    global worker_codec
+    worker_codec = PayloadCodec(dictionaries, dictionary_id)
+
+
+def transform_batch(
+    workspace_id: str, channel_id: str, messages: list[dict]
+) -> tuple[list[tuple], float]:
+    """Rows for a batch, in a worker process, and the seconds spent."""
+    started = time.perf_counter()
+    rows = message_rows(workspace_id, channel_id, messages, worker_codec)
+    return rows, time.perf_counter() - started
+
+
+def sync_channels(
+    archive: Archive,
+    client: WebClient,
+    workspace_id: str,
+    channels: list[tuple[str, str | None]],
+    oldest: str | None = None,
+    full: bool = False,
+    fetch_workers: int = 4,
+    max_workers: int = 8,
+    processes: int = 1,
+    limiter: RateLimiter | None = None,
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+    commit_size: int = PIPELINE_COMMIT_SIZE,
+    on_channel: Callable[[dict], None] | None = None,
+) -> list[dict]:
+    """
+    Archive (channel_id, name) pairs like sync_channel(), fetch_workers
+    channels at a time, each with up to max_workers concurrent thread reply
+    fetches. processes > 1 runs the transform stage in that many worker
+    processes.
+
+    A channel's sync state is recorded, after its messages are committed,
+    once all of them are written, and its counts are passed to on_channel.
+    Returns the metrics of each stage.
+    """
+    codec = archive.codec(workspace_id)
+    shards = {}
+    windows = {}
+    harvested = {}
+    names = dict(channels)
+    for channel_id, _ in channels:
+        shards[channel_id] = archive.channel_shard(workspace_id, channel_id)
+        windows[channel_id] = sync_window_start(
+            archive, workspace_id, channel_id, oldest, full
+        )
+        harvested[channel_id] = get_thread_states(
+            archive.shard(shards[channel_id]), workspace_id, channel_id
+        )
+
+    fetch_metrics = StageMetrics("fetch")
+    transform_metrics = StageMetrics("transform")
+    write_metrics = StageMetrics("write")
+    fetched: queue.Queue = queue.Queue(maxsize=queue_size)
+    transformed: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def fetch(channel_id: str) -> None:
+        newest = None
+        try:
+            started = time.perf_counter()
+            for thread_ts, messages in fetch_history(
+                client,
+                channel_id,
+                harvested[channel_id],
+                oldest=windows[channel_id],
+                max_workers=max_workers,
+                limiter=limiter,
+            ):
+                if stop.is_set():
+                    return
+                if thread_ts is None:
+                    newest = newest_ts(messages, newest)
+                fetch_metrics.record(len(messages), time.perf_counter() - started)
+                put(
+                    fetched, Batch(channel_id, thread_ts, messages), stop, fetch_metrics
+                )
+                started = time.perf_counter()
+            put(fetched, ChannelDone(channel_id, newest), stop, fetch_metrics)
+        except BaseException as e:
+            put(fetched, Failed(e), stop, fetch_metrics)
+
+    def fetch_all() -> None:
+        with ThreadPoolExecutor(max_workers=fetch_workers) as executor:
+            for channel_id, _ in channels:
+                executor.submit(fetch, channel_id)
+        put(fetched, None, stop, fetch_metrics)
+
+    def transform(pool: ProcessPoolExecutor | None) -> None:
+        # Results are passed on in the order their batches were fetched, so
+        # that a channel's batches reach the writer before its ChannelDone.
+        in_flight: deque[tuple[Future | None, object]] = deque()
+        limit = 2 * processes if pool is not None else 0
+
+        def forward(future: Future | None, item: object) -> None:
+            if isinstance(item, Batch):
+                if future is not None:
+                    rows, busy = future.result()
+                else:
+                    started = time.perf_counter()
+                    rows = message_rows(
+                        workspace_id, item.channel_id, item.messages, codec
+                    )
+                    busy = time.perf_counter() - started
+                transform_metrics.record(len(rows), busy)
+                item = item._replace(messages=rows)
+            put(transformed, item, stop, transform_metrics)
+
+        try:
+            while not stop.is_set():
+                try:
+                    item = fetched.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                future = None
+                if isinstance(item, Batch) and pool is not None:
+                    future = pool.submit(
+                        transform_batch, workspace_id, item.channel_id, item.messages
+                    )
+                in_flight.append((future, item))
+                if item is None or isinstance(item, Failed):
+                    limit = 0
+                while len(in_flight) > limit:
+                    forward(*in_flight.popleft())
+                if item is None:
+                    return
+        except BaseException as e:
+            put(transformed, Failed(e), stop, transform_metrics)
+
+    def write() -> list[dict]:
+        counts = {channel_id: [0, 0] for channel_id, _ in channels}
+        dirty: set[int] = set()
+        uncommitted = 0
+
+        def commit() -> None:
+            nonlocal uncommitted
+            for shard in dirty:
+                archive.shard(shard).commit()
+            dirty.clear()
+            uncommitted = 0
+
+        while (item := transformed.get()) is not None:
+            started = time.perf_counter()
+            if isinstance(item, Failed):
+                raise item.error
+            if isinstance(item, Batch):
+                shard = shards[item.channel_id]
+                connection = archive.shard(shard)
+                stored = insert_message_rows(connection, item.messages)
+                if item.thread_ts is not None:
+                    seen = [item.thread_ts, *(row[2] for row in item.messages)]
+                    set_thread_state(
+                        connection,
+                        workspace_id,
+                        item.channel_id,
+                        item.thread_ts,
+                        max(seen),
+                    )
+                    counts[item.channel_id][1] += 1
+                counts[item.channel_id][0] += stored
+                dirty.add(shard)
+                uncommitted += stored
+                if uncommitted >= commit_size:
+                    commit()
+                write_metrics.record(stored, time.perf_counter() - started)
+            else:
+                commit()
+                channel_id = item.channel_id
+                set_channel_state(
+                    archive.catalog,
+                    workspace_id,
+                    channel_id,
+                    names[channel_id],
+                    item.newest,
+                    shards[channel_id],
+                )
+                archive.catalog.commit()
+                with write_metrics.lock:
+                    write_metrics.busy += time.perf_counter() - started
+                result = {
+                    "channel_id": channel_id,
+                    "shard": shards[channel_id],
+                    "messages": counts[channel_id][0],
+                    "threads": counts[channel_id][1],
+                }
+                if on_channel is not None:
+                    on_channel(result)
+        commit()
+        return [m.to_dict() for m in (fetch_metrics, transform_metrics, write_metrics)]
+
+    pool = None
+    if processes > 1:
+        # Workers are forked, where possible, so that they need not import
+        # clacks again, and before any thread of the pipeline starts.
+        context = None
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        pool = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=context,
+            initializer=init_transform,
+            initargs=(codec.dictionaries, codec.dictionary_id),
+        )
+        for future in [pool.submit(time.sleep, 0) for _ in range(processes)]:
+            future.result()
+    threads = [
+        threading.Thread(target=fetch_all, daemon=True),
+        threading.Thread(target=transform, args=(pool,), daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        return write()
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
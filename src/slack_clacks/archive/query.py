@@ -0,0 +1,229 @@
+"""
+Structured queries over the archive.
+
+plan_query() turns a set of filters into range scans over one of the covering
+indexes: one scan per thread, channel or user and shard, each already in ts
+order, with the remaining filters evaluated from the index. run_query()
+streams the results of all scans, merged by ts, through database cursors; the
+shards of a sharded archive are read concurrently.
+"""
+
+import heapq
+import itertools
+import queue
+import sqlite3
+import threading
+from typing import Iterator, NamedTuple
+
+from slack_clacks.messaging.records import ts_to_micros
+
+from .store import MESSAGE_COLUMNS, Archive, row_to_message
+
+# Rows fetched from each scan's cursor at a time.
+QUERY_BATCH_SIZE = 500
+
+# Batches each shard may read ahead of the merge.
+SHARD_READ_AHEAD = 4
+
+
+class QueryPlan(NamedTuple):
+    """Index read and (shard, sql, params) of each range scan."""
+
+    index_name: str
+    scans: list[tuple[int, str, list]]
+
+
+def get_existing_user_keys(
+    connection: sqlite3.Connection, user_ids: list[str]
+) -> list[int]:
+    """Keys of those of the given users who have archived messages."""
+    keys = []
+    for user_id in user_ids:
+        row = connection.execute(
+            "SELECT user_key FROM users WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is not None:
+            keys.append(row[0])
+    return keys
+
+
+def get_archived_channel_shards(
+    archive: Archive, workspace_id: str
+) -> list[tuple[str, int]]:
+    return archive.catalog.execute(
+        "SELECT channel_id, shard FROM channels WHERE workspace_id = ? "
+        "ORDER BY channel_id",
+        (workspace_id,),
+    ).fetchall()
+
+
+def plan_query(
+    archive: Archive,
+    workspace_id: str,
+    channel_ids: list[str] | None = None,
+    user_ids: list[str] | None = None,
+    oldest: str | None = None,
+    latest: str | None = None,
+    thread_ts: str | None = None,
+    has_thread: bool = False,
+    has_reaction: bool = False,
+    edited: bool = False,
+) -> QueryPlan:
+    """
+    Plan a query for messages matching every given filter; oldest and latest
+    are inclusive. The scans are driven by the most selective filter
+    available: the thread, then the channels, then the users. Without any of
+    these every archived channel is scanned. Scans by thread or user cover
+    every shard (or, for a thread, the shards of the given channels).
+    """
+    filters = ["messages.workspace_id = ?"]
+    params: list = [workspace_id]
+    if oldest is not None:
+        filters.append("messages.ts >= ?")
+        params.append(ts_to_micros(oldest))
+    if latest is not None:
+        filters.append("messages.ts <= ?")
+        params.append(ts_to_micros(latest))
+    if has_thread:
+        filters.append("messages.reply_count > 0")
+    if has_reaction:
+        filters.append("messages.reaction_count > 0")
+    if edited:
+        filters.append("messages.edited")
+
+    def member(column: str, values: list) -> tuple[str, list]:
+        return f" AND {column} IN ({', '.join('?' * len(values))})", list(values)
+
+    def user_filter(shard: int) -> tuple[str, list] | None:
+        """Filter on user_ids in a shard, or None if none of them are there."""
+        if not user_ids:
+            return "", []
+        keys = get_existing_user_keys(archive.shard(shard), user_ids)
+        return member("messages.user_key", keys) if keys else None
+
+    # (shard, range column, range value, extra filter, extra params)
+    ranges: list[tuple[int, str, object, str, list]] = []
+    extra_params: list
+    if thread_ts is not None:
+        index = "messages_thread_ts"
+        shards = list(range(archive.shard_count))
+        extra, extra_params = "", []
+        if channel_ids:
+            shards = sorted(
+                {archive.channel_shard(workspace_id, c) for c in channel_ids}
+            )
+            extra, extra_params = member("messages.channel_id", channel_ids)
+        for shard in shards:
+            if (users := user_filter(shard)) is not None:
+                ranges.append(
+                    (
+                        shard,
+                        "messages.thread_ts",
+                        ts_to_micros(thread_ts),
+                        extra + users[0],
+                        extra_params + users[1],
+                    )
+                )
+    elif user_ids and not channel_ids:
+        index = "messages_user_ts"
+        for shard in range(archive.shard_count):
+            keys = get_existing_user_keys(archive.shard(shard), user_ids)
+            for key in dict.fromkeys(keys):
+                ranges.append((shard, "messages.user_key", key, "", []))
+    else:
+        index = "messages_channel_ts"
+        if channel_ids:
+            channel_shards = [
+                (c, archive.channel_shard(workspace_id, c))
+                for c in dict.fromkeys(channel_ids)
+            ]
+        else:
+            channel_shards = get_archived_channel_shards(archive, workspace_id)
+        for channel_id, shard in channel_shards:
+            if (users := user_filter(shard)) is not None:
+                ranges.append(
+                    (shard, "messages.channel_id", channel_id, users[0], users[1])
+                )
+
+    scans = []
+    for shard, column, value, extra, extra_params in ranges:
+        sql = f"""
+            SELECT {MESSAGE_COLUMNS}
+            FROM messages INDEXED BY {index}
+            LEFT JOIN users ON users.user_key = messages.user_key
+            WHERE {column} = ? AND {" AND ".join(filters)}{extra}
+            ORDER BY messages.ts
+        """
+        scans.append((shard, sql, [value, *params, *extra_params]))
+    return QueryPlan(index_name=index, scans=scans)
+
+
+def read_ahead(rows: Iterator[tuple], batch_size: int) -> Iterator[tuple]:
+    """
+    Iterate over rows produced by a background thread, which reads up to
+    SHARD_READ_AHEAD batches ahead. SQLite releases the GIL while it steps
+    through a query, so the scans of several shards run in parallel.
+    """
+    batches: queue.Queue = queue.Queue(maxsize=SHARD_READ_AHEAD)
+    stop = threading.Event()
+
+    def put(item: object) -> None:
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def produce() -> None:
+        try:
+            while batch := list(itertools.islice(rows, batch_size)):
+                put(batch)
+            put([])
+        except Exception as e:
+            put(e)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = batches.get()
+            if isinstance(item, Exception):
+                raise item
+            if not item:
+                return
+            yield from item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_query(
+    archive: Archive,
+    plan: QueryPlan,
+    batch_size: int = QUERY_BATCH_SIZE,
+) -> Iterator[dict]:
+    """Messages matching a plan, oldest first, tagged with their channel_id."""
+
+    def scan(connection: sqlite3.Connection, sql: str, params: list):
+        cursor = connection.execute(sql, params)
+        while rows := cursor.fetchmany(batch_size):
+            yield from rows
+
+    by_shard: dict[int, list[tuple[str, list]]] = {}
+    for shard, sql, params in plan.scans:
+        by_shard.setdefault(shard, []).append((sql, params))
+
+    streams: list[Iterator[tuple]] = [
+        heapq.merge(
+            *(scan(archive.shard(shard), sql, params) for sql, params in scans),
+            key=lambda row: row[1],
+        )
+        for shard, scans in by_shard.items()
+    ]
+    if len(streams) > 1:
+        streams = [read_ahead(stream, batch_size) for stream in streams]
+    codec = archive.codec()
+    for row in heapq.merge(*streams, key=lambda row: row[1]):
+        channel_id, ts, thread_ts, user_id, text, payload = row
+        yield row_to_message(channel_id, ts, thread_ts, user_id, text, payload, codec)
@@ -0,0 +1,330 @@
+"""
+Aggregate statistics over archived messages, computed with NumPy.
+
+Messages are loaded as columns: ts and thread_ts as int64 microseconds, the
+author as its integer user_key and the channel as an index into a sorted list
+of channel IDs. All columns come from one scan in primary key order, inside a
+single read transaction so that they stay aligned while a sync writes to the
+archive, and are filled batch by batch with np.fromiter, so memory grows with
+the arrays rather than with the rows. The shards of a sharded archive are
+loaded concurrently and their columns concatenated, with user keys mapped to a
+common index.
+Every aggregate is then a handful of vectorized passes (bincount, lexsort,
+unique) with no Python-level loop over messages.
+"""
+
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import NamedTuple
+
+from slack_clacks.messaging.records import micros_to_ts, ts_to_micros
+
+from .store import Archive
+
+try:
+    import numpy as np
+except ImportError:  # optional: pip install 'slack-clacks[stats]'
+    np = None  # type: ignore[assignment]
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+MICROS_PER_HOUR = 3_600_000_000
+
+# Rows fetched from a shard at a time while loading columns.
+LOAD_BATCH_SIZE = 100_000
+
+
+def require_numpy() -> None:
+    if np is None:
+        raise ValueError(
+            "clacks stats requires NumPy. "
+            "Install with: pip install 'slack-clacks[stats]'"
+        )
+
+
+class Columns(NamedTuple):
+    """Archived messages as parallel arrays, grouped by channel."""
+
+    ts: "np.ndarray"
+    # Index of the author in users, or -1 for messages without a user.
+    user: "np.ndarray"
+    # Index of the channel in channels.
+    channel: "np.ndarray"
+    # Thread parent ts, or -1 for messages outside threads.
+    thread_ts: "np.ndarray"
+    users: list[str]
+    channels: list[str]
+
+
+def load_shard_columns(
+    connection: sqlite3.Connection,
+    workspace_id: str,
+    channel_ids: list[str] | None = None,
+    oldest: str | None = None,
+    latest: str | None = None,
+) -> Columns:
+    """
+    Load the messages of a workspace in one shard (optionally of some
+    channels, between oldest and latest inclusive) as columns. User indexes
+    are the shard's user keys, and users holds "" for unused keys.
+    """
+    where = ["workspace_id = ?"]
+    params: list = [workspace_id]
+    if channel_ids:
+        where.append(f"channel_id IN ({', '.join('?' * len(channel_ids))})")
+        params.extend(channel_ids)
+    if oldest is not None:
+        where.append("ts >= ?")
+        params.append(ts_to_micros(oldest))
+    if latest is not None:
+        where.append("ts <= ?")
+        params.append(ts_to_micros(latest))
+    condition = " AND ".join(where)
+
+    # One read transaction, so that the scan and the users it refers to are
+    # a single snapshot of the shard.
+    began = not connection.in_transaction
+    if began:
+        connection.execute("BEGIN")
+    try:
+        indexes: dict[str, int] = {}
+        channel_parts, value_parts = [], []
+        cursor = connection.execute(
+            f"""
+            SELECT channel_id, ts, COALESCE(user_key, -1), COALESCE(thread_ts, -1)
+            FROM messages WHERE {condition} ORDER BY channel_id, ts
+            """,
+            params,
+        )
+        while rows := cursor.fetchmany(LOAD_BATCH_SIZE):
+            channel_parts.append(
+                np.fromiter(
+                    (indexes.setdefault(row[0], len(indexes)) for row in rows),
+                    dtype=np.int32,
+                    count=len(rows),
+                )
+            )
+            value_parts.append(
+                np.fromiter(
+                    chain.from_iterable(row[1:] for row in rows),
+                    dtype=np.int64,
+                    count=3 * len(rows),
+                ).reshape(-1, 3)
+            )
+
+        users: list[str] = []
+        for user_key, user_id in connection.execute(
+            "SELECT user_key, user_id FROM users ORDER BY user_key"
+        ):
+            users.extend([""] * (user_key - len(users)))
+            users.append(user_id)
+    finally:
+        if began:
+            connection.rollback()
+
+    channel = np.concatenate(channel_parts) if channel_parts else np.empty(0, np.int32)
+    values = np.concatenate(value_parts) if value_parts else np.empty((0, 3), np.int64)
+    ts, user, thread_ts = (np.ascontiguousarray(values[:, i]) for i in range(3))
+    # Channels were numbered as the scan reached them, in channel_id order.
+    channels = list(indexes)
+
+    return Columns(
+        ts=ts,
+        user=user.astype(np.int32),
+        channel=channel,
+        thread_ts=thread_ts,
+        users=users,
+        channels=channels,
+    )
+
+
+def load_columns(
+    archive: Archive,
+    workspace_id: str,
+    channel_ids: list[str] | None = None,
+    oldest: str | None = None,
+    latest: str | None = None,
+) -> Columns:
+    """
+    Load the archived messages of a workspace (optionally of some channels,
+    between oldest and latest inclusive) as columns, from every shard holding
+    them.
+    """
+    require_numpy()
+    grouped: dict[int, list[str]] = {}
+    for channel_id in channel_ids or []:
+        shard = archive.channel_shard(workspace_id, channel_id)
+        grouped.setdefault(shard, []).append(channel_id)
+    shard_channels: dict[int, list[str] | None] = (
+        dict(grouped) if channel_ids else dict.fromkeys(range(archive.shard_count))
+    )
+
+    def load(shard: int) -> Columns:
+        return load_shard_columns(
+            archive.shard(shard),
+            workspace_id,
+            channel_ids=shard_channels[shard],
+            oldest=oldest,
+            latest=latest,
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, len(shard_channels))) as executor:
+        parts = list(executor.map(load, sorted(shard_channels)))
+    if len(parts) == 1:
+        return parts[0]
+
+    users: dict[str, int] = {}
+    user_columns, channel_columns = [], []
+    channels: list[str] = []
+    for part in parts:
+        remap = np.array(
+            [users.setdefault(user_id, len(users)) for user_id in part.users],
+            dtype=np.int32,
+        )
+        user_columns.append(
+            np.where(part.user >= 0, remap[np.maximum(part.user, 0)], -1)
+            if len(remap)
+            else part.user
+        )
+        channel_columns.append(part.channel + len(channels))
+        channels.extend(part.channels)
+    return Columns(
+        ts=np.concatenate([part.ts for part in parts]),
+        user=np.concatenate(user_columns).astype(np.int32),
+        channel=np.concatenate(channel_columns).astype(np.int32),
+        thread_ts=np.concatenate([part.thread_ts for part in parts]),
+        users=list(users),
+        channels=channels,
+    )
+
+
+def latency_summary(seconds: "np.ndarray") -> dict:
+    if not len(seconds):
+        return {"threads": 0, "median_seconds": None, "p90_seconds": None}
+    median, p90 = np.percentile(seconds, [50, 90])
+    return {
+        "threads": int(len(seconds)),
+        "median_seconds": float(median),
+        "p90_seconds": float(p90),
+    }
+
+
+def first_reply_latencies(columns: Columns) -> tuple["np.ndarray", "np.ndarray"]:
+    """
+    Seconds from each thread parent to its first archived reply, with the
+    channel index of each thread, sorted by channel.
+    """
+    replies = (columns.thread_ts >= 0) & (columns.ts != columns.thread_ts)
+    ts = columns.ts[replies]
+    thread_ts = columns.thread_ts[replies]
+    channel = columns.channel[replies]
+
+    order = np.lexsort((ts, thread_ts, channel))
+    ts, thread_ts, channel = ts[order], thread_ts[order], channel[order]
+    first = np.ones(len(ts), dtype=bool)
+    first[1:] = (channel[1:] != channel[:-1]) | (thread_ts[1:] != thread_ts[:-1])
+    return (ts[first] - thread_ts[first]) / 1_000_000, channel[first]
+
+
+def top_posters(
+    user: "np.ndarray", counts: "np.ndarray", users: list[str], top: int
+) -> list[dict]:
+    return [
+        {"user": users[u], "messages": int(n)}
+        for u, n in zip(user[:top].tolist(), counts[:top].tolist())
+    ]
+
+
+def compute_stats(
+    columns: Columns,
+    top: int = 10,
+    utc_offset_hours: float = 0,
+    channel_names: dict[str, str | None] | None = None,
+) -> dict:
+    """
+    Per-channel volume, top posters and first-reply latency of threads, the
+    same across all channels, and a weekday by hour heatmap of message counts
+    (in UTC shifted by utc_offset_hours).
+    """
+    require_numpy()
+    channel_names = channel_names or {}
+    n_users = len(columns.users)
+    n_channels = len(columns.channels)
+    # Messages without a user (-1) never count as posts.
+    posted = columns.user >= 0
+
+    # Global top posters.
+    user_counts = np.bincount(columns.user[posted], minlength=n_users)
+    ranked = np.argsort(-user_counts, kind="stable")
+    ranked = ranked[user_counts[ranked] > 0]
+    overall_top = top_posters(ranked, user_counts[ranked], columns.users, top)
+
+    # Top posters per channel: count (channel, user) pairs, sort each channel's
+    # pairs by count and keep the first `top` of every channel.
+    pairs = (
+        columns.channel[posted].astype(np.int64) * max(n_users, 1)
+        + columns.user[posted]
+    )
+    pair_keys, pair_counts = np.unique(pairs, return_counts=True)
+    pair_channel = pair_keys // max(n_users, 1)
+    pair_user = pair_keys % max(n_users, 1)
+    order = np.lexsort((-pair_counts, pair_channel))
+    pair_channel, pair_user, pair_counts = (
+        pair_channel[order],
+        pair_user[order],
+        pair_counts[order],
+    )
+    rank = np.arange(len(order)) - np.searchsorted(pair_channel, pair_channel)
+    keep = rank < top
+    pair_channel, pair_user, pair_counts = (
+        pair_channel[keep],
+        pair_user[keep],
+        pair_counts[keep],
+    )
+    bounds = np.searchsorted(pair_channel, np.arange(n_channels + 1))
+
+    # Response latency, overall and per channel.
+    latencies, latency_channel = first_reply_latencies(columns)
+    latency_bounds = np.searchsorted(latency_channel, np.arange(n_channels + 1))
+
+    volume = np.bincount(columns.channel, minlength=n_channels)
+    channels = []
+    for index in np.argsort(-volume, kind="stable").tolist():
+        channel_id = columns.channels[index]
+        start, stop = bounds[index], bounds[index + 1]
+        channels.append(
+            {
+                "channel_id": channel_id,
+                "channel_name": channel_names.get(channel_id),
+                "messages": int(volume[index]),
+                "top_posters": top_posters(
+                    pair_user[start:stop],
+                    pair_counts[start:stop],
+                    columns.users,
+                    top,
+                ),
+                "response_latency": latency_summary(
+                    latencies[latency_bounds[index] : latency_bounds[index + 1]]
+                ),
+            }
+        )
+
+    # Weekday by hour heatmap; the epoch was a Thursday (weekday 3).
+    hours = (columns.ts + int(utc_offset_hours * MICROS_PER_HOUR)) // MICROS_PER_HOUR
+    cells = ((hours // 24 + 3) % 7) * 24 + hours % 24
+    heatmap = np.bincount(cells, minlength=7 * 24).reshape(7, 24)
+
+    return {
+        "messages": int(len(columns.ts)),
+        "oldest": micros_to_ts(int(columns.ts.min())) if len(columns.ts) else None,
+        "latest": micros_to_ts(int(columns.ts.max())) if len(columns.ts) else None,
+        "top_posters": overall_top,
+        "response_latency": latency_summary(latencies),
+        "channels": channels,
+        "heatmap": {
+            "utc_offset_hours": utc_offset_hours,
+            "weekdays": WEEKDAYS,
+            "counts": heatmap.tolist(),
+        },
+    }
@@ -0,0 +1,541 @@
+"""
+Storage for archived messages.
+
+The archive lives in archive.sqlite in the configuration directory, apart from
+config.sqlite, so that bulk writes never hold the configuration database's
+lock. It is accessed through the standard library's sqlite3 for batched
+inserts and columnar reads; its schema is versioned with PRAGMA user_version
+and upgraded whenever it is opened.
+
+archive.sqlite is the catalog: it records the archived channels with their
+sync state and the shard holding their messages. An archive created with
+several shards keeps messages in archive-000.sqlite, archive-001.sqlite, ...,
+each with its own write lock (see Archive); otherwise archive.sqlite is also
+its only shard. Every file has the same schema.
+
+Each message is stored once, keyed by (workspace_id, channel_id, ts). The
+columns used to filter and aggregate are stored as plain values, with ts and
+thread_ts as integer microseconds and the author as an integer user_key into
+the users table; all other fields are kept in payload as encoded JSON (see
+MessageRecord), compressed (see codec).
+
+New archive files use incremental auto-vacuum, so that the pages freed by
+pruning can be returned to the filesystem in short steps (see maintenance).
+"""
+
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from slack_clacks.configuration.database import get_config_dir
+from slack_clacks.messaging.records import MessageRecord
+
+from .codec import PayloadCodec
+
+ARCHIVE_FILE = "archive.sqlite"
+
+# Schema migrations; the archive's user_version is the number applied.
+MIGRATIONS = [
+    """
+    CREATE TABLE messages (
+        workspace_id TEXT NOT NULL,
+        channel_id TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        thread_ts INTEGER,
+        user_key INTEGER,
+        text TEXT,
+        reply_count INTEGER NOT NULL DEFAULT 0,
+        reaction_count INTEGER NOT NULL DEFAULT 0,
+        edited INTEGER NOT NULL DEFAULT 0,
+        payload BLOB NOT NULL,
+        PRIMARY KEY (workspace_id, channel_id, ts)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE users (
+        user_key INTEGER PRIMARY KEY,
+        user_id TEXT NOT NULL UNIQUE
+    );
+
+    CREATE TABLE channels (
+        workspace_id TEXT NOT NULL,
+        channel_id TEXT NOT NULL,
+        name TEXT,
+        synced_ts INTEGER,
+        PRIMARY KEY (workspace_id, channel_id)
+    );
+
+    CREATE TABLE threads (
+        workspace_id TEXT NOT NULL,
+        channel_id TEXT NOT NULL,
+        thread_ts INTEGER NOT NULL,
+        latest_reply INTEGER NOT NULL,
+        PRIMARY KEY (workspace_id, channel_id, thread_ts)
+    );
+    """,
+    # Covering indexes for clacks query. They hold every filtered column, so
+    # filters are evaluated without reading the wide text and payload of rows
+    # that do not match. (messages_channel_ts duplicates the order of the
+    # primary key for that reason.)
+    """
+    CREATE INDEX messages_channel_ts ON messages (
+        workspace_id, channel_id, ts,
+        user_key, thread_ts, reply_count, reaction_count, edited
+    );
+    CREATE INDEX messages_user_ts ON messages (
+        workspace_id, user_key, ts,
+        channel_id, thread_ts, reply_count, reaction_count, edited
+    );
+    CREATE INDEX messages_thread_ts ON messages (
+        workspace_id, thread_ts, ts,
+        channel_id, user_key, reply_count, reaction_count, edited
+    );
+    """,
+    """
+    CREATE TABLE settings (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+
+    ALTER TABLE channels ADD COLUMN shard INTEGER NOT NULL DEFAULT 0;
+    """,
+    # Compression dictionaries and retention policies, kept in the catalog. A
+    # workspace's default policy has an empty channel_id.
+    """
+    CREATE TABLE dictionaries (
+        dictionary_id INTEGER PRIMARY KEY,
+        workspace_id TEXT NOT NULL,
+        data BLOB NOT NULL,
+        created_at INTEGER NOT NULL
+    );
+
+    CREATE TABLE retention (
+        workspace_id TEXT NOT NULL,
+        channel_id TEXT NOT NULL,
+        max_age_days REAL NOT NULL,
+        PRIMARY KEY (workspace_id, channel_id)
+    );
+    """,
+]
+
+
+def get_archive_path(config_dir: str | Path | None = None) -> Path:
+    return get_config_dir(config_dir) / ARCHIVE_FILE
+
+
+def migrate(connection: sqlite3.Connection) -> None:
+    """Apply the migrations the archive has not seen yet."""
+    (version,) = connection.execute("PRAGMA user_version").fetchone()
+    for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+        connection.executescript(f"BEGIN; {script}; PRAGMA user_version = {number};")
+        connection.commit()
+
+
+def open_archive(path: str | Path) -> sqlite3.Connection:
+    """
+    Open (creating and upgrading if needed) an archive database. WAL mode lets
+    readers run while a sync is writing. The connection may be used from any
+    thread, and waits up to a minute for other processes' write locks.
+    """
+    connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+    # Only takes effect on a new file; see vacuum_archive() for older ones.
+    connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    migrate(connection)
+    return connection
+
+
+def get_shard_path(path: str | Path, index: int) -> Path:
+    path = Path(path)
+    return path.with_name(f"{path.stem}-{index:03d}{path.suffix}")
+
+
+def hash_shard(workspace_id: str, channel_id: str, shard_count: int) -> int:
+    """Shard of a channel not yet in the catalog."""
+    return zlib.crc32(f"{workspace_id}/{channel_id}".encode()) % shard_count
+
+
+class Archive:
+    """
+    The catalog of an archive and its shards.
+
+    The shard count is fixed when the archive is created. Each channel lives in
+    one shard, chosen by a hash of its ID when it is first archived and
+    recorded in the catalog. Shards are separate SQLite files, so channels in
+    different shards can be written by different processes at the same time,
+    and read concurrently. Shard connections are opened on first use.
+    """
+
+    def __init__(self, path: str | Path, shards: int | None = None) -> None:
+        self.path = path
+        self.catalog = open_archive(path)
+        row = self.catalog.execute(
+            "SELECT value FROM settings WHERE key = 'shards'"
+        ).fetchone()
+        if row is None:
+            if shards is not None and shards > 1 and str(path) == ":memory:":
+                raise ValueError("An in-memory archive cannot be sharded.")
+            self.shard_count = shards or 1
+            self.catalog.execute(
+                "INSERT INTO settings VALUES ('shards', ?)", (str(self.shard_count),)
+            )
+            self.catalog.commit()
+        else:
+            self.shard_count = int(row[0])
+            if shards is not None and shards != self.shard_count:
+                raise ValueError(
+                    f"The archive has {self.shard_count} shard(s) and cannot be "
+                    f"resharded to {shards}."
+                )
+        self._shards: dict[int, sqlite3.Connection] = {}
+        self._codecs: dict[str | None, PayloadCodec] = {}
+        self._lock = threading.Lock()
+
+    def shard(self, index: int) -> sqlite3.Connection:
+        if self.shard_count == 1:
+            return self.catalog
+        with self._lock:
+            if index not in self._shards:
+                self._shards[index] = open_archive(get_shard_path(self.path, index))
+            return self._shards[index]
+
+    def shards(self) -> list[sqlite3.Connection]:
+        return [self.shard(index) for index in range(self.shard_count)]
+
+    def channel_shard(self, workspace_id: str, channel_id: str) -> int:
+        row = self.catalog.execute(
+            "SELECT shard FROM channels WHERE workspace_id = ? AND channel_id = ?",
+            (workspace_id, channel_id),
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        return hash_shard(workspace_id, channel_id, self.shard_count)
+
+    def shard_for(self, workspace_id: str, channel_id: str) -> sqlite3.Connection:
+        return self.shard(self.channel_shard(workspace_id, channel_id))
+
+    def codec(self, workspace_id: str | None = None) -> PayloadCodec:
+        """
+        Codec compressing payloads with the newest dictionary of the workspace
+        (if any), and decompressing payloads of any workspace.
+        """
+        if workspace_id not in self._codecs:
+            dictionaries = dict(
+                self.catalog.execute("SELECT dictionary_id, data FROM dictionaries")
+            )
+            row = self.catalog.execute(
+                "SELECT dictionary_id FROM dictionaries WHERE workspace_id = ? "
+                "ORDER BY created_at DESC, rowid DESC LIMIT 1",
+                (workspace_id,),
+            ).fetchone()
+            self._codecs[workspace_id] = PayloadCodec(
+                dictionaries, row[0] if row else None
+            )
+        return self._codecs[workspace_id]
+
+    def reset_codecs(self) -> None:
+        """Forget cached codecs, after dictionaries have been added."""
+        self._codecs.clear()
+
+    def commit(self) -> None:
+        for connection in [*self._shards.values(), self.catalog]:
+            connection.commit()
+
+    def rollback(self) -> None:
+        for connection in [*self._shards.values(), self.catalog]:
+            connection.rollback()
+
+    def close(self) -> None:
+        for connection in [*self._shards.values(), self.catalog]:
+            connection.close()
+
+
+@contextmanager
+def get_archive(
+    config_dir: str | Path | None = None, shards: int | None = None
+) -> Iterator[Archive]:
+    """
+    The archive, committed on success and rolled back on error. shards sets
+    the shard count of a new archive.
+
+    Usage:
+        with get_archive(config_dir) as archive:
+            ...
+    """
+    archive = Archive(get_archive_path(config_dir), shards=shards)
+    try:
+        yield archive
+        archive.commit()
+    except Exception:
+        archive.rollback()
+        raise
+    finally:
+        archive.close()
+
+
+# Message columns as returned by row_to_message(), with the user_id resolved.
+MESSAGE_COLUMNS = """
+    messages.channel_id, messages.ts, messages.thread_ts, users.user_id,
+    messages.text, messages.payload
+"""
+MESSAGE_SOURCE = "messages LEFT JOIN users ON users.user_key = messages.user_key"
+
+
+def get_user_keys(
+    connection: sqlite3.Connection, user_ids: Iterable[str]
+) -> dict[str, int]:
+    """Keys of the given users, adding users that have none yet."""
+    ordered = sorted(set(user_ids))
+    connection.executemany(
+        "INSERT OR IGNORE INTO users (user_id) VALUES (?)",
+        ((user_id,) for user_id in ordered),
+    )
+    keys = {}
+    for user_id in ordered:
+        (keys[user_id],) = connection.execute(
+            "SELECT user_key FROM users WHERE user_id = ?", (user_id,)
+        ).fetchone()
+    return keys
+
+
+def message_rows(
+    workspace_id: str,
+    channel_id: str,
+    messages: Iterable[dict],
+    codec: PayloadCodec | None = None,
+) -> list[tuple]:
+    """
+    Rows of the messages table for API message dicts, with payloads compressed
+    by codec if given, and the authors' user IDs in place of their user keys
+    (see insert_message_rows). Needs no database, so that it can run in
+    worker processes.
+    """
+    rows = []
+    for message in messages:
+        record = MessageRecord.from_dict({**message, "channel_id": None})
+        reactions: list = message.get("reactions", [])
+        rows.append(
+            (
+                workspace_id,
+                channel_id,
+                record.ts,
+                record.thread_ts,
+                record.user,
+                record.text,
+                message.get("reply_count", 0),
+                sum(reaction.get("count", 0) for reaction in reactions),
+                int("edited" in message),
+                codec.compress(record.extra) if codec is not None else record.extra,
+            )
+        )
+    return rows
+
+
+def insert_message_rows(connection: sqlite3.Connection, rows: list[tuple]) -> int:
+    """
+    Insert or replace rows from message_rows(), resolving their user IDs to
+    keys. Returns the number stored.
+    """
+    user_keys = get_user_keys(connection, (row[4] for row in rows if row[4]))
+    cursor = connection.executemany(
+        "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (*row[:4], user_keys.get(row[4]) if row[4] else None, *row[5:])
+            for row in rows
+        ),
+    )
+    return cursor.rowcount
+
+
+def store_messages(
+    connection: sqlite3.Connection,
+    workspace_id: str,
+    channel_id: str,
+    messages: Iterable[dict],
+    codec: PayloadCodec | None = None,
+) -> int:
+    """
+    Insert or replace messages of a channel, compressing their payloads with
+    codec if given. Returns the number stored.
+    """
+    return insert_message_rows(
+        connection, message_rows(workspace_id, channel_id, messages, codec)
+    )
+
+
+def row_to_message(
+    channel_id: str,
+    ts: int,
+    thread_ts: int | None,
+    user_id: str | None,
+    text: str | None,
+    payload: bytes,
+    codec: PayloadCodec | None = None,
+) -> dict:
+    """
+    API message dict for MESSAGE_COLUMNS, tagged with its channel_id. codec
+    decompresses the payload; without one it must not be compressed.
+    """
+    return MessageRecord(
+        ts=ts,
+        thread_ts=thread_ts,
+        user=user_id,
+        channel_id=channel_id,
+        text=text,
+        extra=codec.decompress(payload) if codec is not None else payload,
+    ).to_dict()
+
+
+def get_channel_state(
+    connection: sqlite3.Connection, workspace_id: str, channel_id: str
+) -> int | None:
+    """ts (microseconds) of the newest top-level message synced, if any."""
+    row = connection.execute(
+        "SELECT synced_ts FROM channels WHERE workspace_id = ? AND channel_id = ?",
+        (workspace_id, channel_id),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def set_channel_state(
+    connection: sqlite3.Connection,
+    workspace_id: str,
+    channel_id: str,
+    name: str | None,
+    synced_ts: int | None,
+    shard: int = 0,
+) -> None:
+    connection.execute(
+        """
+        INSERT INTO channels (workspace_id, channel_id, name, synced_ts, shard)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (workspace_id, channel_id) DO UPDATE SET
+            name = COALESCE(excluded.name, name),
+            synced_ts = MAX(COALESCE(excluded.synced_ts, 0), COALESCE(synced_ts, 0))
+        """,
+        (workspace_id, channel_id, name, synced_ts, shard),
+    )
+
+
+def get_thread_states(
+    connection: sqlite3.Connection, workspace_id: str, channel_id: str
+) -> dict[int, int]:
+    """Map of thread_ts to the latest reply ts archived, in microseconds."""
+    return dict(
+        connection.execute(
+            "SELECT thread_ts, latest_reply FROM threads "
+            "WHERE workspace_id = ? AND channel_id = ?",
+            (workspace_id, channel_id),
+        )
+    )
+
+
+def set_thread_state(
+    connection: sqlite3.Connection,
+    workspace_id: str,
+    channel_id: str,
+    thread_ts: int,
+    latest_reply: int,
+) -> None:
+    connection.execute(
+        "INSERT OR REPLACE INTO threads VALUES (?, ?, ?, ?)",
+        (workspace_id, channel_id, thread_ts, latest_reply),
+    )
+
+
+def set_retention(
+    connection: sqlite3.Connection,
+    workspace_id: str,
+    channel_id: str | None,
+    max_age_days: float,
+) -> None:
+    """Keep a channel's messages (by default, a workspace's) for max_age_days."""
+    if max_age_days <= 0:
+        raise ValueError("Retention must be a positive number of days.")
+    connection.execute(
+        "INSERT OR REPLACE INTO retention VALUES (?, ?, ?)",
+        (workspace_id, channel_id or "", max_age_days),
+    )
+
+
+def clear_retention(
+    connection: sqlite3.Connection, workspace_id: str, channel_id: str | None
+) -> bool:
+    """Remove a retention policy. Returns whether there was one."""
+    cursor = connection.execute(
+        "DELETE FROM retention WHERE workspace_id = ? AND channel_id = ?",
+        (workspace_id, channel_id or ""),
+    )
+    return cursor.rowcount > 0
+
+
+def get_retention_policies(
+    connection: sqlite3.Connection, workspace_id: str
+) -> dict[str | None, float]:
+    """Map of channel_id (None for the workspace default) to max age in days."""
+    return {
+        channel_id or None: max_age_days
+        for channel_id, max_age_days in connection.execute(
+            "SELECT channel_id, max_age_days FROM retention WHERE workspace_id = ?",
+            (workspace_id,),
+        )
+    }
+
+
+def get_retention_cutoff(
+    connection: sqlite3.Connection,
+    workspace_id: str,
+    channel_id: str,
+    now: float | None = None,
+) -> int | None:
+    """
+    ts (microseconds) before which a channel's messages are not kept, by its
+    own retention policy or else the workspace default; None if neither.
+    """
+    row = connection.execute(
+        "SELECT max_age_days FROM retention WHERE workspace_id = ? "
+        "AND channel_id IN (?, '') ORDER BY channel_id = '' LIMIT 1",
+        (workspace_id, channel_id),
+    ).fetchone()
+    if row is None:
+        return None
+    now = time.time() if now is None else now
+    return int((now - row[0] * 86400) * 1_000_000)
+
+
+def resolve_archived_channels(
+    connection: sqlite3.Connection, workspace_id: str, channels: list[str]
+) -> list[str]:
+    """
+    Channel IDs for IDs or names (#general or general) of archived channels.
+    Raises ValueError for channels that are not in the archive.
+    """
+    channel_ids = []
+    for channel in channels:
+        row = connection.execute(
+            "SELECT channel_id FROM channels WHERE workspace_id = ? "
+            "AND (channel_id = ? OR name = ?)",
+            (workspace_id, channel, channel.lstrip("#")),
+        ).fetchone()
+        if row is None:
+            raise ValueError(
+                f"Channel '{channel}' is not archived. Archive it with: "
+                f"clacks sync -c {channel}"
+            )
+        channel_ids.append(row[0])
+    return channel_ids
+
+
+def get_channel_names(
+    connection: sqlite3.Connection, workspace_id: str
+) -> dict[str, str | None]:
+    return dict(
+        connection.execute(
+            "SELECT channel_id, name FROM channels WHERE workspace_id = ?",
+            (workspace_id,),
+        )
+    )
@@ -0,0 +1,209 @@
+"""
+Copying channel history into the archive.
+"""
+
+import sqlite3
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Iterator
+
+from slack_sdk import WebClient
+
+from slack_clacks.messaging.operations import paginate, read_all_replies
+from slack_clacks.messaging.records import micros_to_ts, ts_to_micros
+from slack_clacks.ratelimit import RateLimiter
+
+from .codec import PayloadCodec
+from .store import (
+    Archive,
+    get_channel_state,
+    get_retention_cutoff,
+    get_thread_states,
+    set_channel_state,
+    set_thread_state,
+    store_messages,
+)
+
+
+def fetch_history(
+    client: WebClient,
+    channel_id: str,
+    harvested: dict[int, int],
+    oldest: str | None = None,
+    latest: str | None = None,
+    inclusive: bool = False,
+    max_workers: int = 8,
+    limiter: RateLimiter | None = None,
+) -> Iterator[tuple[int | None, list[dict]]]:
+    """
+    Fetch the messages of a channel between oldest and latest, passed on to
+    conversations.history, along with the new replies of their threads:
+    those posted after the latest reply in harvested (see get_thread_states),
+    or all of them for threads not in it.
+
+    Yields (None, messages) for each page of history as it arrives, and
+    (thread_ts, replies) for each thread whose replies were fetched, while
+    the replies of the other threads are fetched concurrently.
+    """
+
+    def fetch(parent: dict) -> tuple[int | None, list[dict]]:
+        thread_ts = ts_to_micros(parent["ts"])
+        latest = harvested.get(thread_ts)
+        replies = read_all_replies(
+            client,
+            channel_id,
+            parent["ts"],
+            oldest=micros_to_ts(latest) if latest is not None else None,
+            limiter=limiter,
+        )
+        return thread_ts, replies
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending: set[Future] = set()
+        for page in paginate(
+            client.conversations_history,
+            limiter=limiter,
+            channel=channel_id,
+            oldest=oldest,
+            latest=latest,
+            inclusive=inclusive,
+            limit=200,
+        ):
+            messages: list = page.get("messages", [])
+            yield None, messages
+            for message in messages:
+                if not message.get("reply_count"):
+                    continue
+                ts = ts_to_micros(message["ts"])
+                latest_reply = message.get("latest_reply")
+                if latest_reply and harvested.get(ts) == ts_to_micros(latest_reply):
+                    continue
+                pending.add(executor.submit(fetch, message))
+
+            done, pending = wait(pending, timeout=0, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def newest_ts(messages: list[dict], newest: int | None = None) -> int | None:
+    """ts (microseconds) of the newest of messages, or newest if later."""
+    for message in messages:
+        ts = ts_to_micros(message["ts"])
+        newest = ts if newest is None else max(newest, ts)
+    return newest
+
+
+def archive_history(
+    connection: sqlite3.Connection,
+    client: WebClient,
+    workspace_id: str,
+    channel_id: str,
+    oldest: str | None = None,
+    latest: str | None = None,
+    inclusive: bool = False,
+    max_workers: int = 8,
+    limiter: RateLimiter | None = None,
+    codec: PayloadCodec | None = None,
+) -> tuple[int, int, int | None]:
+    """
+    Archive the messages of a channel between oldest and latest, along with
+    the new replies of their threads (see fetch_history). Each page is stored
+    as it arrives, with payloads compressed by codec. Nothing is committed.
+
+    Returns the number of messages and threads archived, and the ts of the
+    newest message (microseconds), if any.
+    """
+    harvested = get_thread_states(connection, workspace_id, channel_id)
+    stored = threads = 0
+    newest = None
+    for thread_ts, messages in fetch_history(
+        client,
+        channel_id,
+        harvested,
+        oldest=oldest,
+        latest=latest,
+        inclusive=inclusive,
+        max_workers=max_workers,
+        limiter=limiter,
+    ):
+        stored += store_messages(connection, workspace_id, channel_id, messages, codec)
+        if thread_ts is None:
+            newest = newest_ts(messages, newest)
+        else:
+            seen = [thread_ts, *(ts_to_micros(reply["ts"]) for reply in messages)]
+            set_thread_state(connection, workspace_id, channel_id, thread_ts, max(seen))
+            threads += 1
+    return stored, threads, newest
+
+
+def sync_window_start(
+    archive: Archive,
+    workspace_id: str,
+    channel_id: str,
+    oldest: str | None = None,
+    full: bool = False,
+) -> str | None:
+    """
+    ts after which a sync of a channel fetches messages: that of its last
+    sync unless full, else oldest, but never before its retention cutoff.
+    """
+    synced_ts = (
+        None if full else get_channel_state(archive.catalog, workspace_id, channel_id)
+    )
+    if synced_ts is not None:
+        oldest = micros_to_ts(synced_ts)
+    cutoff = get_retention_cutoff(archive.catalog, workspace_id, channel_id)
+    if cutoff is not None and (oldest is None or ts_to_micros(oldest) < cutoff):
+        oldest = micros_to_ts(cutoff)
+    return oldest
+
+
+def sync_channel(
+    archive: Archive,
+    client: WebClient,
+    workspace_id: str,
+    channel_id: str,
+    name: str | None = None,
+    oldest: str | None = None,
+    full: bool = False,
+    max_workers: int = 8,
+    limiter: RateLimiter | None = None,
+) -> dict:
+    """
+    Archive the messages of a channel posted since its last sync (or since
+    oldest, or from the beginning) along with the new replies of their
+    threads. The channel's shard is committed before its sync state in the
+    catalog, so an interrupted sync starts over from the same point.
+
+    Thread replies posted after a sync to threads whose parents predate it are
+    only picked up by a full sync (full=True), which rescans the whole window.
+    Messages older than the channel's retention policy are never fetched.
+
+    Returns counts of the messages and threads archived.
+    """
+    oldest = sync_window_start(archive, workspace_id, channel_id, oldest, full)
+    shard = archive.channel_shard(workspace_id, channel_id)
+    connection = archive.shard(shard)
+    stored, threads, newest = archive_history(
+        connection,
+        client,
+        workspace_id,
+        channel_id,
+        oldest=oldest,
+        max_workers=max_workers,
+        limiter=limiter,
+        codec=archive.codec(workspace_id),
+    )
+    connection.commit()
+    set_channel_state(archive.catalog, workspace_id, channel_id, name, newest, shard)
+    archive.catalog.commit()
+    return {
+        "channel_id": channel_id,
+        "shard": shard,
+        "messages": stored,
+        "threads": threads,
+    }
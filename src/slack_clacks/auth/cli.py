@@ -2,6 +2,7 @@ import argparse
 import json
 import sys
 
+from slack_clacks.configuration.cache import add_cache_arguments
 from slack_clacks.configuration.database import (
     add_context,
     delete_context,
@@ -9,9 +10,11 @@ from slack_clacks.configuration.database import (
     get_context,
     get_current_context,
     get_session,
+    list_all_contexts,
     set_current_context,
     update_context,
 )
+from slack_clacks.configuration.models import Context
 
 from .cert import generate_self_signed_cert, get_cert_info
 from .constants import MODE_CLACKS, MODE_CLACKS_LITE
@@ -97,52 +100,96 @@ def handle_cert_info(args: argparse.Namespace) -> None:
         json.dump(output, ofp)
 
 
+def build_status(
+    context: Context,
+    user_response: dict | Exception,
+    team_response: dict | Exception,
+) -> dict:
+    user = user_response.get("user", {}) if isinstance(user_response, dict) else {}
+    team = team_response.get("team", {}) if isinstance(team_response, dict) else {}
+    return {
+        "context": context.name,
+        "user_name": user.get("real_name"),
+        "user_id": context.user_id,
+        "user_email": user.get("profile", {}).get("email"),
+        "workspace_id": context.workspace_id,
+        "workspace_name": team.get("name"),
+    }
+
+
 def handle_status(args: argparse.Namespace) -> None:
-    from slack_sdk import WebClient
     from slack_sdk.errors import SlackApiError
 
+    from slack_clacks.client import create_client
+    from slack_clacks.configuration.cache import ResponseCache, fetch_all
+
     ensure_db_updated(config_dir=args.config_dir)
     with get_session(args.config_dir) as session:
-        context = get_current_context(session)
-        if context is None:
-            raise ValueError(
-                "No active authentication context. Authenticate with: clacks auth login"
+        if args.all_contexts:
+            contexts = list_all_contexts(session)
+        else:
+            context = get_current_context(session)
+            if context is None:
+                raise ValueError(
+                    "No active authentication context. "
+                    "Authenticate with: clacks auth login"
+                )
+            contexts = [context]
+
+        # Profile and workspace metadata come from the response cache. An
+        # expired entry is still served, once; the next status call fetches it
+        # again along with its other lookups.
+        caches = [
+            (
+                ResponseCache(
+                    session,
+                    context.access_token,
+                    enabled=not args.no_cache,
+                    refresh=args.refresh,
+                    serve_stale=True,
+                ),
+                create_client(context.access_token),
+            )
+            for context in contexts
+        ]
+        methods = ["users.info", "team.info"]
+        if args.all_contexts:
+            methods.append("auth.test")
+        calls = [
+            (
+                cache,
+                client,
+                method,
+                {"user": context.user_id} if method == "users.info" else {},
             )
+            for context, (cache, client) in zip(contexts, caches)
+            for method in methods
+        ]
+        results = fetch_all(calls, max_workers=args.workers)
+
+        outputs = []
+        for i, context in enumerate(contexts):
+            user_response, team_response, *health = results[
+                i * len(methods) : (i + 1) * len(methods)
+            ]
+            status = build_status(context, user_response, team_response)
+            if health:
+                auth_response = health[0]
+                status["ok"] = not isinstance(auth_response, Exception)
+                if isinstance(auth_response, SlackApiError):
+                    status["error"] = auth_response.response.get("error")
+                elif isinstance(auth_response, Exception):
+                    status["error"] = f"{type(auth_response).__name__}: {auth_response}"
+                else:
+                    status["error"] = None
+            outputs.append(status)
 
-        client = WebClient(token=context.access_token)
-
-        user_name = None
-        user_email = None
-        try:
-            user_response = client.users_info(user=context.user_id)
-            user = user_response["user"]
-            user_name = user.get("real_name")
-            user_email = user.get("profile", {}).get("email")
-        except SlackApiError:
-            pass
-
-        workspace_name = None
-        try:
-            team_response = client.team_info()
-            team = team_response["team"]
-            workspace_name = team.get("name")
-        except SlackApiError:
-            pass
-
-        output = {
-            "context": context.name,
-            "user_name": user_name,
-            "user_id": context.user_id,
-            "user_email": user_email,
-            "workspace_id": context.workspace_id,
-            "workspace_name": workspace_name,
-        }
         with args.outfile as ofp:
-            json.dump(output, ofp)
+            json.dump(outputs if args.all_contexts else outputs[0], ofp)
 
 
 def handle_logout(args: argparse.Namespace) -> None:
-    from slack_sdk import WebClient
+    from slack_clacks.client import create_client
 
     ensure_db_updated(config_dir=args.config_dir)
     with get_session(args.config_dir) as session:
@@ -155,7 +202,7 @@ def handle_logout(args: argparse.Namespace) -> None:
             if context is None:
                 raise ValueError("No active authentication context.")
 
-        client = WebClient(token=context.access_token)
+        client = create_client(context.access_token)
         response = client.auth_revoke()
 
         delete_context(session, context.name)
@@ -252,7 +299,13 @@ def generate_cli() -> argparse.ArgumentParser:
     cert_info_parser.set_defaults(func=handle_cert_info)
 
     status_parser = subparsers.add_parser(
-        "status", help="Show current authentication status"
+        "status",
+        help="Show current authentication status",
+        description=(
+            "Show current authentication status. Expired profile and workspace "
+            "metadata is served from the cache once, and fetched again by the "
+            "next status call."
+        ),
     )
     status_parser.add_argument(
         "-D",
@@ -261,6 +314,18 @@ def generate_cli() -> argparse.ArgumentParser:
         default=None,
         help="Configuration directory (default: platform-specific user config dir)",
     )
+    status_parser.add_argument(
+        "--all-contexts",
+        action="store_true",
+        help="Check the token health of every stored context in parallel",
+    )
+    status_parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Concurrent requests (default: 8)",
+    )
+    add_cache_arguments(status_parser)
     status_parser.add_argument(
         "-o",
         "--outfile",
@@ -7,7 +7,6 @@ import webbrowser
 from pathlib import Path
 from typing import Dict, Optional
 
-from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 
 from slack_clacks.auth.cert import ensure_cert_exists
@@ -23,6 +22,7 @@ from slack_clacks.auth.constants import (
     OAUTH_PORT,
     REDIRECT_URI,
 )
+from slack_clacks.client import create_client
 
 
 class OAuthCallbackHandler(http.server.BaseHTTPRequestHandler):
@@ -148,7 +148,7 @@ def start_oauth_flow(
 
     authorization_code = OAuthCallbackHandler.authorization_code
 
-    client = WebClient()
+    client = create_client()
     try:
         response = client.oauth_v2_access(
             client_id=client_id,
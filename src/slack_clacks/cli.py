@@ -1,13 +1,24 @@
 import argparse
 from importlib.metadata import version
 
+from slack_clacks.archive.cli import (
+    generate_archive_cli,
+    generate_query_parser,
+    generate_stats_parser,
+    generate_sync_parser,
+)
 from slack_clacks.auth.cli import generate_cli as generate_auth_cli
 from slack_clacks.configuration.cli import generate_cli as generate_config_cli
+from slack_clacks.export.cli import generate_export_parser
+from slack_clacks.files.cli import generate_cli as generate_files_cli
+from slack_clacks.files.cli import generate_upload_parser
 from slack_clacks.messaging.cli import (
     generate_react_parser,
     generate_read_parser,
     generate_recent_parser,
+    generate_search_parser,
     generate_send_parser,
+    generate_watch_parser,
 )
 
 
@@ -20,6 +31,24 @@ def generate_cli() -> argparse.ArgumentParser:
         action="version",
         version=version("slack-clacks"),
     )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        metavar="FILE",
+        help=(
+            "Write a Chrome trace of the command's phases and Slack API calls "
+            "to FILE (default: $CLACKS_TRACE, if set)"
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        metavar="FILE",
+        help=(
+            "Run the command under cProfile, write its statistics to FILE and "
+            "print the time spent in each phase to stderr"
+        ),
+    )
     parser.set_defaults(func=lambda _: parser.print_help())
     subparsers = parser.add_subparsers()
 
@@ -68,4 +97,73 @@ def generate_cli() -> argparse.ArgumentParser:
         help=react_parser.description,
     )
 
+    search_parser = generate_search_parser()
+    subparsers.add_parser(
+        "search",
+        parents=[search_parser],
+        add_help=False,
+        help=search_parser.description,
+    )
+
+    watch_parser = generate_watch_parser()
+    subparsers.add_parser(
+        "watch",
+        parents=[watch_parser],
+        add_help=False,
+        help=watch_parser.description,
+    )
+
+    upload_parser = generate_upload_parser()
+    subparsers.add_parser(
+        "upload",
+        parents=[upload_parser],
+        add_help=False,
+        help=upload_parser.description,
+    )
+
+    files_parser = generate_files_cli()
+    subparsers.add_parser(
+        "files", parents=[files_parser], add_help=False, help=files_parser.description
+    )
+
+    sync_parser = generate_sync_parser()
+    subparsers.add_parser(
+        "sync",
+        parents=[sync_parser],
+        add_help=False,
+        help=sync_parser.description,
+    )
+
+    query_parser = generate_query_parser()
+    subparsers.add_parser(
+        "query",
+        parents=[query_parser],
+        add_help=False,
+        help=query_parser.description,
+    )
+
+    stats_parser = generate_stats_parser()
+    subparsers.add_parser(
+        "stats",
+        parents=[stats_parser],
+        add_help=False,
+        help=stats_parser.description,
+    )
+
+    export_parser = generate_export_parser()
+    subparsers.add_parser(
+        "export",
+        parents=[export_parser],
+        add_help=False,
+        help=export_parser.description,
+    )
+
+    archive_parser = generate_archive_cli()
+    subparsers.add_parser(
+        "archive",
+        parents=[archive_parser],
+        add_help=False,
+        help=archive_parser.description,
+    )
+
     return parser
@@ -0,0 +1,122 @@
+"""
+Construction of Slack Web API clients.
+"""
+
+import threading
+
+from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+from slack_sdk.http_retry import HttpRequest, HttpResponse, RetryHandler, RetryState
+from slack_sdk.http_retry.builtin_handlers import RateLimitErrorRetryHandler
+from slack_sdk.web import SlackResponse
+
+from slack_clacks import tracing
+
+DEFAULT_RATE_LIMIT_RETRIES = 3
+
+
+def rate_limit_headers(headers) -> dict:
+    """
+    Retry-After and X-RateLimit-* headers of a response. Header values may be
+    lists of values, as slack_sdk passes them to retry handlers for errors.
+    """
+    return {
+        key.lower(): value[0] if isinstance(value, list) else value
+        for key, value in headers.items()
+        if key.lower() == "retry-after" or key.lower().startswith("x-ratelimit")
+    }
+
+
+class AttemptRecorder(RetryHandler):
+    """
+    A retry handler that never retries, but records every HTTP attempt of the
+    calls in progress: WebClient asks its retry handlers, in order, about each
+    response and error until one retries, so the first handler sees them all.
+    """
+
+    def __init__(self, calls: threading.local) -> None:
+        super().__init__(max_retry_count=0)
+        self.calls = calls
+
+    def can_retry(
+        self,
+        *,
+        state: RetryState,
+        request: HttpRequest,
+        response: HttpResponse | None = None,
+        error: Exception | None = None,
+    ) -> bool:
+        self.calls.attempts += 1
+        if response is not None:
+            self.calls.bytes += len(response.data or b"")
+            self.calls.rate_limit.update(rate_limit_headers(response.headers))
+        return False
+
+
+class TracingWebClient(WebClient):
+    """
+    A WebClient that records each API call as a span of the invocation's
+    trace: the method, its page of a cursor-paginated listing, how many
+    attempts it took, the bytes received and the rate limit headers returned.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # Attempts of the API call in progress on each thread.
+        self.calls = threading.local()
+        self.retry_handlers = [AttemptRecorder(self.calls), *self.retry_handlers]
+        # The page each outstanding next_cursor leads to, shared by threads.
+        self.pages: dict[str, int] = {}
+        self.pages_lock = threading.Lock()
+
+    def api_call(self, api_method: str, **kwargs) -> SlackResponse:  # type: ignore[override]
+        params = {
+            **(kwargs.get("params") or {}),
+            **(kwargs.get("data") or {}),
+            **(kwargs.get("json") or {}),
+        }
+        cursor = params.get("cursor")
+        page = 1
+        if cursor:
+            with self.pages_lock:
+                page = self.pages.pop(cursor, 2)
+        self.calls.attempts = 0
+        self.calls.bytes = 0
+        self.calls.rate_limit = {}
+        with tracing.span(api_method, "slack", method=api_method, page=page) as args:
+            try:
+                response = super().api_call(api_method, **kwargs)
+                args["status"] = response.status_code
+                next_cursor = (response.get("response_metadata") or {}).get(
+                    "next_cursor"
+                )
+                if next_cursor:
+                    with self.pages_lock:
+                        self.pages[next_cursor] = page + 1
+                return response
+            except SlackApiError as e:
+                args["status"] = e.response.status_code
+                args["error"] = e.response.get("error")
+                raise
+            finally:
+                args["retries"] = max(self.calls.attempts - 1, 0)
+                args["bytes"] = self.calls.bytes
+                if self.calls.rate_limit:
+                    args["rate_limit"] = self.calls.rate_limit
+
+
+def create_client(
+    token: str | None = None, rate_limit_retries: int = DEFAULT_RATE_LIMIT_RETRIES
+) -> WebClient:
+    """
+    Create a WebClient that retries rate limited (HTTP 429) requests,
+    honouring Slack's Retry-After header. While tracing is on, its API calls
+    are recorded in the trace.
+    """
+    client_class = WebClient if tracing.tracer is None else TracingWebClient
+    client = client_class(token=token)
+    if rate_limit_retries > 0:
+        client.retry_handlers.append(
+            RateLimitErrorRetryHandler(max_retry_count=rate_limit_retries)
+        )
+    return client
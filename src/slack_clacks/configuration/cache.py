@@ -0,0 +1,279 @@
+"""
+Response cache for idempotent Slack Web API read methods.
+
+Responses are stored in the configuration database, keyed by a hash of the
+access token, method and parameters, so they are reused across invocations.
+Each method has its own TTL, and the cache as a whole is kept within a size
+budget by evicting the least recently used entries.
+"""
+
+import argparse
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from slack_clacks.configuration.database import utcnow
+from slack_clacks.configuration.models import ApiCacheEntry, ApiCacheStat
+
+if TYPE_CHECKING:
+    # Only needed for annotations; importing slack_sdk is slow.
+    from slack_sdk import WebClient
+
+CACHE_TTLS: dict[str, timedelta] = {
+    "users.info": timedelta(hours=1),
+    "team.info": timedelta(hours=24),
+    "conversations.info": timedelta(hours=1),
+    "emoji.list": timedelta(hours=24),
+    "conversations.members": timedelta(minutes=15),
+}
+
+DEFAULT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Key in Session.info of the caches written when that session commits.
+SESSION_CACHES = "response_caches"
+
+
+def cache_key(token: str, method: str, params: dict) -> str:
+    """Stable key for a call; the token is hashed, never stored."""
+    material = "\0".join([token, method, json.dumps(params, sort_keys=True)])
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    Cache of Web API responses for one access token.
+
+    enabled=False bypasses the cache entirely (--no-cache). refresh=True skips
+    cached entries but stores fresh responses (--refresh). serve_stale=True
+    returns an expired entry once instead of treating it as a miss: the entry
+    is dropped when the session commits, so the next invocation fetches it
+    afresh along with its other misses, and no command waits on a refresh.
+
+    Lookups only read the configuration database. New entries, access times,
+    expired entries and hit/miss counters are kept in memory and written when
+    the session commits, so the database is locked for writing only by that
+    commit, however long the command runs.
+
+    Methods without an entry in CACHE_TTLS pass through uncached. The session
+    is not thread-safe, so the cache must only be used from one thread; see
+    fetch_all() for concurrent calls.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        token: str,
+        enabled: bool = True,
+        refresh: bool = False,
+        serve_stale: bool = False,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    ) -> None:
+        self.session = session
+        self.token = token
+        self.enabled = enabled
+        self.refresh = refresh
+        self.serve_stale = serve_stale
+        self.max_bytes = max_bytes
+        # Writes waiting for the session to commit.
+        self.entries: dict[str, ApiCacheEntry] = {}
+        self.accessed: dict[str, tuple[datetime, int]] = {}
+        self.expired: set[str] = set()
+        self.counts: dict[str, list[int]] = {}
+        caches = session.info.setdefault(SESSION_CACHES, [])
+        if not caches:
+            event.listen(session, "before_commit", write_caches)
+        caches.append(self)
+
+    def get(self, method: str, params: dict) -> dict | None:
+        """Return the cached response for a call, or None on a miss."""
+        if not self.enabled or method not in CACHE_TTLS:
+            return None
+
+        key = cache_key(self.token, method, params)
+        now = utcnow()
+        entry = None
+        if not self.refresh:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry.accessed_at = now
+                entry.hits += 1
+            elif key not in self.expired:
+                entry = self.session.get(ApiCacheEntry, key)
+                if entry is not None:
+                    _, hits = self.accessed.get(key, (now, 0))
+                    self.accessed[key] = (now, hits + 1)
+        if entry is not None and entry.created_at < now - CACHE_TTLS[method]:
+            self.expired.add(key)
+            self.accessed.pop(key, None)
+            if not self.serve_stale:
+                entry = None
+
+        counts = self.counts.setdefault(method, [0, 0])
+        counts[0 if entry is not None else 1] += 1
+        return json.loads(entry.response) if entry is not None else None
+
+    def put(self, method: str, params: dict, response: dict) -> None:
+        """Store a response, once the session commits."""
+        if not self.enabled or method not in CACHE_TTLS:
+            return
+
+        now = utcnow()
+        serialized = json.dumps(response)
+        key = cache_key(self.token, method, params)
+        self.entries[key] = ApiCacheEntry(
+            key=key,
+            method=method,
+            response=serialized,
+            size=len(serialized),
+            created_at=now,
+            accessed_at=now,
+            hits=0,
+        )
+        self.accessed.pop(key, None)
+        self.expired.discard(key)
+
+    def write(self, session: Session) -> None:
+        """
+        Write what the cache has buffered, evicting least recently used
+        entries if needed. Called as the session commits.
+        """
+        if not (self.entries or self.accessed or self.expired or self.counts):
+            return
+
+        for key in self.expired:
+            if (expired := session.get(ApiCacheEntry, key)) is not None:
+                session.delete(expired)
+        for key, (accessed_at, hits) in self.accessed.items():
+            if (entry := session.get(ApiCacheEntry, key)) is not None:
+                entry.accessed_at = max(entry.accessed_at, accessed_at)
+                entry.hits += hits
+        for entry in self.entries.values():
+            session.merge(entry)
+        for method, (hits, misses) in self.counts.items():
+            stat = session.get(ApiCacheStat, method)
+            if stat is None:
+                stat = ApiCacheStat(method=method, hits=0, misses=0)
+                session.add(stat)
+            stat.hits += hits
+            stat.misses += misses
+        session.flush()
+        self._evict()
+
+        self.entries = {}
+        self.accessed = {}
+        self.expired = set()
+        self.counts = {}
+
+    def call(self, client: "WebClient", method: str, **params) -> dict:
+        """
+        Call a cacheable method (e.g. "users.info") through the cache.
+        Errors are raised as usual and never cached.
+        """
+        cached = self.get(method, params)
+        if cached is not None:
+            return cached
+        response = getattr(client, method.replace(".", "_"))(**params)
+        self.put(method, params, response.data)
+        return response.data
+
+    def _evict(self) -> None:
+        total = self.session.query(func.sum(ApiCacheEntry.size)).scalar() or 0
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+        for entry in self.session.query(ApiCacheEntry).order_by(
+            ApiCacheEntry.accessed_at
+        ):
+            if excess <= 0:
+                break
+            excess -= entry.size
+            self.session.delete(entry)
+        self.session.flush()
+
+
+def write_caches(session: Session) -> None:
+    """Write the buffers of every cache of a session, as it commits."""
+    for cache in session.info[SESSION_CACHES]:
+        cache.write(session)
+
+
+def fetch_all(
+    calls: list[tuple[ResponseCache, "WebClient", str, dict]],
+    max_workers: int = 8,
+) -> list[dict | Exception]:
+    """
+    Make (cache, client, method, params) calls, concurrently for cache misses.
+
+    Cache lookups and stores happen on the calling thread; only the API
+    requests run in the thread pool. Returns the response data of each call in
+    order, or the exception it failed with, so that one failing call (an API
+    error, a timeout, a dropped connection) does not fail the others.
+    """
+    results: list[dict | Exception | None] = [
+        cache.get(method, params) for cache, _, method, params in calls
+    ]
+    misses = [i for i, result in enumerate(results) if result is None]
+
+    def fetch(i: int) -> dict | Exception:
+        _, client, method, params = calls[i]
+        try:
+            return getattr(client, method.replace(".", "_"))(**params).data
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i, result in zip(misses, executor.map(fetch, misses)):
+            results[i] = result
+            if not isinstance(result, Exception):
+                cache, _, method, params = calls[i]
+                cache.put(method, params, result)
+
+    return [result for result in results if result is not None]
+
+
+def get_cache_stats(session: Session) -> list[dict]:
+    """Per-method entry counts, sizes, and hit/miss counters."""
+    sizes = {
+        method: (entries, size)
+        for method, entries, size in session.query(
+            ApiCacheEntry.method,
+            func.count(ApiCacheEntry.key),
+            func.sum(ApiCacheEntry.size),
+        ).group_by(ApiCacheEntry.method)
+    }
+    stats = {stat.method: stat for stat in session.query(ApiCacheStat)}
+    return [
+        {
+            "method": method,
+            "entries": sizes.get(method, (0, 0))[0],
+            "bytes": sizes.get(method, (0, 0))[1],
+            "hits": stats[method].hits if method in stats else 0,
+            "misses": stats[method].misses if method in stats else 0,
+        }
+        for method in sorted(set(sizes) | set(stats))
+    ]
+
+
+def clear_cache(session: Session) -> None:
+    """Delete all cached responses and reset hit/miss counters."""
+    session.query(ApiCacheEntry).delete()
+    session.query(ApiCacheStat).delete()
+    session.flush()
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the response cache",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached responses and refresh the cache",
+    )
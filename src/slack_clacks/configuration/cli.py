@@ -5,6 +5,7 @@ from pathlib import Path
 
 from sqlalchemy import text
 
+from slack_clacks.configuration.cache import clear_cache, get_cache_stats
 from slack_clacks.configuration.database import (
     ensure_db_updated,
     get_config_dir,
@@ -107,6 +108,17 @@ def handle_switch(args: argparse.Namespace) -> None:
         json.dump(output, ofp)
 
 
+def handle_cache(args: argparse.Namespace) -> None:
+    ensure_db_updated(config_dir=args.config_dir)
+    with get_session(args.config_dir) as session:
+        if args.clear:
+            clear_cache(session)
+
+        output = {"methods": get_cache_stats(session)}
+        with args.outfile as ofp:
+            json.dump(output, ofp)
+
+
 def generate_cli() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Manage clacks configuration")
     parser.set_defaults(func=lambda _: parser.print_help())
@@ -202,4 +214,28 @@ def generate_cli() -> argparse.ArgumentParser:
     )
     switch_parser.set_defaults(func=handle_switch)
 
+    cache_parser = subparsers.add_parser(
+        "cache", help="Show (or clear) the API response cache"
+    )
+    cache_parser.add_argument(
+        "-D",
+        "--config-dir",
+        type=Path,
+        default=None,
+        help="Configuration directory (default: platform-specific user config dir)",
+    )
+    cache_parser.add_argument(
+        "--clear",
+        action="store_true",
+        help="Delete all cached responses and reset hit/miss counts",
+    )
+    cache_parser.add_argument(
+        "-o",
+        "--outfile",
+        type=argparse.FileType("a"),
+        default=sys.stdout,
+        help="Output file for JSON results (default: stdout)",
+    )
+    cache_parser.set_defaults(func=handle_cache)
+
     return parser
@@ -2,17 +2,32 @@
 Database initialization and management utilities.
 """
 
+import json
 from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
-from typing import Generator
+from typing import Generator, Iterable
 
 from alembic import command
 from alembic.config import Config
 from platformdirs import user_config_dir
 from sqlalchemy import Connection, create_engine
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import Session, sessionmaker
 
-from slack_clacks.configuration.models import Context, CurrentContext
+from slack_clacks import tracing
+from slack_clacks.configuration.models import (
+    ConfirmedMessage,
+    ConsumerOffset,
+    Context,
+    CurrentContext,
+    ExportCheckpoint,
+    SearchCacheEntry,
+    ThreadState,
+)
+
+# How long a message seen in read/send output is trusted to still exist.
+CONFIRMED_MESSAGE_TTL = timedelta(hours=1)
 
 
 def get_config_dir(config_dir: str | Path | None = None) -> Path:
@@ -67,9 +82,10 @@ def get_session(
             # Use session
             pass
     """
-    engine = get_engine(config_dir=config_dir)
-    SessionLocal = sessionmaker(bind=engine)
-    session = SessionLocal()
+    with tracing.span("get_session", "session"):
+        engine = get_engine(config_dir=config_dir)
+        SessionLocal = sessionmaker(bind=engine)
+        session = SessionLocal()
     try:
         yield session
         session.commit()
@@ -96,6 +112,7 @@ def run_migrations(connection: Connection) -> None:
     command.upgrade(alembic_cfg, "head")
 
 
+@tracing.traced("db")
 def ensure_db_updated(config_dir: str | Path | None = None) -> None:
     """
     Ensure the database is initialized and up-to-date.
@@ -184,8 +201,240 @@ def set_current_context(session: Session, context_name: str) -> CurrentContext:
     return current_context
 
 
+def list_all_contexts(session: Session) -> list[Context]:
+    """List every context, ordered by name."""
+    return session.query(Context).order_by(Context.name).all()
+
+
+def get_contexts(session: Session, names: list[str]) -> list[Context]:
+    """Get contexts by name, in the given order. Raises ValueError if any is missing."""
+    contexts = []
+    for name in names:
+        context = get_context(session, name)
+        if context is None:
+            raise ValueError(f"Context '{name}' does not exist")
+        contexts.append(context)
+    return contexts
+
+
 def list_contexts(session: Session, limit: int, offset: int) -> list[Context]:
     """List contexts with pagination."""
     return (
         session.query(Context).order_by(Context.name).limit(limit).offset(offset).all()
     )
+
+
+def utcnow() -> datetime:
+    """Current UTC time as a naive datetime, the form SQLite round-trips."""
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def record_confirmed_messages(
+    session: Session, workspace_id: str, channel_id: str, timestamps: Iterable[str]
+) -> None:
+    """
+    Remember that messages with these timestamps were just seen to exist.
+    Entries older than CONFIRMED_MESSAGE_TTL are pruned.
+    """
+    now = utcnow()
+    rows = [
+        {
+            "workspace_id": workspace_id,
+            "channel_id": channel_id,
+            "ts": ts,
+            "confirmed_at": now,
+        }
+        for ts in set(timestamps)
+    ]
+    session.query(ConfirmedMessage).filter(
+        ConfirmedMessage.confirmed_at < now - CONFIRMED_MESSAGE_TTL
+    ).delete()
+    if rows:
+        statement = insert(ConfirmedMessage).values(rows)
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["workspace_id", "channel_id", "ts"],
+                set_={"confirmed_at": statement.excluded.confirmed_at},
+            )
+        )
+    session.flush()
+
+
+def is_message_confirmed(
+    session: Session, workspace_id: str, channel_id: str, ts: str
+) -> bool:
+    """Check whether a message was confirmed to exist within CONFIRMED_MESSAGE_TTL."""
+    entry = (
+        session.query(ConfirmedMessage)
+        .filter(
+            ConfirmedMessage.workspace_id == workspace_id,
+            ConfirmedMessage.channel_id == channel_id,
+            ConfirmedMessage.ts == ts,
+            ConfirmedMessage.confirmed_at >= utcnow() - CONFIRMED_MESSAGE_TTL,
+        )
+        .first()
+    )
+    return entry is not None
+
+
+def get_thread_states(
+    session: Session, workspace_id: str, channel_id: str
+) -> dict[str, str]:
+    """Map thread_ts to the latest_reply seen when each thread was harvested."""
+    states = session.query(ThreadState).filter(
+        ThreadState.workspace_id == workspace_id,
+        ThreadState.channel_id == channel_id,
+    )
+    return {state.thread_ts: state.latest_reply for state in states}
+
+
+def record_thread_state(
+    session: Session,
+    workspace_id: str,
+    channel_id: str,
+    thread_ts: str,
+    latest_reply: str,
+) -> None:
+    """Store the latest_reply up to which a thread has been harvested."""
+    statement = insert(ThreadState).values(
+        workspace_id=workspace_id,
+        channel_id=channel_id,
+        thread_ts=thread_ts,
+        latest_reply=latest_reply,
+        harvested_at=utcnow(),
+    )
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["workspace_id", "channel_id", "thread_ts"],
+            set_={
+                "latest_reply": statement.excluded.latest_reply,
+                "harvested_at": statement.excluded.harvested_at,
+            },
+        )
+    )
+    session.flush()
+
+
+def get_cached_search_page(
+    session: Session,
+    workspace_id: str,
+    user_id: str,
+    query: str,
+    sort: str,
+    sort_dir: str,
+    count: int,
+    page: int,
+    max_age: timedelta,
+) -> dict | None:
+    """Return a cached search.messages response no older than max_age."""
+    entry = session.get(
+        SearchCacheEntry, (workspace_id, user_id, query, sort, sort_dir, count, page)
+    )
+    if entry is None or entry.fetched_at < utcnow() - max_age:
+        return None
+    return json.loads(entry.response)
+
+
+def store_search_page(
+    session: Session,
+    workspace_id: str,
+    user_id: str,
+    query: str,
+    sort: str,
+    sort_dir: str,
+    count: int,
+    page: int,
+    response: dict,
+    max_age: timedelta,
+) -> None:
+    """Cache a search.messages response, pruning entries older than max_age."""
+    now = utcnow()
+    session.query(SearchCacheEntry).filter(
+        SearchCacheEntry.fetched_at < now - max_age
+    ).delete()
+    session.merge(
+        SearchCacheEntry(
+            workspace_id=workspace_id,
+            user_id=user_id,
+            query=query,
+            sort=sort,
+            sort_dir=sort_dir,
+            count=count,
+            page=page,
+            response=json.dumps(response),
+            fetched_at=now,
+        )
+    )
+    session.flush()
+
+
+def get_consumer_offset(
+    session: Session, consumer: str, workspace_id: str, channel_id: str
+) -> str | None:
+    """Get the ts of the last message a consumer has read from a channel."""
+    offset = session.get(ConsumerOffset, (consumer, workspace_id, channel_id))
+    return offset.ts if offset is not None else None
+
+
+def commit_consumer_offset(
+    session: Session, consumer: str, workspace_id: str, channel_id: str, ts: str
+) -> None:
+    """Advance a consumer's offset for a channel and commit it."""
+    session.merge(
+        ConsumerOffset(
+            consumer=consumer,
+            workspace_id=workspace_id,
+            channel_id=channel_id,
+            ts=ts,
+            updated_at=utcnow(),
+        )
+    )
+    session.commit()
+
+
+def get_export_checkpoints(
+    session: Session, export: str, workspace_id: str
+) -> dict[str, ExportCheckpoint]:
+    """Checkpoints of an export, by channel ID."""
+    checkpoints = session.query(ExportCheckpoint).filter(
+        ExportCheckpoint.export == export,
+        ExportCheckpoint.workspace_id == workspace_id,
+    )
+    return {checkpoint.channel_id: checkpoint for checkpoint in checkpoints}
+
+
+def commit_export_checkpoint(
+    session: Session,
+    export: str,
+    workspace_id: str,
+    channel_id: str,
+    cursor: str | None,
+    offset: int,
+    messages: int,
+    threads: int,
+    completed: bool = False,
+) -> None:
+    """Record how far the export of a channel has got and commit it."""
+    now = utcnow()
+    session.merge(
+        ExportCheckpoint(
+            export=export,
+            workspace_id=workspace_id,
+            channel_id=channel_id,
+            cursor=cursor,
+            offset=offset,
+            messages=messages,
+            threads=threads,
+            completed_at=now if completed else None,
+            updated_at=now,
+        )
+    )
+    session.commit()
+
+
+def clear_export_checkpoints(session: Session, export: str, workspace_id: str) -> None:
+    session.query(ExportCheckpoint).filter(
+        ExportCheckpoint.export == export,
+        ExportCheckpoint.workspace_id == workspace_id,
+    ).delete()
+    session.commit()
@@ -4,7 +4,7 @@ SQLAlchemy models for slack-clacks configuration database.
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, String
+from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -31,3 +31,80 @@ class CurrentContext(Base):
     context_name: Mapped[str] = mapped_column(
         String, ForeignKey("contexts.name", ondelete="CASCADE"), nullable=False
     )
+
+
+class ConfirmedMessage(Base):
+    __tablename__ = "confirmed_messages"
+
+    workspace_id: Mapped[str] = mapped_column(String, primary_key=True)
+    channel_id: Mapped[str] = mapped_column(String, primary_key=True)
+    ts: Mapped[str] = mapped_column(String, primary_key=True)
+    confirmed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
+class ThreadState(Base):
+    __tablename__ = "thread_states"
+
+    workspace_id: Mapped[str] = mapped_column(String, primary_key=True)
+    channel_id: Mapped[str] = mapped_column(String, primary_key=True)
+    thread_ts: Mapped[str] = mapped_column(String, primary_key=True)
+    latest_reply: Mapped[str] = mapped_column(String, nullable=False)
+    harvested_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class SearchCacheEntry(Base):
+    __tablename__ = "search_cache"
+
+    workspace_id: Mapped[str] = mapped_column(String, primary_key=True)
+    user_id: Mapped[str] = mapped_column(String, primary_key=True)
+    query: Mapped[str] = mapped_column(String, primary_key=True)
+    sort: Mapped[str] = mapped_column(String, primary_key=True)
+    sort_dir: Mapped[str] = mapped_column(String, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, primary_key=True)
+    page: Mapped[int] = mapped_column(Integer, primary_key=True)
+    response: Mapped[str] = mapped_column(Text, nullable=False)
+    fetched_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
+class ApiCacheEntry(Base):
+    __tablename__ = "api_cache"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    method: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    response: Mapped[str] = mapped_column(Text, nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    accessed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    hits: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class ApiCacheStat(Base):
+    __tablename__ = "api_cache_stats"
+
+    method: Mapped[str] = mapped_column(String, primary_key=True)
+    hits: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    misses: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class ConsumerOffset(Base):
+    __tablename__ = "consumer_offsets"
+
+    consumer: Mapped[str] = mapped_column(String, primary_key=True)
+    workspace_id: Mapped[str] = mapped_column(String, primary_key=True)
+    channel_id: Mapped[str] = mapped_column(String, primary_key=True)
+    ts: Mapped[str] = mapped_column(String, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class ExportCheckpoint(Base):
+    __tablename__ = "export_checkpoints"
+
+    export: Mapped[str] = mapped_column(String, primary_key=True)
+    workspace_id: Mapped[str] = mapped_column(String, primary_key=True)
+    channel_id: Mapped[str] = mapped_column(String, primary_key=True)
+    cursor: Mapped[str | None] = mapped_column(String, nullable=True)
+    offset: Mapped[int] = mapped_column(Integer, nullable=False)
+    messages: Mapped[int] = mapped_column(Integer, nullable=False)
+    threads: Mapped[int] = mapped_column(Integer, nullable=False)
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
@@ -0,0 +1,3 @@
+"""
+Resumable exports of Slack conversations.
+"""
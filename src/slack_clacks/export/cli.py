@@ -0,0 +1,127 @@
+import argparse
+import json
+import sys
+
+from slack_clacks.auth.validation import get_scopes_for_mode, validate
+from slack_clacks.client import create_client
+from slack_clacks.configuration.database import (
+    ensure_db_updated,
+    get_current_context,
+    get_session,
+)
+from slack_clacks.projection import add_projection_arguments, make_projection
+from slack_clacks.ratelimit import RateLimiter
+
+from .operations import CONVERSATION_TYPES, export_workspace
+
+
+def handle_export(args: argparse.Namespace) -> None:
+    ensure_db_updated(config_dir=args.config_dir)
+    with get_session(args.config_dir) as session:
+        context = get_current_context(session)
+        if context is None:
+            raise ValueError(
+                "No active authentication context. Authenticate with: clacks auth login"
+            )
+        workspace_id = context.workspace_id
+        scopes = get_scopes_for_mode(context.app_type)
+        client = create_client(context.access_token)
+
+    if args.types:
+        types = args.types.split(",")
+        for conversation_type in types:
+            if conversation_type not in CONVERSATION_TYPES:
+                raise ValueError(f"Unknown conversation type: {conversation_type}")
+            validate(CONVERSATION_TYPES[conversation_type], scopes, raise_on_error=True)
+    else:
+        types = [t for t, scope in CONVERSATION_TYPES.items() if scope in scopes]
+
+    manifest = export_workspace(
+        client,
+        lambda: get_session(args.config_dir),
+        workspace_id,
+        args.directory,
+        types,
+        exclude_archived=args.exclude_archived,
+        oldest=args.oldest,
+        threads=not args.no_threads,
+        max_workers=args.workers,
+        limiter=RateLimiter(args.rate_limit),
+        project=make_projection(args.fields, args.compact),
+        restart=args.restart,
+    )
+    with args.outfile as ofp:
+        json.dump(manifest, ofp)
+
+
+def generate_export_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Export every conversation of the workspace to NDJSON files"
+    )
+    parser.add_argument(
+        "-D",
+        "--config-dir",
+        type=str,
+        help="Configuration directory (default: platform-specific user config dir)",
+    )
+    parser.add_argument(
+        "-d",
+        "--directory",
+        type=str,
+        required=True,
+        help=(
+            "Directory for the per-conversation NDJSON files and manifest.json; "
+            "exporting to it again resumes the export"
+        ),
+    )
+    parser.add_argument(
+        "--types",
+        type=str,
+        help=(
+            "Comma-separated conversation types: public_channel, private_channel, "
+            "mpim, im (default: all that the context's scopes can read)"
+        ),
+    )
+    parser.add_argument(
+        "--exclude-archived",
+        action="store_true",
+        help="Skip archived channels",
+    )
+    parser.add_argument(
+        "--oldest",
+        type=str,
+        help="Only export messages after this timestamp",
+    )
+    parser.add_argument(
+        "--no-threads",
+        action="store_true",
+        help="Export top-level messages only, without thread replies",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Discard the directory's checkpoints and export everything again",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Conversations exported concurrently (default: 4)",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=50,
+        help="Max API requests per minute, shared by all workers (default: 50)",
+    )
+    add_projection_arguments(parser)
+    parser.add_argument(
+        "-o",
+        "--outfile",
+        type=argparse.FileType("a"),
+        default=sys.stdout,
+        help="Output file for the JSON manifest (default: stdout)",
+    )
+    parser.set_defaults(func=handle_export)
+
+    return parser
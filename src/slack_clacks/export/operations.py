@@ -0,0 +1,254 @@
+"""
+Exporting every conversation of a workspace to NDJSON files.
+
+Each conversation is written to <channel_id>.ndjson in the export directory,
+in the order Slack returns its history (newest first), with the replies of
+each thread (oldest first) right after their parent. After every page the
+file is flushed and fsynced, and a checkpoint with the ts of the page's oldest
+message and the file's size is committed to the configuration database. An
+interrupted export resumes each conversation from its checkpoint, discarding
+anything written after it. manifest.json describes every conversation of the
+export and is rewritten as each one finishes.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import AbstractContextManager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Callable
+
+from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+from sqlalchemy.orm import Session
+
+from slack_clacks.configuration.database import (
+    clear_export_checkpoints,
+    commit_export_checkpoint,
+    get_export_checkpoints,
+)
+from slack_clacks.messaging.operations import paginate, read_all_replies
+from slack_clacks.messaging.records import ts_to_micros
+from slack_clacks.projection import Projection
+from slack_clacks.ratelimit import RateLimiter
+from slack_clacks.sinks import StreamSink
+
+MANIFEST_FILE = "manifest.json"
+
+# Conversation types and the scope needed to read their history.
+CONVERSATION_TYPES = {
+    "public_channel": "channels:history",
+    "private_channel": "groups:history",
+    "mpim": "mpim:history",
+    "im": "im:history",
+}
+
+
+def list_conversations(
+    client: WebClient,
+    types: list[str],
+    exclude_archived: bool = False,
+    limiter: RateLimiter | None = None,
+) -> list[dict]:
+    """Every conversation of the given types visible to the user."""
+    conversations: list[dict] = []
+    for page in paginate(
+        client.conversations_list,
+        limiter=limiter,
+        types=",".join(types),
+        exclude_archived=exclude_archived,
+        limit=1000,
+    ):
+        conversations.extend(page.get("channels", []))
+    return conversations
+
+
+def conversation_type(conversation: dict) -> str:
+    if conversation.get("is_im"):
+        return "im"
+    if conversation.get("is_mpim"):
+        return "mpim"
+    if conversation.get("is_private"):
+        return "private_channel"
+    return "public_channel"
+
+
+def export_conversation(
+    client: WebClient,
+    session: Session,
+    export: str,
+    workspace_id: str,
+    channel_id: str,
+    path: Path,
+    oldest: str | None = None,
+    threads: bool = True,
+    limiter: RateLimiter | None = None,
+    project: Projection | None = None,
+) -> dict:
+    """
+    Export a conversation to path, resuming from its checkpoint, if any.
+    Returns the number of messages and threads exported so far.
+    """
+    checkpoint = get_export_checkpoints(session, export, workspace_id).get(channel_id)
+    cursor = checkpoint.cursor if checkpoint is not None else None
+    offset = checkpoint.offset if checkpoint is not None else 0
+    exported = checkpoint.messages if checkpoint is not None else 0
+    exported_threads = checkpoint.threads if checkpoint is not None else 0
+    if checkpoint is not None and checkpoint.completed_at is not None:
+        return {"messages": exported, "threads": exported_threads, "complete": True}
+
+    # Whatever was written after the last checkpoint is fetched again.
+    with open(path, "a"):
+        pass
+    os.truncate(path, offset)
+    with StreamSink(open(path, "a"), project=project) as sink:
+        for page in paginate(
+            client.conversations_history,
+            limiter=limiter,
+            channel=channel_id,
+            oldest=oldest,
+            latest=cursor,
+            inclusive=False,
+            limit=200,
+        ):
+            messages: list = page.get("messages", [])
+            for message in messages:
+                sink.write(message)
+                if threads and message.get("reply_count"):
+                    for reply in read_all_replies(
+                        client, channel_id, message["ts"], limiter=limiter
+                    ):
+                        sink.write(reply)
+                        exported += 1
+                    exported_threads += 1
+            exported += len(messages)
+            if messages:
+                cursor = min((m["ts"] for m in messages), key=ts_to_micros)
+            sink.flush()
+            os.fsync(sink.fp.fileno())
+            commit_export_checkpoint(
+                session,
+                export,
+                workspace_id,
+                channel_id,
+                cursor,
+                os.path.getsize(path),
+                exported,
+                exported_threads,
+            )
+
+    commit_export_checkpoint(
+        session,
+        export,
+        workspace_id,
+        channel_id,
+        cursor,
+        os.path.getsize(path),
+        exported,
+        exported_threads,
+        completed=True,
+    )
+    return {"messages": exported, "threads": exported_threads, "complete": True}
+
+
+def write_manifest(directory: Path, manifest: dict) -> None:
+    """Replace the manifest atomically, so readers never see a partial one."""
+    path = directory / MANIFEST_FILE
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as ofp:
+        json.dump(manifest, ofp, indent=2)
+        ofp.flush()
+        os.fsync(ofp.fileno())
+    os.replace(tmp_path, path)
+
+
+def export_workspace(
+    client: WebClient,
+    open_session: Callable[[], AbstractContextManager[Session]],
+    workspace_id: str,
+    directory: str | Path,
+    types: list[str],
+    exclude_archived: bool = False,
+    oldest: str | None = None,
+    threads: bool = True,
+    max_workers: int = 4,
+    limiter: RateLimiter | None = None,
+    project: Projection | None = None,
+    restart: bool = False,
+) -> dict:
+    """
+    Export every conversation of the given types to directory, max_workers
+    at a time, all sharing limiter. Checkpoints are keyed by the directory, so
+    exporting to the same directory again resumes (restart=True starts over)
+    and conversations already exported are skipped. Each worker commits its
+    checkpoints through its own session from open_session.
+
+    A conversation that fails, with an API or any other error, is reported
+    with its error in the manifest, and resumed by the next run; the others
+    carry on. Returns the manifest.
+    """
+    directory = Path(directory).resolve()
+    directory.mkdir(parents=True, exist_ok=True)
+    export = str(directory)
+    if restart:
+        with open_session() as session:
+            clear_export_checkpoints(session, export, workspace_id)
+
+    conversations = list_conversations(client, types, exclude_archived, limiter)
+    entries = {
+        conversation["id"]: {
+            "channel_id": conversation["id"],
+            "name": conversation.get("name") or conversation.get("user"),
+            "type": conversation_type(conversation),
+            "file": f"{conversation['id']}.ndjson",
+            "messages": 0,
+            "threads": 0,
+            "complete": False,
+        }
+        for conversation in conversations
+    }
+    manifest = {
+        "workspace_id": workspace_id,
+        "started_at": datetime.now(UTC).isoformat(),
+        "finished_at": None,
+        "complete": False,
+        "conversations": list(entries.values()),
+    }
+    write_manifest(directory, manifest)
+
+    def export_one(channel_id: str) -> dict:
+        # Sessions are not thread-safe; each worker commits through its own.
+        with open_session() as session:
+            return export_conversation(
+                client,
+                session,
+                export,
+                workspace_id,
+                channel_id,
+                directory / entries[channel_id]["file"],
+                oldest=oldest,
+                threads=threads,
+                limiter=limiter,
+                project=project,
+            )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(export_one, channel_id): channel_id
+            for channel_id in entries
+        }
+        for future in as_completed(futures):
+            entry = entries[futures[future]]
+            try:
+                entry.update(future.result())
+            except SlackApiError as e:
+                entry["error"] = e.response.get("error", str(e))
+            except Exception as e:
+                entry["error"] = f"{type(e).__name__}: {e}"
+            write_manifest(directory, manifest)
+
+    manifest["complete"] = all(entry["complete"] for entry in entries.values())
+    manifest["finished_at"] = datetime.now(UTC).isoformat()
+    write_manifest(directory, manifest)
+    return manifest
@@ -0,0 +1,3 @@
+"""
+Slack file transfer operations.
+"""
@@ -0,0 +1,216 @@
+import argparse
+import json
+import sys
+
+from slack_clacks.auth.validation import get_scopes_for_mode, validate
+from slack_clacks.client import create_client
+from slack_clacks.configuration.database import (
+    ensure_db_updated,
+    get_current_context,
+    get_session,
+)
+from slack_clacks.messaging.identifiers import is_permalink, parse_permalink
+from slack_clacks.messaging.operations import resolve_channel_id
+from slack_clacks.ratelimit import RateLimiter
+
+from .operations import download_files, list_channel_files, upload_files
+
+
+def handle_upload(args: argparse.Namespace) -> None:
+    ensure_db_updated(config_dir=args.config_dir)
+    with get_session(args.config_dir) as session:
+        context = get_current_context(session)
+        if context is None:
+            raise ValueError(
+                "No active authentication context. Authenticate with: clacks auth login"
+            )
+
+        scopes = get_scopes_for_mode(context.app_type)
+        validate("files:write", scopes, raise_on_error=True)
+
+        client = create_client(context.access_token)
+
+        thread_ts = args.thread
+        if thread_ts and is_permalink(thread_ts):
+            if args.channel:
+                raise ValueError("--channel cannot be combined with a permalink.")
+            channel_id, ts, parent_ts = parse_permalink(thread_ts)
+            thread_ts = parent_ts or ts
+        elif args.channel:
+            channel_id = resolve_channel_id(client, args.channel)
+        else:
+            raise ValueError("Must specify --channel or a permalink --thread.")
+
+        response = upload_files(
+            client,
+            args.file,
+            channel_id,
+            title=args.title,
+            initial_comment=args.comment,
+            thread_ts=thread_ts,
+            max_workers=args.workers,
+        )
+
+        with args.outfile as ofp:
+            json.dump(response.data, ofp)
+
+
+def generate_upload_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Upload files to a channel",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+
+    parser.add_argument(
+        "-D",
+        "--config-dir",
+        type=str,
+        help="Configuration directory (default: platform-specific user config dir)",
+    )
+    parser.add_argument(
+        "-c",
+        "--channel",
+        type=str,
+        help="Channel ID or name (e.g., #general, C123456)",
+    )
+    parser.add_argument(
+        "-f",
+        "--file",
+        type=str,
+        action="append",
+        required=True,
+        help="Path of a file to upload (repeat to upload several files)",
+    )
+    parser.add_argument(
+        "--title",
+        type=str,
+        help="File title (default: file name)",
+    )
+    parser.add_argument(
+        "-m",
+        "--comment",
+        type=str,
+        help="Message to post along with the files",
+    )
+    parser.add_argument(
+        "-t",
+        "--thread",
+        type=str,
+        help="Thread timestamp or message permalink to upload into",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Concurrent uploads when uploading several files (default: 4)",
+    )
+    parser.add_argument(
+        "-o",
+        "--outfile",
+        type=argparse.FileType("a"),
+        default=sys.stdout,
+        help="Output file for JSON results (default: stdout)",
+    )
+    parser.set_defaults(func=handle_upload)
+
+    return parser
+
+
+def handle_download(args: argparse.Namespace) -> None:
+    ensure_db_updated(config_dir=args.config_dir)
+    with get_session(args.config_dir) as session:
+        context = get_current_context(session)
+        if context is None:
+            raise ValueError(
+                "No active authentication context. Authenticate with: clacks auth login"
+            )
+
+        scopes = get_scopes_for_mode(context.app_type)
+        validate("files:read", scopes, raise_on_error=True)
+
+        client = create_client(context.access_token)
+        channel_id = resolve_channel_id(client, args.channel)
+
+        files = list_channel_files(
+            client,
+            channel_id,
+            oldest=args.oldest,
+            latest=args.latest,
+            limiter=RateLimiter(args.rate_limit),
+        )
+        results = download_files(
+            context.access_token, files, args.directory, max_workers=args.workers
+        )
+
+        with args.outfile as ofp:
+            json.dump(results, ofp)
+
+
+def generate_cli() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Slack file commands",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.set_defaults(func=lambda _: parser.print_help())
+
+    subparsers = parser.add_subparsers(dest="files_command")
+
+    download_parser = subparsers.add_parser(
+        "download", help="Download files shared in a channel"
+    )
+    download_parser.add_argument(
+        "-D",
+        "--config-dir",
+        type=str,
+        default=None,
+        help="Configuration directory (default: platform-specific user config dir)",
+    )
+    download_parser.add_argument(
+        "-c",
+        "--channel",
+        type=str,
+        required=True,
+        help="Channel ID or name (e.g., #general, C123456)",
+    )
+    download_parser.add_argument(
+        "--oldest",
+        type=str,
+        help="Only download files from messages after this timestamp",
+    )
+    download_parser.add_argument(
+        "--latest",
+        type=str,
+        help="Only download files from messages before this timestamp",
+    )
+    download_parser.add_argument(
+        "-d",
+        "--directory",
+        type=str,
+        default="clacks-files",
+        help=(
+            "Directory to store files in, as <directory>/<file id>/<name> "
+            "(default: clacks-files)"
+        ),
+    )
+    download_parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Concurrent downloads (default: 4)",
+    )
+    download_parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=50,
+        help="Max history requests per minute (default: 50)",
+    )
+    download_parser.add_argument(
+        "-o",
+        "--outfile",
+        type=argparse.FileType("a"),
+        default=sys.stdout,
+        help="Output file for JSON results (default: stdout)",
+    )
+    download_parser.set_defaults(func=handle_download)
+
+    return parser
@@ -0,0 +1,205 @@
+"""
+File uploads and downloads using the Slack Web API.
+
+Uploads follow the same files.getUploadURLExternal / files.completeUploadExternal
+protocol as WebClient.files_upload_v2, but stream file contents from disk (or
+memory-map large files) instead of reading them into memory.
+"""
+
+import mmap
+import os
+import re
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from slack_sdk import WebClient
+
+from slack_clacks.messaging.operations import paginate
+from slack_clacks.ratelimit import RateLimiter
+
+# Files at least this large are memory-mapped and sent in one buffer.
+MMAP_THRESHOLD = 8 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+_UNSAFE_FILENAME_CHARACTERS = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def _post_file(upload_url: str, path: Path, size: int) -> None:
+    """Stream the contents of path to an upload URL."""
+    headers = {
+        "Content-Type": "application/octet-stream",
+        "Content-Length": str(size),
+    }
+    with open(path, "rb") as ifp:
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(ifp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as body:
+                    request = urllib.request.Request(
+                        upload_url, data=body, headers=headers, method="POST"
+                    )
+                    with urllib.request.urlopen(request) as response:
+                        response.read()
+        else:
+            request = urllib.request.Request(
+                upload_url, data=ifp, headers=headers, method="POST"
+            )
+            with urllib.request.urlopen(request) as response:
+                response.read()
+
+
+def upload_file(client: WebClient, path: str | Path, title: str | None = None) -> dict:
+    """
+    Upload a single file without sharing it anywhere yet.
+    Returns {"id": ..., "title": ...} for files.completeUploadExternal.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    response = client.files_getUploadURLExternal(filename=path.name, length=size)
+    _post_file(response["upload_url"], path, size)
+    return {"id": response["file_id"], "title": title or path.name}
+
+
+def upload_files(
+    client: WebClient,
+    paths: list[str],
+    channel: str,
+    title: str | None = None,
+    initial_comment: str | None = None,
+    thread_ts: str | None = None,
+    max_workers: int = 4,
+):
+    """
+    Upload files concurrently, then share them all in one message.
+    Returns the files.completeUploadExternal response.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        uploaded = list(executor.map(lambda p: upload_file(client, p, title), paths))
+    return client.files_completeUploadExternal(
+        files=uploaded,
+        channel_id=channel,
+        initial_comment=initial_comment,
+        thread_ts=thread_ts,
+    )
+
+
+def list_channel_files(
+    client: WebClient,
+    channel: str,
+    oldest: str | None = None,
+    latest: str | None = None,
+    limiter: RateLimiter | None = None,
+) -> list[dict]:
+    """
+    Collect the files attached to messages in a channel's history window.
+    Files are deduplicated by ID.
+    """
+    files: dict[str, dict] = {}
+    for page in paginate(
+        client.conversations_history,
+        limiter=limiter,
+        channel=channel,
+        oldest=oldest,
+        latest=latest,
+        limit=200,
+    ):
+        messages: list = page.get("messages", [])
+        for message in messages:
+            for file in message.get("files", []):
+                if file.get("mode") in ("tombstone", "hidden_by_limit"):
+                    continue
+                if "url_private" not in file and "url_private_download" not in file:
+                    continue
+                files.setdefault(file["id"], file)
+    return list(files.values())
+
+
+def get_download_path(directory: str | Path, file: dict) -> Path:
+    """Files are stored by ID, as <directory>/<file id>/<file name>."""
+    name = _UNSAFE_FILENAME_CHARACTERS.sub("_", file.get("name") or file["id"])
+    return Path(directory) / file["id"] / name.lstrip(".")
+
+
+def download_file(token: str, file: dict, directory: str | Path) -> dict:
+    """
+    Download a file into directory, resuming from a partial download if one
+    exists. Files already present with the expected size are skipped.
+    """
+    path = get_download_path(directory, file)
+    expected_size = file.get("size")
+    result = {
+        "id": file["id"],
+        "name": file.get("name"),
+        "path": str(path),
+        "size": expected_size,
+        "status": "downloaded",
+        "error": None,
+    }
+
+    if path.exists() and (
+        expected_size is None or path.stat().st_size == expected_size
+    ):
+        result["status"] = "exists"
+        return result
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = path.with_name(path.name + ".part")
+    offset = partial_path.stat().st_size if partial_path.exists() else 0
+    if offset and offset == expected_size:
+        os.replace(partial_path, path)
+        result["status"] = "resumed"
+        return result
+    if expected_size is not None and offset > expected_size:
+        # Longer than the file itself, so not a prefix of it.
+        offset = 0
+
+    url = file.get("url_private_download") or file["url_private"]
+
+    def request(offset: int):
+        headers = {"Authorization": f"Bearer {token}"}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+        return urllib.request.urlopen(urllib.request.Request(url, headers=headers))
+
+    try:
+        try:
+            response = request(offset)
+        except urllib.error.HTTPError as e:
+            if not offset or e.code != 416:
+                raise
+            # The partial download does not end inside the file: start over.
+            offset = 0
+            response = request(offset)
+        with response as r:
+            if offset and r.status == 206:
+                result["status"] = "resumed"
+                mode = "ab"
+            else:
+                mode = "wb"
+            with open(partial_path, mode) as ofp:
+                while chunk := r.read(DOWNLOAD_CHUNK_SIZE):
+                    ofp.write(chunk)
+    except OSError as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+        return result
+
+    size = partial_path.stat().st_size
+    if expected_size is not None and size != expected_size:
+        result["status"] = "error"
+        result["error"] = f"expected {expected_size} bytes, received {size}"
+        return result
+
+    os.replace(partial_path, path)
+    return result
+
+
+def download_files(
+    token: str, files: list[dict], directory: str | Path, max_workers: int = 4
+) -> list[dict]:
+    """Download files with at most max_workers transfers in flight."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(
+            executor.map(lambda file: download_file(token, file, directory), files)
+        )
@@ -1,28 +1,202 @@
 import argparse
+import heapq
 import json
+import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Callable, Iterable, Iterator
 
 from slack_sdk import WebClient
+from sqlalchemy.orm import Session
 
 from slack_clacks.auth.validation import get_scopes_for_mode, validate
+from slack_clacks.client import create_client
+from slack_clacks.configuration.cache import ResponseCache, add_cache_arguments
 from slack_clacks.configuration.database import (
+    commit_consumer_offset,
     ensure_db_updated,
+    get_cached_search_page,
+    get_consumer_offset,
+    get_contexts,
     get_current_context,
     get_session,
+    get_thread_states,
+    is_message_confirmed,
+    list_all_contexts,
+    record_confirmed_messages,
+    record_thread_state,
+    store_search_page,
 )
+from slack_clacks.configuration.models import Context
+from slack_clacks.projection import add_projection_arguments, make_projection
+from slack_clacks.ratelimit import RateLimiter
+from slack_clacks.sinks import add_sink_arguments, open_sink
 
+from .directory import Directory, enrich_messages
+from .exceptions import ClacksChannelNotFoundError
+from .identifiers import is_permalink, parse_permalink
 from .operations import (
     add_reaction,
     get_recent_activity,
+    harvest_threads,
     open_dm_channel,
+    react_batch,
+    read_message,
     read_messages,
+    read_records_since,
     read_thread,
     remove_reaction,
     resolve_channel_id,
     resolve_message_timestamp,
     resolve_user_id,
+    search_messages,
     send_message,
 )
+from .records import ts_to_micros
+from .render import TextRenderer
+from .watch import (
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    create_socket_client,
+    poll_channels,
+    stream_channel_events,
+)
+
+# Newest messages of a read recorded as confirmed, so that reacting to them
+# skips verification; older ones are verified when reacted to.
+CONFIRMED_MESSAGES_PER_READ = 20
+
+
+def get_target_contexts(
+    session: Session, args: argparse.Namespace
+) -> list[Context] | None:
+    """
+    Contexts selected with --contexts or --all-contexts, or None to use the
+    current context.
+    """
+    if args.all_contexts:
+        return list_all_contexts(session)
+    if args.contexts:
+        names = [name.strip() for name in args.contexts.split(",") if name.strip()]
+        return get_contexts(session, names)
+    return None
+
+
+def create_directory(
+    args: argparse.Namespace, session: Session, context: Context
+) -> Directory:
+    """
+    Directory of a context's workspace, cached in the configuration database
+    as --no-cache and --refresh allow.
+    """
+    return Directory(
+        ResponseCache(
+            session,
+            context.access_token,
+            enabled=not args.no_cache,
+            refresh=args.refresh,
+        ),
+        create_client(context.access_token),
+    )
+
+
+def create_directories(
+    args: argparse.Namespace, session: Session, contexts: list[Context]
+) -> dict[str, Directory]:
+    return {
+        context.name: create_directory(args, session, context) for context in contexts
+    }
+
+
+def create_renderer(
+    args: argparse.Namespace,
+    session: Session,
+    context: Context | None = None,
+    contexts: list[Context] | None = None,
+) -> TextRenderer | None:
+    """
+    Renderer for --format text, or None for JSON output. Names are resolved
+    through the response cache of context, or of each of contexts for
+    messages tagged with them.
+    """
+    if args.format != "text":
+        return None
+    return TextRenderer(
+        default=(
+            create_directory(args, session, context) if context is not None else None
+        ),
+        directories=create_directories(args, session, contexts or []),
+    )
+
+
+@contextmanager
+def open_renderer(
+    args: argparse.Namespace,
+) -> Iterator[Callable[[list[dict]], list[str]] | None]:
+    """
+    Renderer for --format text in commands that keep streaming after their
+    setup, or None for JSON output. Names are resolved through a session of
+    its own, committed after every batch, so cached lookups are written in
+    short transactions instead of holding the configuration database for the
+    whole stream.
+    """
+    if args.format != "text":
+        yield None
+        return
+    with get_session(args.config_dir) as session:
+        renderer = create_renderer(args, session, get_current_context(session))
+        assert renderer is not None
+
+        def render(messages: list[dict]) -> list[str]:
+            lines = renderer(messages)
+            session.commit()
+            return lines
+
+        yield render
+
+
+def stream_across_contexts(
+    args: argparse.Namespace,
+    contexts: list[Context],
+    fetch: Callable[[Context, WebClient], Iterable[dict]],
+    render: TextRenderer | None = None,
+    directories: dict[str, Directory] | None = None,
+) -> None:
+    """
+    Run fetch for every context concurrently, each with its own client, and
+    write the merged messages as NDJSON, newest first. Each message is tagged
+    with the context and workspace_id it came from. Contexts that fail are
+    reported on stderr and skipped.
+    """
+
+    def run(context: Context) -> list[dict]:
+        try:
+            messages = list(fetch(context, create_client(context.access_token)))
+        except Exception as e:
+            print(f"Skipping context '{context.name}': {e!r}", file=sys.stderr)
+            return []
+        for message in messages:
+            message["context"] = context.name
+            message["workspace_id"] = context.workspace_id
+        messages.sort(key=lambda m: ts_to_micros(m.get("ts", "0")), reverse=True)
+        return messages
+
+    with ThreadPoolExecutor(max_workers=max(1, len(contexts))) as executor:
+        results = list(executor.map(run, contexts))
+
+    if directories is not None:
+        for context, messages in zip(contexts, results):
+            enrich_messages(directories[context.name], messages)
+
+    merged = heapq.merge(
+        *results, key=lambda m: ts_to_micros(m.get("ts", "0")), reverse=True
+    )
+    with open_sink(args, render=render) as sink:
+        for message in merged:
+            sink.write(message)
 
 
 def handle_send(args: argparse.Namespace) -> None:
@@ -34,11 +208,19 @@ def handle_send(args: argparse.Namespace) -> None:
                 "No active authentication context. Authenticate with: clacks auth login"
             )
 
-        client = WebClient(token=context.access_token)
+        client = create_client(context.access_token)
 
         channel_id = None
+        thread_ts = args.thread
 
-        if args.channel:
+        if thread_ts and is_permalink(thread_ts):
+            if args.channel or args.user:
+                raise ValueError(
+                    "--channel/--user cannot be combined with a permalink."
+                )
+            channel_id, ts, parent_ts = parse_permalink(thread_ts)
+            thread_ts = parent_ts or ts
+        elif args.channel:
             channel_id = resolve_channel_id(client, args.channel)
         elif args.user:
             user_id = resolve_user_id(client, args.user)
@@ -48,7 +230,10 @@ def handle_send(args: argparse.Namespace) -> None:
         else:
             raise ValueError("Must specify either --channel or --user.")
 
-        response = send_message(client, channel_id, args.message, thread_ts=args.thread)
+        response = send_message(client, channel_id, args.message, thread_ts=thread_ts)
+        record_confirmed_messages(
+            session, context.workspace_id, response["channel"], [response["ts"]]
+        )
 
         with args.outfile as ofp:
             json.dump(response.data, ofp)
@@ -89,7 +274,7 @@ def generate_send_parser() -> argparse.ArgumentParser:
         "-t",
         "--thread",
         type=str,
-        help="Thread timestamp for replying to thread",
+        help="Thread timestamp or message permalink for replying to thread",
     )
     parser.add_argument(
         "-o",
@@ -103,28 +288,179 @@ def generate_send_parser() -> argparse.ArgumentParser:
     return parser
 
 
+def harvest_channel_threads(
+    args: argparse.Namespace,
+    session: Session,
+    context: Context,
+    client: WebClient,
+    channel_id: str,
+) -> None:
+    """
+    Stream every thread in the --oldest/--latest window as NDJSON, one parent
+    with its new replies per line, recording harvest state after each thread.
+    """
+    harvested = {}
+    if not args.full:
+        harvested = get_thread_states(session, context.workspace_id, channel_id)
+    threads = harvest_threads(
+        client,
+        channel_id,
+        oldest=args.oldest,
+        latest=args.latest,
+        harvested=harvested,
+        max_workers=args.workers,
+        limiter=RateLimiter(args.rate_limit),
+    )
+    directory = create_directory(args, session, context) if args.enrich else None
+    with open_sink(args, render=create_renderer(args, session, context)) as sink:
+        for parent in threads:
+            if directory is not None:
+                enrich_messages(directory, [parent], channel_id)
+            sink.write(parent)
+            sink.flush()
+
+            seen = [parent["ts"], *(reply["ts"] for reply in parent["replies"])]
+            if parent.get("latest_reply"):
+                seen.append(parent["latest_reply"])
+            record_thread_state(
+                session,
+                context.workspace_id,
+                channel_id,
+                parent["ts"],
+                max(seen, key=float),
+            )
+            session.commit()
+
+
+def consume_channel(
+    args: argparse.Namespace,
+    session: Session,
+    context: Context,
+    client: WebClient,
+    channel_id: str,
+) -> None:
+    """
+    Stream every message after the consumer's stored offset as NDJSON, oldest
+    first, then advance the offset. The offset is only committed once the
+    output has been written, so delivery is at-least-once.
+    """
+    offset = get_consumer_offset(
+        session, args.consumer, context.workspace_id, channel_id
+    )
+    records = read_records_since(
+        client,
+        channel_id,
+        oldest=offset or args.oldest,
+        limiter=RateLimiter(args.rate_limit),
+    )
+    directory = None
+    if args.enrich:
+        directory = create_directory(args, session, context)
+        directory.prefetch({r.user for r in records if r.user}, [channel_id])
+
+    with open_sink(args, render=create_renderer(args, session, context)) as sink:
+        for record in records:
+            message = record.to_dict()
+            if directory is not None:
+                enrich_messages(directory, [message], channel_id)
+            sink.write(message)
+
+    if records:
+        commit_consumer_offset(
+            session,
+            args.consumer,
+            context.workspace_id,
+            channel_id,
+            records[-1].ts_str,
+        )
+
+
+def read_context_messages(
+    args: argparse.Namespace, context: Context, client: WebClient
+) -> list[dict]:
+    """Read the latest messages of --channel or --user within one context."""
+    channel_id: str | None = None
+    if args.channel:
+        channel_id = resolve_channel_id(client, args.channel)
+    else:
+        channel_id = open_dm_channel(client, resolve_user_id(client, args.user))
+    if channel_id is None:
+        raise ValueError(f"Failed to open DM with user '{args.user}'.")
+
+    scopes = get_scopes_for_mode(context.app_type)
+    if channel_id.startswith("C"):
+        validate("channels:history", scopes, raise_on_error=True)
+    elif channel_id.startswith("G"):
+        validate("groups:history", scopes, raise_on_error=True)
+
+    response = read_messages(client, channel_id, limit=args.limit)
+    messages: list = response.get("messages", [])
+    for message in messages:
+        message["channel_id"] = channel_id
+    return messages
+
+
 def handle_read(args: argparse.Namespace) -> None:
+    ndjson = args.threads or args.consumer or args.contexts or args.all_contexts
+    if args.segment_dir and not ndjson:
+        raise ValueError(
+            "--segment-dir only applies to NDJSON output: --threads, --consumer, "
+            "--contexts or --all-contexts."
+        )
+
     ensure_db_updated(config_dir=args.config_dir)
     with get_session(args.config_dir) as session:
+        contexts = get_target_contexts(session, args)
+        if contexts is not None:
+            if args.thread or args.message or args.threads:
+                raise ValueError(
+                    "--contexts/--all-contexts only read the latest messages of "
+                    "--channel or --user."
+                )
+            if not args.channel and not args.user:
+                raise ValueError("Must specify either --channel or --user.")
+            stream_across_contexts(
+                args,
+                contexts,
+                lambda context, client: read_context_messages(args, context, client),
+                render=create_renderer(args, session, contexts=contexts),
+                directories=(
+                    create_directories(args, session, contexts) if args.enrich else None
+                ),
+            )
+            return
+
         context = get_current_context(session)
         if context is None:
             raise ValueError(
                 "No active authentication context. Authenticate with: clacks auth login"
             )
 
-        client = WebClient(token=context.access_token)
+        client = create_client(context.access_token)
 
         channel_id = None
+        thread_ts = args.thread
+        message_ts = args.message
+        message_thread_ts = None
 
-        if args.channel:
-            channel_id = resolve_channel_id(client, args.channel)
-
-            scopes = get_scopes_for_mode(context.app_type)
-            if channel_id.startswith("C"):
-                validate("channels:history", scopes, raise_on_error=True)
-            elif channel_id.startswith("G"):
-                validate("groups:history", scopes, raise_on_error=True)
+        permalink = None
+        if thread_ts and is_permalink(thread_ts):
+            permalink = thread_ts
+        elif message_ts and is_permalink(message_ts):
+            permalink = message_ts
 
+        if permalink is not None:
+            if args.channel or args.user:
+                raise ValueError(
+                    "--channel/--user cannot be combined with a permalink."
+                )
+            channel_id, ts, parent_ts = parse_permalink(permalink)
+            if permalink == thread_ts:
+                thread_ts = parent_ts or ts
+            else:
+                message_ts, message_thread_ts = ts, parent_ts
+        elif args.channel:
+            channel_id = resolve_channel_id(client, args.channel)
         elif args.user:
             user_id = resolve_user_id(client, args.user)
             channel_id = open_dm_channel(client, user_id)
@@ -133,20 +469,72 @@ def handle_read(args: argparse.Namespace) -> None:
         else:
             raise ValueError("Must specify either --channel or --user.")
 
-        if args.thread:
-            response = read_thread(client, channel_id, args.thread, limit=args.limit)
-        elif args.message:
-            resolve_message_timestamp(client, channel_id, args.message)
-            response = read_messages(
-                client, channel_id, limit=1, latest=args.message, oldest=args.message
+        scopes = get_scopes_for_mode(context.app_type)
+        if channel_id.startswith("C"):
+            validate("channels:history", scopes, raise_on_error=True)
+        elif channel_id.startswith("G"):
+            validate("groups:history", scopes, raise_on_error=True)
+
+        if args.consumer:
+            if thread_ts or message_ts or args.threads:
+                raise ValueError(
+                    "--consumer cannot be combined with --thread, --message or "
+                    "--threads."
+                )
+            consume_channel(args, session, context, client, channel_id)
+            return
+
+        if args.threads:
+            if thread_ts or message_ts:
+                raise ValueError(
+                    "--threads cannot be combined with --thread or --message."
+                )
+            harvest_channel_threads(args, session, context, client, channel_id)
+            return
+
+        if thread_ts:
+            response = read_thread(client, channel_id, thread_ts, limit=args.limit)
+        elif message_ts:
+            response = read_message(
+                client, channel_id, message_ts, thread_ts=message_thread_ts
             )
         else:
             response = read_messages(
                 client, channel_id, limit=args.limit, latest=None, oldest=None
             )
 
+        timestamps = [m["ts"] for m in response.get("messages", []) if "ts" in m]
+        timestamps.sort(key=ts_to_micros, reverse=True)
+        record_confirmed_messages(
+            session,
+            context.workspace_id,
+            channel_id,
+            timestamps[:CONFIRMED_MESSAGES_PER_READ],
+        )
+
+        if args.format == "text":
+            with open_sink(
+                args, render=create_renderer(args, session, context)
+            ) as sink:
+                for message in response.get("messages", []):
+                    message.setdefault("channel_id", channel_id)
+                    sink.write(message)
+            return
+
+        if args.enrich:
+            enrich_messages(
+                create_directory(args, session, context),
+                response.get("messages", []),
+                channel_id,
+            )
+
+        project = make_projection(args.fields, args.compact)
+        data = response.data
+        if isinstance(data, dict) and "messages" in data:
+            data["messages"] = [project(m) for m in data["messages"]]
+
         with args.outfile as ofp:
-            json.dump(response.data, ofp)
+            json.dump(data, ofp)
 
 
 def generate_read_parser() -> argparse.ArgumentParser:
@@ -177,13 +565,13 @@ def generate_read_parser() -> argparse.ArgumentParser:
         "-t",
         "--thread",
         type=str,
-        help="Thread timestamp to read thread replies",
+        help="Thread timestamp or permalink to read thread replies",
     )
     parser.add_argument(
         "-m",
         "--message",
         type=str,
-        help="Specific message timestamp to read",
+        help="Specific message timestamp or permalink to read",
     )
     parser.add_argument(
         "-l",
@@ -192,6 +580,63 @@ def generate_read_parser() -> argparse.ArgumentParser:
         default=20,
         help="Max messages to retrieve (default: 20)",
     )
+    parser.add_argument(
+        "--threads",
+        action="store_true",
+        help=(
+            "Harvest all threads in the channel's history window, streaming each "
+            "parent with its replies as NDJSON. Threads unchanged since the last "
+            "harvest are skipped"
+        ),
+    )
+    parser.add_argument(
+        "--consumer",
+        type=str,
+        help=(
+            "Consumer name: stream only messages this consumer has not seen yet as "
+            "NDJSON, oldest first, and advance its stored offset"
+        ),
+    )
+    parser.add_argument(
+        "--oldest",
+        type=str,
+        help=(
+            "With --threads: only scan messages after this timestamp. With "
+            "--consumer: where a new consumer starts (default: earliest)"
+        ),
+    )
+    parser.add_argument(
+        "--latest",
+        type=str,
+        help="With --threads: only scan messages before this timestamp",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="With --threads: ignore stored harvest state and fetch every reply",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="With --threads: concurrent reply fetches (default: 8)",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=50,
+        help="With --threads or --consumer: max API requests per minute (default: 50)",
+    )
+    parser.add_argument(
+        "--contexts",
+        type=str,
+        help="Comma-separated contexts to run in concurrently, merging results",
+    )
+    parser.add_argument(
+        "--all-contexts",
+        action="store_true",
+        help="Run in every stored context concurrently, merging results",
+    )
     parser.add_argument(
         "-o",
         "--outfile",
@@ -199,14 +644,52 @@ def generate_read_parser() -> argparse.ArgumentParser:
         default=sys.stdout,
         help="Output file for JSON results (default: stdout)",
     )
+    parser.add_argument(
+        "--enrich",
+        action="store_true",
+        help=(
+            "Add user_name, channel_name and, for DMs, dm_partner_name to "
+            "messages, from cached user and channel lookups"
+        ),
+    )
+    add_projection_arguments(parser)
+    add_sink_arguments(parser)
+    add_cache_arguments(parser)
     parser.set_defaults(func=handle_read)
 
     return parser
 
 
+def recent_context_messages(
+    args: argparse.Namespace, context: Context, client: WebClient
+) -> list[dict]:
+    """Recent messages across the conversations of one context."""
+    scopes = get_scopes_for_mode(context.app_type)
+    validate("channels:history", scopes, raise_on_error=True)
+    return get_recent_activity(client, message_limit=args.limit)
+
+
 def handle_recent(args: argparse.Namespace) -> None:
+    if args.segment_dir and not (args.contexts or args.all_contexts):
+        raise ValueError(
+            "--segment-dir only applies to NDJSON output: --contexts or --all-contexts."
+        )
+
     ensure_db_updated(config_dir=args.config_dir)
     with get_session(args.config_dir) as session:
+        contexts = get_target_contexts(session, args)
+        if contexts is not None:
+            stream_across_contexts(
+                args,
+                contexts,
+                lambda context, client: recent_context_messages(args, context, client),
+                render=create_renderer(args, session, contexts=contexts),
+                directories=(
+                    create_directories(args, session, contexts) if args.enrich else None
+                ),
+            )
+            return
+
         context = get_current_context(session)
         if context is None:
             raise ValueError(
@@ -216,12 +699,24 @@ def handle_recent(args: argparse.Namespace) -> None:
         scopes = get_scopes_for_mode(context.app_type)
         validate("channels:history", scopes, raise_on_error=True)
 
-        client = WebClient(token=context.access_token)
+        client = create_client(context.access_token)
 
         messages = get_recent_activity(client, message_limit=args.limit)
+        if args.format == "text":
+            with open_sink(
+                args, render=create_renderer(args, session, context)
+            ) as sink:
+                for message in messages:
+                    sink.write(message)
+            return
+
+        if args.enrich:
+            enrich_messages(create_directory(args, session, context), messages)
+
+        project = make_projection(args.fields, args.compact)
 
         with args.outfile as ofp:
-            json.dump(messages, ofp)
+            json.dump([project(m) for m in messages], ofp)
 
 
 def generate_recent_parser() -> argparse.ArgumentParser:
@@ -243,6 +738,16 @@ def generate_recent_parser() -> argparse.ArgumentParser:
         default=20,
         help="Max recent messages to retrieve (default: 20)",
     )
+    parser.add_argument(
+        "--contexts",
+        type=str,
+        help="Comma-separated contexts to run in concurrently, merging results",
+    )
+    parser.add_argument(
+        "--all-contexts",
+        action="store_true",
+        help="Run in every stored context concurrently, merging results",
+    )
     parser.add_argument(
         "-o",
         "--outfile",
@@ -250,11 +755,411 @@ def generate_recent_parser() -> argparse.ArgumentParser:
         default=sys.stdout,
         help="Output file for JSON results (default: stdout)",
     )
+    parser.add_argument(
+        "--enrich",
+        action="store_true",
+        help=(
+            "Add user_name, channel_name and, for DMs, dm_partner_name to "
+            "messages, from cached user and channel lookups"
+        ),
+    )
+    add_projection_arguments(parser)
+    add_sink_arguments(parser)
+    add_cache_arguments(parser)
     parser.set_defaults(func=handle_recent)
 
     return parser
 
 
+def parse_react_batch(lines) -> list[tuple[str, str, str]]:
+    """
+    Parse batch react input: one "channel timestamp emoji" triple per line,
+    whitespace separated. Blank lines are ignored.
+    """
+    items = []
+    for line_number, line in enumerate(lines, start=1):
+        fields = line.split()
+        if not fields:
+            continue
+        if len(fields) != 3:
+            raise ValueError(
+                f"Line {line_number}: expected 'channel timestamp emoji', "
+                f"got {line.strip()!r}"
+            )
+        items.append((fields[0], fields[1], fields[2]))
+    return items
+
+
+def search_context(
+    args: argparse.Namespace, session: Session, context: Context, client: WebClient
+) -> Iterator[dict]:
+    """Search within one context, reusing result pages cached in session."""
+    scopes = get_scopes_for_mode(context.app_type)
+    validate("search:read", scopes, raise_on_error=True)
+
+    cache_ttl = timedelta(seconds=args.cache_ttl)
+    cache_key = {
+        "workspace_id": context.workspace_id,
+        "user_id": context.user_id,
+        "query": args.query,
+        "sort": args.sort,
+        "sort_dir": args.sort_dir,
+        "count": args.count,
+    }
+
+    def get_cached(page: int) -> dict | None:
+        if args.no_cache or args.refresh:
+            return None
+        return get_cached_search_page(
+            session, page=page, max_age=cache_ttl, **cache_key
+        )
+
+    def store(page: int, response: dict) -> None:
+        store_search_page(
+            session, page=page, response=response, max_age=cache_ttl, **cache_key
+        )
+        session.commit()
+
+    return search_messages(
+        client,
+        args.query,
+        sort=args.sort,
+        sort_dir=args.sort_dir,
+        count=args.count,
+        max_pages=args.max_pages,
+        max_workers=args.workers,
+        limiter=RateLimiter(args.rate_limit),
+        get_cached=get_cached,
+        store=store,
+    )
+
+
+def handle_search(args: argparse.Namespace) -> None:
+    ensure_db_updated(config_dir=args.config_dir)
+    with get_session(args.config_dir) as session:
+        contexts = get_target_contexts(session, args)
+        if contexts is not None:
+
+            def search_in_own_session(
+                context: Context, client: WebClient
+            ) -> list[dict]:
+                # Sessions are not thread-safe; each context caches through its own.
+                with get_session(args.config_dir) as context_session:
+                    return list(search_context(args, context_session, context, client))
+
+            stream_across_contexts(
+                args,
+                contexts,
+                search_in_own_session,
+                render=create_renderer(args, session, contexts=contexts),
+            )
+            return
+
+        context = get_current_context(session)
+        if context is None:
+            raise ValueError(
+                "No active authentication context. Authenticate with: clacks auth login"
+            )
+
+        client = create_client(context.access_token)
+        matches = search_context(args, session, context, client)
+
+        render = create_renderer(args, session, context)
+        with open_sink(args, render=render) as sink:
+            for match in matches:
+                sink.write(match)
+
+
+def generate_search_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Search messages, streaming matches as NDJSON",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+
+    parser.add_argument(
+        "-D",
+        "--config-dir",
+        type=str,
+        help="Configuration directory (default: platform-specific user config dir)",
+    )
+    parser.add_argument(
+        "query",
+        type=str,
+        help="Search query, using Slack search syntax (e.g., 'deploy in:#ops')",
+    )
+    parser.add_argument(
+        "--remote",
+        action="store_true",
+        required=True,
+        help=(
+            "Search on Slack's servers with search.messages (required: no other "
+            "search is available yet)"
+        ),
+    )
+    parser.add_argument(
+        "--sort",
+        type=str,
+        choices=["score", "timestamp"],
+        default="score",
+        help="Sort matches by relevance or time (default: score)",
+    )
+    parser.add_argument(
+        "--sort-dir",
+        type=str,
+        choices=["asc", "desc"],
+        default="desc",
+        help="Sort direction (default: desc)",
+    )
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=100,
+        help="Matches per page, at most 100 (default: 100)",
+    )
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        default=None,
+        help="Max pages to fetch (default: all, at most 100)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Concurrent page fetches (default: 4)",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=20,
+        help="Max search requests per minute (default: 20)",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=300,
+        help="Seconds to reuse cached result pages (default: 300)",
+    )
+    parser.add_argument(
+        "--contexts",
+        type=str,
+        help="Comma-separated contexts to run in concurrently, merging results",
+    )
+    parser.add_argument(
+        "--all-contexts",
+        action="store_true",
+        help="Run in every stored context concurrently, merging results",
+    )
+    parser.add_argument(
+        "-o",
+        "--outfile",
+        type=argparse.FileType("a"),
+        default=sys.stdout,
+        help="Output file for NDJSON results (default: stdout)",
+    )
+    add_projection_arguments(parser)
+    add_sink_arguments(parser)
+    add_cache_arguments(parser)
+    parser.set_defaults(func=handle_search)
+
+    return parser
+
+
+def handle_watch(args: argparse.Namespace) -> None:
+    if args.socket_mode and not args.app_token:
+        raise ValueError(
+            "Socket Mode requires an app-level token: pass --app-token "
+            "or set CLACKS_APP_TOKEN"
+        )
+
+    ensure_db_updated(config_dir=args.config_dir)
+    with get_session(args.config_dir) as session:
+        context = get_current_context(session)
+        if context is None:
+            raise ValueError(
+                "No active authentication context. Authenticate with: clacks auth login"
+            )
+
+        client = create_client(context.access_token)
+        scopes = get_scopes_for_mode(context.app_type)
+
+    # A watch runs for hours; the configuration database is not held meanwhile.
+    start = args.oldest or f"{time.time():.6f}"
+    high_water_marks = {}
+    for channel in args.channel:
+        channel_id = resolve_channel_id(client, channel)
+        if channel_id.startswith("C"):
+            validate("channels:history", scopes, raise_on_error=True)
+        elif channel_id.startswith("G"):
+            validate("groups:history", scopes, raise_on_error=True)
+        high_water_marks[channel_id] = start
+
+    deadline = time.monotonic() + args.duration if args.duration else None
+    limiter = RateLimiter(args.rate_limit)
+
+    def should_stop() -> bool:
+        return deadline is not None and time.monotonic() >= deadline
+
+    if args.socket_mode:
+        messages = stream_channel_events(
+            create_socket_client(args.app_token),
+            client,
+            high_water_marks,
+            min_interval=args.min_interval,
+            max_interval=args.max_interval,
+            limiter=limiter,
+            should_stop=should_stop,
+        )
+    else:
+        messages = poll_channels(
+            client,
+            high_water_marks,
+            min_interval=args.min_interval,
+            max_interval=args.max_interval,
+            limiter=limiter,
+            should_stop=should_stop,
+        )
+
+    with (
+        open_renderer(args) as render,
+        open_sink(args, flush=True, render=render) as sink,
+    ):
+        try:
+            for message in messages:
+                sink.write(message)
+        except KeyboardInterrupt:
+            pass
+
+
+def generate_watch_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Follow channels, streaming new messages as NDJSON",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+
+    parser.add_argument(
+        "-D",
+        "--config-dir",
+        type=str,
+        help="Configuration directory (default: platform-specific user config dir)",
+    )
+    parser.add_argument(
+        "-c",
+        "--channel",
+        type=str,
+        action="append",
+        required=True,
+        help="Channel ID or name to follow (repeat to follow several channels)",
+    )
+    parser.add_argument(
+        "--oldest",
+        type=str,
+        help="Also emit messages after this timestamp (default: only new messages)",
+    )
+    parser.add_argument(
+        "--socket-mode",
+        action="store_true",
+        help=(
+            "Receive messages as Socket Mode events, polling only to backfill "
+            "gaps and while disconnected"
+        ),
+    )
+    parser.add_argument(
+        "--app-token",
+        type=str,
+        default=os.environ.get("CLACKS_APP_TOKEN"),
+        help="App-level token for --socket-mode (default: $CLACKS_APP_TOKEN)",
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=DEFAULT_MIN_INTERVAL,
+        help=(
+            "Seconds between polls of an active channel "
+            f"(default: {DEFAULT_MIN_INTERVAL:g})"
+        ),
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=DEFAULT_MAX_INTERVAL,
+        help=(
+            "Longest back-off between polls of a quiet channel "
+            f"(default: {DEFAULT_MAX_INTERVAL:g})"
+        ),
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=50,
+        help="Max history requests per minute across all channels (default: 50)",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        help="Stop after this many seconds (default: run until interrupted)",
+    )
+    parser.add_argument(
+        "-o",
+        "--outfile",
+        type=argparse.FileType("a"),
+        default=sys.stdout,
+        help="Output file for NDJSON results (default: stdout)",
+    )
+    add_projection_arguments(parser)
+    add_sink_arguments(parser)
+    add_cache_arguments(parser)
+    parser.set_defaults(func=handle_watch)
+
+    return parser
+
+
+def handle_react_batch(args: argparse.Namespace, client: WebClient) -> None:
+    with args.batch as ifp:
+        items = parse_react_batch(ifp)
+
+    channel_ids: dict[str, str | None] = {}
+    for channel, _, _ in items:
+        if channel not in channel_ids:
+            try:
+                channel_ids[channel] = resolve_channel_id(client, channel)
+            except ClacksChannelNotFoundError:
+                channel_ids[channel] = None
+
+    resolved = []
+    results: list[dict | None] = []
+    for channel, timestamp, emoji in items:
+        channel_id = channel_ids[channel]
+        if channel_id is None:
+            results.append(
+                {
+                    "channel": channel,
+                    "ts": timestamp,
+                    "emoji": emoji.strip(":"),
+                    "ok": False,
+                    "error": "channel_not_found",
+                }
+            )
+        else:
+            resolved.append((channel_id, timestamp, emoji))
+            results.append(None)
+
+    limiter = RateLimiter(args.rate_limit)
+    reacted = iter(
+        react_batch(
+            client,
+            resolved,
+            remove=args.remove,
+            max_workers=args.workers,
+            limiter=limiter,
+        )
+    )
+    output = [result if result is not None else next(reacted) for result in results]
+
+    with args.outfile as ofp:
+        json.dump(output, ofp)
+
+
 def handle_react(args: argparse.Namespace) -> None:
     ensure_db_updated(config_dir=args.config_dir)
     with get_session(args.config_dir) as session:
@@ -264,23 +1169,49 @@ def handle_react(args: argparse.Namespace) -> None:
                 "No active authentication context. Authenticate with: clacks auth login"
             )
 
-        client = WebClient(token=context.access_token)
+        client = create_client(context.access_token)
 
-        if args.channel:
+        if args.batch:
+            handle_react_batch(args, client)
+            return
+
+        if not args.message or not args.emoji:
+            raise ValueError("Must specify --message and --emoji (or use --batch).")
+
+        message_ts = args.message
+        verified = False
+
+        if is_permalink(message_ts):
+            if args.channel or args.user:
+                raise ValueError(
+                    "--channel/--user cannot be combined with a permalink."
+                )
+            # A permalink names an existing message, no lookup needed.
+            channel_id, message_ts, _ = parse_permalink(message_ts)
+            verified = True
+        elif args.channel:
             channel_id = resolve_channel_id(client, args.channel)
-        else:
+        elif args.user:
             user_id = resolve_user_id(client, args.user)
             dm_channel = open_dm_channel(client, user_id)
             if dm_channel is None:
                 raise ValueError(f"Failed to open DM with user '{args.user}'.")
             channel_id = dm_channel
+        else:
+            raise ValueError("Must specify either --channel or --user.")
 
-        resolve_message_timestamp(client, channel_id, args.message)
+        if not verified and not is_message_confirmed(
+            session, context.workspace_id, channel_id, message_ts
+        ):
+            resolve_message_timestamp(client, channel_id, message_ts)
 
         if args.remove:
-            response = remove_reaction(client, channel_id, args.message, args.emoji)
+            response = remove_reaction(client, channel_id, message_ts, args.emoji)
         else:
-            response = add_reaction(client, channel_id, args.message, args.emoji)
+            response = add_reaction(client, channel_id, message_ts, args.emoji)
+        record_confirmed_messages(
+            session, context.workspace_id, channel_id, [message_ts]
+        )
 
         with args.outfile as ofp:
             json.dump(response.data, ofp)
@@ -299,7 +1230,7 @@ def generate_react_parser() -> argparse.ArgumentParser:
         help="Configuration directory (default: platform-specific user config dir)",
     )
 
-    target_group = parser.add_mutually_exclusive_group(required=True)
+    target_group = parser.add_mutually_exclusive_group()
     target_group.add_argument(
         "-c",
         "--channel",
@@ -312,18 +1243,25 @@ def generate_react_parser() -> argparse.ArgumentParser:
         type=str,
         help="User ID or name for DM (e.g., @username, U123456)",
     )
+    target_group.add_argument(
+        "-b",
+        "--batch",
+        type=argparse.FileType("r"),
+        help=(
+            "File of 'channel timestamp emoji' lines to react to concurrently "
+            "('-' for stdin)"
+        ),
+    )
     parser.add_argument(
         "-m",
         "--message",
         type=str,
-        required=True,
-        help="Message timestamp",
+        help="Message timestamp or permalink",
     )
     parser.add_argument(
         "-e",
         "--emoji",
         type=str,
-        required=True,
         help="Emoji name (e.g., thumbsup or :thumbsup:)",
     )
     parser.add_argument(
@@ -331,6 +1269,18 @@ def generate_react_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Remove reaction instead of adding",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Concurrent requests in batch mode (default: 8)",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=50,
+        help="Max reaction requests per minute in batch mode (default: 50)",
+    )
     parser.add_argument(
         "-o",
         "--outfile",
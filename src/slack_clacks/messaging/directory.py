@@ -0,0 +1,114 @@
+"""
+Names of users and conversations, looked up in bulk through the response cache.
+"""
+
+from typing import Iterable
+
+from slack_sdk import WebClient
+
+from slack_clacks.configuration.cache import ResponseCache, fetch_all
+
+
+class Directory:
+    """
+    Users and conversations of one workspace, remembered for the lifetime of
+    the object. prefetch() looks up every unknown ID of a batch at once: cache
+    hits are served from the configuration database and misses are fetched
+    concurrently, once per ID. IDs that cannot be looked up (missing scopes,
+    deleted users, ...) are remembered as unknown and not retried.
+    """
+
+    def __init__(
+        self, cache: ResponseCache, client: WebClient, max_workers: int = 8
+    ) -> None:
+        self.cache = cache
+        self.client = client
+        self.max_workers = max_workers
+        self.users: dict[str, dict | None] = {}
+        self.channels: dict[str, dict | None] = {}
+
+    def prefetch(
+        self, user_ids: Iterable[str] = (), channel_ids: Iterable[str] = ()
+    ) -> None:
+        """Look up unknown users and conversations, and the partners of DMs."""
+        new_channels = {c for c in channel_ids if c not in self.channels}
+        self._fetch(self.channels, "conversations.info", "channel", new_channels)
+
+        partners = {
+            channel["user"]
+            for channel_id in new_channels
+            if (channel := self.channels[channel_id]) and channel.get("is_im")
+        }
+        new_users = {u for u in [*user_ids, *partners] if u not in self.users}
+        self._fetch(self.users, "users.info", "user", new_users)
+
+    def user_name(self, user_id: str) -> str | None:
+        user = self.users.get(user_id)
+        if not user:
+            return None
+        profile = user.get("profile", {})
+        return (
+            profile.get("display_name")
+            or profile.get("real_name")
+            or user.get("real_name")
+            or user.get("name")
+        )
+
+    def channel_name(self, channel_id: str) -> str | None:
+        """Channel name, or the partner's name for a DM."""
+        channel = self.channels.get(channel_id)
+        if not channel:
+            return None
+        if channel.get("is_im"):
+            return self.user_name(channel["user"])
+        return channel.get("name")
+
+    def dm_partner(self, channel_id: str) -> str | None:
+        """User ID of the other member of a DM."""
+        channel = self.channels.get(channel_id)
+        if not channel or not channel.get("is_im"):
+            return None
+        return channel.get("user")
+
+    def _fetch(
+        self, known: dict[str, dict | None], method: str, key: str, ids: set[str]
+    ) -> None:
+        if not ids:
+            return
+        ordered = sorted(ids)
+        results = fetch_all(
+            [(self.cache, self.client, method, {key: id_}) for id_ in ordered],
+            max_workers=self.max_workers,
+        )
+        for id_, result in zip(ordered, results):
+            known[id_] = None if isinstance(result, Exception) else result.get(key)
+
+
+def enrich_messages(
+    directory: Directory, messages: list[dict], channel_id: str | None = None
+) -> list[dict]:
+    """
+    Add user_name, channel_name and, for DMs, dm_partner and dm_partner_name
+    to messages and their replies, in place. channel_id is used for messages
+    without a channel_id of their own. Every name is resolved with a single
+    prefetch, and names that cannot be resolved are left out.
+    """
+    items = [item for m in messages for item in [m, *m.get("replies", [])]]
+    directory.prefetch(
+        {item["user"] for item in items if item.get("user")},
+        {c for item in items if (c := item.get("channel_id", channel_id))},
+    )
+
+    for item in items:
+        if item.get("user") and (name := directory.user_name(item["user"])):
+            item["user_name"] = name
+        item_channel_id = item.get("channel_id", channel_id)
+        if not item_channel_id:
+            continue
+        if partner := directory.dm_partner(item_channel_id):
+            item["dm_partner"] = partner
+            if name := directory.user_name(partner):
+                item["dm_partner_name"] = name
+        if name := directory.channel_name(item_channel_id):
+            item["channel_name"] = name
+    return messages
@@ -19,3 +19,9 @@ class ClacksMessageNotFoundError(Exception):
     """Raised when a message with specific timestamp is not found."""
 
     pass
+
+
+class ClacksInvalidPermalinkError(Exception):
+    """Raised when a value cannot be parsed as a Slack message permalink."""
+
+    pass
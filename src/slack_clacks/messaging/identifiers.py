@@ -0,0 +1,59 @@
+"""
+Parsing of Slack IDs and message permalinks without API calls.
+"""
+
+import re
+import urllib.parse
+
+from .exceptions import ClacksInvalidPermalinkError
+
+# Public channels (C), private channels/MPIMs (G), and DMs (D).
+CHANNEL_ID_PATTERN = re.compile(r"^[CGD][A-Z0-9]{6,}$")
+# Regular (U) and Enterprise Grid (W) users.
+USER_ID_PATTERN = re.compile(r"^[UW][A-Z0-9]{6,}$")
+
+_PERMALINK_PATH_PATTERN = re.compile(r"^/archives/([A-Z0-9]+)/p(\d{7,})/?$")
+_TIMESTAMP_PATTERN = re.compile(r"^\d+\.\d{6}$")
+
+
+def is_channel_id(identifier: str) -> bool:
+    """Check whether identifier has the shape of a conversation ID."""
+    return CHANNEL_ID_PATTERN.match(identifier) is not None
+
+
+def is_user_id(identifier: str) -> bool:
+    """Check whether identifier has the shape of a user ID."""
+    return USER_ID_PATTERN.match(identifier) is not None
+
+
+def is_permalink(value: str) -> bool:
+    """Check whether value looks like a URL rather than a bare timestamp."""
+    return value.startswith("https://") or value.startswith("http://")
+
+
+def parse_permalink(url: str) -> tuple[str, str, str | None]:
+    """
+    Parse a message permalink such as
+    https://x.slack.com/archives/C123ABC456/p1700000000123456?thread_ts=1699999999.000100
+    Returns (channel_id, ts, thread_ts); thread_ts is None for top-level messages.
+    Raises ClacksInvalidPermalinkError if the URL is not a Slack message permalink.
+    """
+    parsed = urllib.parse.urlparse(url)
+    host = parsed.hostname or ""
+    if host != "slack.com" and not host.endswith(".slack.com"):
+        raise ClacksInvalidPermalinkError(url)
+
+    match = _PERMALINK_PATH_PATTERN.match(parsed.path)
+    if match is None:
+        raise ClacksInvalidPermalinkError(url)
+
+    channel_id, digits = match.groups()
+    if not is_channel_id(channel_id):
+        raise ClacksInvalidPermalinkError(url)
+    ts = f"{digits[:-6]}.{digits[-6:]}"
+
+    thread_ts = urllib.parse.parse_qs(parsed.query).get("thread_ts", [None])[0]
+    if thread_ts is not None and not _TIMESTAMP_PATTERN.match(thread_ts):
+        raise ClacksInvalidPermalinkError(url)
+
+    return channel_id, ts, thread_ts
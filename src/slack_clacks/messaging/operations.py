@@ -2,23 +2,33 @@
 Core messaging operations using Slack Web API.
 """
 
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterator
+
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
+from slack_sdk.web import SlackResponse
+
+from slack_clacks import tracing
+from slack_clacks.ratelimit import RateLimiter
 
 from .exceptions import (
     ClacksChannelNotFoundError,
     ClacksMessageNotFoundError,
     ClacksUserNotFoundError,
 )
+from .identifiers import is_channel_id, is_user_id
+from .records import MessageRecord, ts_to_micros
 
 
+@tracing.traced("resolve")
 def resolve_channel_id(client: WebClient, channel_identifier: str) -> str:
     """
     Resolve channel identifier to channel ID.
-    Accepts channel ID (C...), channel name (#general or general).
+    Accepts channel ID (C..., G..., D...), channel name (#general or general).
     Returns channel ID or raises ClacksChannelNotFoundError if not found.
     """
-    if channel_identifier.startswith("C") or channel_identifier.startswith("D"):
+    if is_channel_id(channel_identifier):
         return channel_identifier
 
     channel_name = channel_identifier.lstrip("#")
@@ -39,13 +49,14 @@ def resolve_channel_id(client: WebClient, channel_identifier: str) -> str:
     raise ClacksChannelNotFoundError(channel_identifier)
 
 
+@tracing.traced("resolve")
 def resolve_user_id(client: WebClient, user_identifier: str) -> str:
     """
     Resolve user identifier to user ID.
     Accepts user ID (U...), username (@username or username), or email.
     Returns user ID or raises ClacksUserNotFoundError if not found.
     """
-    if user_identifier.startswith("U"):
+    if is_user_id(user_identifier):
         return user_identifier
 
     username = user_identifier.lstrip("@")
@@ -68,6 +79,7 @@ def resolve_user_id(client: WebClient, user_identifier: str) -> str:
     raise ClacksUserNotFoundError(user_identifier)
 
 
+@tracing.traced("resolve")
 def resolve_message_timestamp(
     client: WebClient, channel_id: str, timestamp: str
 ) -> str:
@@ -75,18 +87,48 @@ def resolve_message_timestamp(
     Resolve and validate that a message with the exact timestamp exists.
     Returns timestamp if found, raises ClacksMessageNotFoundError if not.
     """
-    ts = float(timestamp)
-    response = client.conversations_history(
-        channel=channel_id,
-        limit=100,
-        latest=str(ts + 1),
-        oldest=str(ts - 1),
+    read_message(client, channel_id, timestamp)
+    return timestamp
+
+
+def read_message(
+    client: WebClient, channel: str, timestamp: str, thread_ts: str | None = None
+):
+    """
+    Read the single message with the exact timestamp.
+    Fetching and validating share one call: conversations.history for top-level
+    messages, conversations.replies for replies inside thread_ts.
+    Returns the Slack API response, raises ClacksMessageNotFoundError if the
+    message does not exist.
+    """
+    if thread_ts is None or thread_ts == timestamp:
+        response = client.conversations_history(
+            channel=channel,
+            limit=1,
+            latest=timestamp,
+            oldest=timestamp,
+            inclusive=True,
+        )
+        history: list = response.get("messages", [])
+        if not any(m.get("ts") == timestamp for m in history):
+            raise ClacksMessageNotFoundError(timestamp)
+        return response
+
+    # conversations.replies always leads with the thread parent, so drop it.
+    response = client.conversations_replies(
+        channel=channel,
+        ts=thread_ts,
+        limit=2,
+        latest=timestamp,
+        oldest=timestamp,
         inclusive=True,
     )
-    messages: list = response.get("messages", [])
-    if not any(m.get("ts") == timestamp for m in messages):
+    replies: list = response.get("messages", [])
+    messages = [m for m in replies if m.get("ts") == timestamp]
+    if not messages:
         raise ClacksMessageNotFoundError(timestamp)
-    return timestamp
+    response.data["messages"] = messages  # type: ignore[index]
+    return response
 
 
 def open_dm_channel(client: WebClient, user_id: str) -> str | None:
@@ -130,6 +172,75 @@ def read_messages(
     )
 
 
+def paginate(
+    method: Callable[..., SlackResponse],
+    limiter: RateLimiter | None = None,
+    **kwargs,
+) -> Iterator[SlackResponse]:
+    """
+    Call a cursor-paginated Web API method repeatedly, yielding every page.
+    """
+    cursor = None
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        response = method(cursor=cursor, **kwargs)
+        yield response
+        cursor = (response.get("response_metadata") or {}).get("next_cursor")
+        if not cursor:
+            return
+
+
+def read_messages_since(
+    client: WebClient,
+    channel: str,
+    oldest: str | None = None,
+    limiter: RateLimiter | None = None,
+) -> list[dict]:
+    """
+    Read every message in a channel newer than oldest (exclusive), following
+    pagination. Returns messages oldest first.
+    """
+    messages: list[dict] = []
+    for page in paginate(
+        client.conversations_history,
+        limiter=limiter,
+        channel=channel,
+        oldest=oldest,
+        inclusive=False,
+        limit=200,
+    ):
+        messages.extend(page.get("messages", []))
+    messages.sort(key=lambda m: ts_to_micros(m["ts"]))
+    return messages
+
+
+def read_records_since(
+    client: WebClient,
+    channel: str,
+    oldest: str | None = None,
+    limiter: RateLimiter | None = None,
+) -> list[MessageRecord]:
+    """
+    read_messages_since() for large backlogs: each page is converted to
+    MessageRecords as it arrives, so only one page of full message dicts is
+    held at a time. Returns records oldest first.
+    """
+    records: list[MessageRecord] = []
+    for page in paginate(
+        client.conversations_history,
+        limiter=limiter,
+        channel=channel,
+        oldest=oldest,
+        inclusive=False,
+        limit=200,
+    ):
+        messages: list = page.get("messages", [])
+        records.extend(MessageRecord.from_dict(message) for message in messages)
+    records.sort()
+    return records
+
+
 def read_thread(client: WebClient, channel: str, thread_ts: str, limit: int = 100):
     """
     Read messages from a thread.
@@ -163,7 +274,7 @@ def get_recent_activity(
         except Exception:
             continue
 
-    all_messages.sort(key=lambda m: float(m.get("ts", 0)), reverse=True)
+    all_messages.sort(key=lambda m: ts_to_micros(m.get("ts", "0")), reverse=True)
     return all_messages[:message_limit]
 
 
@@ -183,3 +294,199 @@ def remove_reaction(client: WebClient, channel: str, timestamp: str, emoji: str)
     """
     emoji = emoji.strip(":")
     return client.reactions_remove(channel=channel, timestamp=timestamp, name=emoji)
+
+
+def react_batch(
+    client: WebClient,
+    items: list[tuple[str, str, str]],
+    remove: bool = False,
+    max_workers: int = 8,
+    limiter: RateLimiter | None = None,
+) -> list[dict]:
+    """
+    Add (or remove) reactions on many messages concurrently.
+    Items are (channel_id, timestamp, emoji) tuples. Messages are not validated
+    beforehand: a missing message surfaces as Slack's message_not_found error.
+    Returns one status dict per item, in input order; an item that fails, with
+    an API error or otherwise, reports its error without failing the rest.
+    """
+    operation = remove_reaction if remove else add_reaction
+
+    def react(item: tuple[str, str, str]) -> dict:
+        channel, timestamp, emoji = item
+        result: dict = {
+            "channel": channel,
+            "ts": timestamp,
+            "emoji": emoji.strip(":"),
+            "ok": True,
+            "error": None,
+        }
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            operation(client, channel, timestamp, emoji)
+        except SlackApiError as e:
+            result["ok"] = False
+            result["error"] = e.response.get("error", str(e))
+        except Exception as e:
+            result["ok"] = False
+            result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(react, items))
+
+
+def read_all_replies(
+    client: WebClient,
+    channel: str,
+    thread_ts: str,
+    oldest: str | None = None,
+    limiter: RateLimiter | None = None,
+) -> list[dict]:
+    """
+    Read every reply in a thread (newer than oldest, if given), following
+    pagination. The thread parent is not included.
+    """
+    replies = []
+    for page in paginate(
+        client.conversations_replies,
+        limiter=limiter,
+        channel=channel,
+        ts=thread_ts,
+        oldest=oldest,
+        inclusive=False,
+        limit=200,
+    ):
+        messages: list = page.get("messages", [])
+        for message in messages:
+            if message.get("ts") != thread_ts:
+                replies.append(message)
+    return replies
+
+
+def harvest_threads(
+    client: WebClient,
+    channel: str,
+    oldest: str | None = None,
+    latest: str | None = None,
+    harvested: dict[str, str] | None = None,
+    max_workers: int = 8,
+    limiter: RateLimiter | None = None,
+) -> Iterator[dict]:
+    """
+    Find every thread parent in a channel's history window and fetch the
+    replies of all threads concurrently.
+
+    harvested maps thread_ts to the latest_reply already seen. Threads whose
+    latest_reply is unchanged are skipped; for changed threads only replies
+    newer than the stored latest_reply are fetched.
+
+    Yields each parent message, with its new replies under "replies", as soon as
+    its replies have been fetched (not in timestamp order). Parents are held as
+    MessageRecords until they are yielded, as a whole history of threads may
+    be queued while the first replies are fetched.
+    """
+    harvested = harvested or {}
+
+    def fetch(record: MessageRecord) -> tuple[MessageRecord, list[dict]]:
+        ts = record.ts_str
+        replies = read_all_replies(
+            client, channel, ts, oldest=harvested.get(ts), limiter=limiter
+        )
+        return record, replies
+
+    def finish(future: Future) -> dict:
+        record, replies = future.result()
+        parent = record.to_dict()
+        parent["replies"] = replies
+        return parent
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending: set[Future] = set()
+        for page in paginate(
+            client.conversations_history,
+            limiter=limiter,
+            channel=channel,
+            oldest=oldest,
+            latest=latest,
+            limit=200,
+        ):
+            messages: list = page.get("messages", [])
+            for message in messages:
+                if not message.get("reply_count"):
+                    continue
+                if harvested.get(message["ts"]) == message.get("latest_reply"):
+                    continue
+                pending.add(executor.submit(fetch, MessageRecord.from_dict(message)))
+
+            done, pending = wait(pending, timeout=0, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield finish(future)
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield finish(future)
+
+
+# search.messages serves at most 100 pages of results.
+SEARCH_MAX_PAGES = 100
+
+
+def search_messages(
+    client: WebClient,
+    query: str,
+    sort: str = "score",
+    sort_dir: str = "desc",
+    count: int = 100,
+    max_pages: int | None = None,
+    max_workers: int = 4,
+    limiter: RateLimiter | None = None,
+    get_cached: Callable[[int], dict | None] | None = None,
+    store: Callable[[int, dict], None] | None = None,
+) -> Iterator[dict]:
+    """
+    Search messages on Slack's servers, yielding every match in result order.
+
+    The first page reports the total page count; the remaining pages are then
+    fetched concurrently. get_cached(page) may return a previously stored page
+    response to skip its request, and store(page, response) is called with each
+    page fetched from the API. Both are called from the calling thread.
+    """
+
+    def fetch(page: int) -> dict:
+        if limiter is not None:
+            limiter.acquire()
+        response = client.search_messages(
+            query=query, sort=sort, sort_dir=sort_dir, count=count, page=page
+        )
+        return response.data  # type: ignore[return-value]
+
+    def load(page: int) -> dict | None:
+        return get_cached(page) if get_cached is not None else None
+
+    first_page = load(1)
+    if first_page is None:
+        first_page = fetch(1)
+        if store is not None:
+            store(1, first_page)
+    yield from first_page.get("messages", {}).get("matches", [])
+
+    total_pages = first_page.get("messages", {}).get("paging", {}).get("pages", 1)
+    last_page = min(total_pages, max_pages or SEARCH_MAX_PAGES, SEARCH_MAX_PAGES)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pages: list[tuple[int, dict | Future]] = []
+        for page in range(2, last_page + 1):
+            cached = load(page)
+            pages.append((page, cached or executor.submit(fetch, page)))
+
+        for page, pending in pages:
+            if isinstance(pending, Future):
+                response = pending.result()
+                if store is not None:
+                    store(page, response)
+            else:
+                response = pending
+            yield from response.get("messages", {}).get("matches", [])
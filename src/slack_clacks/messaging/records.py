@@ -0,0 +1,105 @@
+"""
+Compact in-memory representation of messages for bulk processing.
+"""
+
+import json
+import sys
+
+from slack_clacks.projection import encode
+
+# Fields held as attributes of a MessageRecord; everything else is encoded.
+RECORD_FIELDS = frozenset({"ts", "user", "text", "thread_ts", "channel_id"})
+
+
+def ts_to_micros(ts: str) -> int:
+    """Slack ts ("1712345678.000100") as integer microseconds."""
+    seconds, _, fraction = ts.partition(".")
+    return int(seconds) * 1_000_000 + int(fraction[:6].ljust(6, "0"))
+
+
+def micros_to_ts(micros: int) -> str:
+    return f"{micros // 1_000_000}.{micros % 1_000_000:06d}"
+
+
+def intern_id(value: str | None) -> str | None:
+    return sys.intern(value) if value is not None else None
+
+
+class MessageRecord:
+    """
+    A message as a handful of attributes plus its remaining fields (blocks,
+    attachments, reactions, ...) encoded as JSON bytes.
+
+    ts and thread_ts are integer microseconds, which compare exactly and
+    without parsing; records sort by ts. User and channel IDs are interned,
+    so the many messages of one user or channel share a single string.
+    to_dict() rebuilds the API dict only when it is needed, typically just
+    before the message is written out.
+    """
+
+    __slots__ = ("ts", "thread_ts", "user", "channel_id", "text", "extra")
+
+    def __init__(
+        self,
+        ts: int,
+        thread_ts: int | None = None,
+        user: str | None = None,
+        channel_id: str | None = None,
+        text: str | None = None,
+        extra: bytes = b"",
+    ) -> None:
+        self.ts = ts
+        self.thread_ts = thread_ts
+        self.user = user
+        self.channel_id = channel_id
+        self.text = text
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, message: dict) -> "MessageRecord":
+        rest = {k: v for k, v in message.items() if k not in RECORD_FIELDS}
+        ts = ts_to_micros(message["ts"])
+        if micros_to_ts(ts) != message["ts"]:
+            # Keep non-canonical ts strings exactly as received.
+            rest["ts"] = message["ts"]
+        thread_ts = (
+            ts_to_micros(message["thread_ts"]) if "thread_ts" in message else None
+        )
+        if thread_ts is not None and micros_to_ts(thread_ts) != message["thread_ts"]:
+            rest["thread_ts"] = message["thread_ts"]
+        return cls(
+            ts=ts,
+            thread_ts=thread_ts,
+            user=intern_id(message.get("user")),
+            channel_id=intern_id(message.get("channel_id")),
+            text=message.get("text"),
+            extra=encode(rest) if rest else b"",
+        )
+
+    @property
+    def ts_str(self) -> str:
+        """The ts as Slack sent it, without rebuilding the message."""
+        # A non-canonical ts is kept in extra; only then is extra decoded.
+        if b'"ts"' in self.extra:
+            return json.loads(self.extra).get("ts", micros_to_ts(self.ts))
+        return micros_to_ts(self.ts)
+
+    def to_dict(self) -> dict:
+        message: dict = {"ts": micros_to_ts(self.ts)}
+        if self.user is not None:
+            message["user"] = self.user
+        if self.text is not None:
+            message["text"] = self.text
+        if self.thread_ts is not None:
+            message["thread_ts"] = micros_to_ts(self.thread_ts)
+        if self.extra:
+            message.update(json.loads(self.extra))
+        if self.channel_id is not None:
+            message["channel_id"] = self.channel_id
+        return message
+
+    def __lt__(self, other: "MessageRecord") -> bool:
+        return self.ts < other.ts
+
+    def __repr__(self) -> str:
+        return f"MessageRecord(ts={micros_to_ts(self.ts)!r}, user={self.user!r})"
@@ -0,0 +1,155 @@
+"""
+Rendering messages as plain text, with mentions expanded to names.
+"""
+
+import re
+from datetime import UTC, datetime
+from typing import Callable
+
+from .directory import Directory
+
+# One pass over the text finds every <...> token: user and channel mentions,
+# special mentions (<!here>, <!subteam^S123|@team>, <!date^...|fallback>) and
+# links, each with an optional |label.
+TOKEN_PATTERN = re.compile(
+    r"<(?:@(?P<user>[UW][A-Z0-9]+)"
+    r"|#(?P<channel>[CGD][A-Z0-9]+)"
+    r"|!(?P<special>[^>|]+)"
+    r"|(?P<link>[^>|]+))"
+    r"(?:\|(?P<label>[^>]*))?>"
+)
+USER_MENTION_PATTERN = re.compile(r"<@([UW][A-Z0-9]+)[|>]")
+UNLABELLED_CHANNEL_PATTERN = re.compile(r"<#([CGD][A-Z0-9]+)>")
+
+CONTINUATION_INDENT = "    "
+
+
+def unescape(text: str) -> str:
+    return text.replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&")
+
+
+def render_text(
+    text: str,
+    user_name: Callable[[str], str | None],
+    channel_name: Callable[[str], str | None],
+) -> str:
+    """Render mrkdwn as plain text, expanding mentions with the given lookups."""
+
+    def replace(match: re.Match) -> str:
+        label = match["label"]
+        if match["user"]:
+            return "@" + (user_name(match["user"]) or label or match["user"])
+        if match["channel"]:
+            return "#" + (label or channel_name(match["channel"]) or match["channel"])
+        if match["special"]:
+            special = match["special"]
+            if label:
+                return label
+            if special.startswith("subteam^"):
+                return "@" + special.removeprefix("subteam^")
+            return "@" + special.split("^", 1)[0]
+        link = match["link"]
+        return label or link.removeprefix("mailto:")
+
+    return unescape(TOKEN_PATTERN.sub(replace, text))
+
+
+def mentioned_ids(text: str, user_ids: set[str], channel_ids: set[str]) -> None:
+    """Add the users and unlabelled channels mentioned in text to the sets."""
+    user_ids.update(USER_MENTION_PATTERN.findall(text))
+    channel_ids.update(UNLABELLED_CHANNEL_PATTERN.findall(text))
+
+
+def message_channel_id(message: dict) -> str | None:
+    channel = message.get("channel")
+    if isinstance(channel, dict):
+        return channel.get("id")
+    return message.get("channel_id") or channel
+
+
+def known_channel_name(message: dict) -> str | None:
+    """Channel name carried by the message itself (search matches, recent)."""
+    channel = message.get("channel")
+    if isinstance(channel, dict):
+        return channel.get("name")
+    return message.get("channel_name")
+
+
+class TextRenderer:
+    """
+    Renders batches of messages as transcript lines:
+
+        2024-05-01 12:00:00 #general @alice: text with @bob and #random
+
+    Messages tagged with a context (see --contexts) are resolved in that
+    context's directory, others in the default one. Every name a batch needs
+    is looked up with one prefetch per directory before rendering. Continuation
+    lines and thread replies are indented.
+    """
+
+    def __init__(
+        self,
+        default: Directory | None = None,
+        directories: dict[str, Directory] | None = None,
+    ) -> None:
+        self.default = default
+        self.directories = directories or {}
+
+    def __call__(self, messages: list[dict]) -> list[str]:
+        wanted: dict[int, tuple[Directory, set[str], set[str]]] = {}
+        for message in messages:
+            directory = self.directory_for(message)
+            if directory is None:
+                continue
+            _, user_ids, channel_ids = wanted.setdefault(
+                id(directory), (directory, set(), set())
+            )
+            for item in [message, *message.get("replies", [])]:
+                if item.get("user"):
+                    user_ids.add(item["user"])
+                channel_id = message_channel_id(item)
+                if channel_id and not known_channel_name(item):
+                    channel_ids.add(channel_id)
+                mentioned_ids(item.get("text", ""), user_ids, channel_ids)
+
+        for directory, user_ids, channel_ids in wanted.values():
+            directory.prefetch(user_ids, channel_ids)
+
+        return [self.render_message(message) for message in messages]
+
+    def directory_for(self, message: dict) -> Directory | None:
+        return self.directories.get(message.get("context", ""), self.default)
+
+    def render_message(self, message: dict, indent: str = "") -> str:
+        directory = self.directory_for(message)
+        user_name = directory.user_name if directory else lambda _: None
+        channel_name = directory.channel_name if directory else lambda _: None
+
+        when = datetime.fromtimestamp(float(message.get("ts", 0)), UTC)
+        prefix = when.strftime("%Y-%m-%d %H:%M:%S")
+        if channel_id := message_channel_id(message):
+            partner = directory.dm_partner(channel_id) if directory else None
+            if partner is not None:
+                prefix += " @" + (user_name(partner) or partner)
+            else:
+                name = known_channel_name(message) or channel_name(channel_id)
+                prefix += " #" + (name or channel_id)
+
+        user_id = message.get("user")
+        author = (
+            (user_id and user_name(user_id))
+            or message.get("username")
+            or message.get("bot_profile", {}).get("name")
+            or user_id
+            or "unknown"
+        )
+        text = render_text(message.get("text", ""), user_name, channel_name)
+        lines = f"{prefix} @{author}: {text}".split("\n")
+        rendered = [indent + lines[0]]
+        rendered.extend(indent + CONTINUATION_INDENT + line for line in lines[1:])
+
+        for reply in message.get("replies", []):
+            if "context" in message:
+                reply = {**reply, "context": message["context"]}
+            rendered.append(self.render_message(reply, indent + CONTINUATION_INDENT))
+        return "\n".join(rendered)
@@ -0,0 +1,237 @@
+"""
+Following channels for new messages as they arrive.
+"""
+
+import heapq
+import sys
+import time
+from queue import Empty, Queue
+from typing import Callable, Iterator
+
+from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+from slack_sdk.socket_mode.builtin import SocketModeClient
+from slack_sdk.socket_mode.client import BaseSocketModeClient
+from slack_sdk.socket_mode.request import SocketModeRequest
+from slack_sdk.socket_mode.response import SocketModeResponse
+
+from slack_clacks.ratelimit import RateLimiter
+
+from .operations import read_records_since
+from .records import MessageRecord, intern_id, ts_to_micros
+
+DEFAULT_MIN_INTERVAL = 2.0
+DEFAULT_MAX_INTERVAL = 120.0
+DEFAULT_PING_INTERVAL = 5.0
+
+# Message events that describe changes to existing messages rather than new
+# ones; conversations.history would not return them either.
+IGNORED_SUBTYPES = {"message_changed", "message_deleted", "message_replied"}
+
+
+def read_new_messages(
+    client: WebClient,
+    channel: str,
+    high_water_marks: dict[str, str],
+    limiter: RateLimiter | None = None,
+) -> list[MessageRecord]:
+    """
+    Read a channel's messages newer than its high-water mark as MessageRecords,
+    oldest first, tagging each with channel_id and advancing the mark. After a
+    long gap this can be a large backlog, which is only turned back into dicts
+    one message at a time as it is yielded. API errors are reported on stderr
+    and treated as no new messages.
+    """
+    try:
+        records = read_records_since(
+            client, channel, oldest=high_water_marks[channel], limiter=limiter
+        )
+    except SlackApiError as e:
+        print(f"Polling {channel} failed: {e.response.get('error')}", file=sys.stderr)
+        return []
+
+    channel_id = intern_id(channel)
+    for record in records:
+        record.channel_id = channel_id
+    if records:
+        high_water_marks[channel] = records[-1].ts_str
+    return records
+
+
+def poll_channels(
+    client: WebClient,
+    high_water_marks: dict[str, str],
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+    max_interval: float = DEFAULT_MAX_INTERVAL,
+    limiter: RateLimiter | None = None,
+    should_stop: Callable[[], bool] = lambda: False,
+    clock: Callable[[], float] = time.monotonic,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Iterator[dict]:
+    """
+    Poll channels for messages newer than their high-water marks, yielding
+    each new message (tagged with channel_id) oldest first per channel.
+
+    high_water_marks maps channel ID to the ts of the last message seen, and is
+    updated in place as messages are yielded. All channels share one scheduler
+    and one limiter. A channel that had new messages is polled again after
+    min_interval; each empty poll doubles its interval, up to max_interval.
+    """
+    intervals = {channel: min_interval for channel in high_water_marks}
+    schedule = [(clock(), channel) for channel in high_water_marks]
+    heapq.heapify(schedule)
+
+    while schedule and not should_stop():
+        due, channel = heapq.heappop(schedule)
+        # Sleep in short steps so that should_stop is honoured promptly.
+        while (delay := due - clock()) > 0:
+            sleep(min(delay, 1.0))
+            if should_stop():
+                return
+
+        records = read_new_messages(client, channel, high_water_marks, limiter)
+        for record in records:
+            yield record.to_dict()
+
+        if records:
+            intervals[channel] = min_interval
+        else:
+            intervals[channel] = min(intervals[channel] * 2, max_interval)
+        heapq.heappush(schedule, (clock() + intervals[channel], channel))
+
+
+def create_socket_client(
+    app_token: str,
+    web_client: WebClient | None = None,
+    ping_interval: float = DEFAULT_PING_INTERVAL,
+) -> SocketModeClient:
+    """
+    Socket Mode client for an app-level token (xapp-...). web_client is only
+    used to call apps.connections.open. The client reconnects by itself when
+    its connection drops or goes stale.
+    """
+    return SocketModeClient(
+        app_token=app_token,
+        web_client=web_client,
+        auto_reconnect_enabled=True,
+        ping_interval=ping_interval,
+    )
+
+
+def stream_channel_events(
+    socket_client: SocketModeClient,
+    client: WebClient,
+    high_water_marks: dict[str, str],
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+    max_interval: float = DEFAULT_MAX_INTERVAL,
+    limiter: RateLimiter | None = None,
+    should_stop: Callable[[], bool] = lambda: False,
+) -> Iterator[dict]:
+    """
+    Follow channels through Socket Mode, yielding the same messages as
+    poll_channels() and updating high_water_marks the same way.
+
+    Message events for the channels are acknowledged and yielded as they are
+    pushed. Whenever a connection is (re)established, the gap since each
+    channel's high-water mark is backfilled from conversations.history; while
+    no connection is available, the channels are polled instead. If the first
+    connection cannot be opened, it is retried every max_interval seconds.
+    Thread replies and edits are skipped, as they are when polling. The socket
+    client is closed when the stream ends.
+    """
+    events: Queue[dict] = Queue()
+
+    def on_request(
+        socket_client: BaseSocketModeClient, request: SocketModeRequest
+    ) -> None:
+        socket_client.send_socket_mode_response(
+            SocketModeResponse(envelope_id=request.envelope_id)
+        )
+        if request.type != "events_api":
+            return
+        event = request.payload.get("event", {})
+        if event.get("type") == "message" and event.get("channel") in high_water_marks:
+            events.put(event)
+
+    socket_client.socket_mode_request_listeners.append(on_request)
+
+    # Once connect() has succeeded, the client reconnects by itself.
+    started = False
+    session_id = None
+    try:
+        while not should_stop():
+            if not started:
+                try:
+                    socket_client.connect()
+                    started = True
+                except Exception as e:
+                    print(
+                        f"Socket Mode connection failed ({type(e).__name__}: {e}), "
+                        f"polling and retrying in {max_interval:g}s",
+                        file=sys.stderr,
+                    )
+                    retry_at = time.monotonic() + max_interval
+                    yield from poll_channels(
+                        client,
+                        high_water_marks,
+                        min_interval=min_interval,
+                        max_interval=max_interval,
+                        limiter=limiter,
+                        should_stop=lambda: (
+                            should_stop() or time.monotonic() >= retry_at
+                        ),
+                    )
+                    continue
+
+            if not socket_client.is_connected():
+                print(
+                    "Socket Mode connection lost, polling until it is restored",
+                    file=sys.stderr,
+                )
+                session_id = None
+                yield from poll_channels(
+                    client,
+                    high_water_marks,
+                    min_interval=min_interval,
+                    max_interval=max_interval,
+                    limiter=limiter,
+                    should_stop=lambda: should_stop() or socket_client.is_connected(),
+                )
+                continue
+
+            if socket_client.session_id() != session_id:
+                # Events are only delivered while connected; catch up on
+                # anything posted before this connection was established.
+                session_id = socket_client.session_id()
+                for channel in high_water_marks:
+                    for record in read_new_messages(
+                        client, channel, high_water_marks, limiter
+                    ):
+                        yield record.to_dict()
+
+            try:
+                event = events.get(timeout=1.0)
+            except Empty:
+                continue
+
+            channel = event["channel"]
+            if event.get("subtype") in IGNORED_SUBTYPES:
+                continue
+            if (
+                event.get("thread_ts", event["ts"]) != event["ts"]
+                and event.get("subtype") != "thread_broadcast"
+            ):
+                continue
+            if ts_to_micros(event["ts"]) <= ts_to_micros(high_water_marks[channel]):
+                continue
+
+            message = {
+                key: value
+                for key, value in event.items()
+                if key not in ("channel", "channel_type", "event_ts")
+            }
+            message["channel_id"] = channel
+            high_water_marks[channel] = message["ts"]
+            yield message
+    finally:
+        socket_client.close()
@@ -0,0 +1,86 @@
+"""
+Profiling of a clacks invocation.
+
+With clacks --profile FILE, the command handler runs under cProfile, its
+statistics are written to FILE (for python -m pstats, or snakeviz), and the
+time of the invocation is broken down by phase on stderr. Phases are measured
+by the spans of the invocation's trace (see slack_clacks.tracing), and so
+include the work of every thread; serialization, which has no span, is the
+time cProfile saw spent encoding JSON in the handler's thread.
+
+Phases may overlap: resolving a channel name includes its API calls, and API
+calls made concurrently are each counted in full.
+"""
+
+import cProfile
+import os
+from types import CodeType
+from typing import Callable
+
+from slack_clacks.tracing import Tracer
+
+# Phases measured by spans, and the spans that make them up.
+SPAN_PHASES: list[tuple[str, Callable[[dict], bool]]] = [
+    ("imports", lambda span: span["name"] == "imports"),
+    ("argument parsing", lambda span: span["name"] == "parse_args"),
+    ("ensure_db_updated", lambda span: span["name"] == "ensure_db_updated"),
+    ("session open", lambda span: span["cat"] == "session"),
+    ("name resolution", lambda span: span["cat"] == "resolve"),
+    ("network", lambda span: span["cat"] == "slack"),
+]
+
+# Functions whose cumulative time is counted as serialization.
+JSON_MODULE = os.path.join("json", "__init__.py")
+SERIALIZERS = {"dump", "dumps"}
+ORJSON_DUMPS = "<built-in method orjson.dumps>"
+
+
+def is_serializer(code: CodeType | str) -> bool:
+    if isinstance(code, str):
+        return code == ORJSON_DUMPS
+    return code.co_name in SERIALIZERS and code.co_filename.endswith(JSON_MODULE)
+
+
+def serialization_time(profiler: cProfile.Profile) -> tuple[float, int]:
+    """Seconds spent in, and calls of, JSON encoding functions."""
+    seconds = 0.0
+    calls = 0
+    for entry in profiler.getstats():
+        if is_serializer(entry.code):
+            seconds += entry.totaltime
+            calls += entry.callcount
+    return seconds, calls
+
+
+def phase_breakdown(tracer: Tracer, profiler: cProfile.Profile) -> list[dict]:
+    """Seconds spent in, and the number of spans of, each phase."""
+    spans = tracer.spans()
+    phases = []
+    for phase, matches in SPAN_PHASES:
+        durations = [span["dur"] for span in spans if matches(span)]
+        phases.append(
+            {
+                "phase": phase,
+                "seconds": round(sum(durations) / 1e6, 4),
+                "count": len(durations),
+            }
+        )
+    seconds, calls = serialization_time(profiler)
+    phases.append(
+        {"phase": "serialization", "seconds": round(seconds, 4), "count": calls}
+    )
+    total = [span["dur"] for span in spans if span["name"] == "command"]
+    phases.append(
+        {"phase": "command", "seconds": round(sum(total) / 1e6, 4), "count": 1}
+    )
+    return phases
+
+
+def format_phases(phases: list[dict]) -> str:
+    width = max(len(phase["phase"]) for phase in phases)
+    lines = [f"{'phase':<{width}}  {'seconds':>9}  {'count':>6}"]
+    for phase in phases:
+        lines.append(
+            f"{phase['phase']:<{width}}  {phase['seconds']:>9.4f}  {phase['count']:>6}"
+        )
+    return "\n".join(lines)
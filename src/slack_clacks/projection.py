@@ -0,0 +1,109 @@
+"""
+Field projection and encoding for message output.
+
+--fields keeps only the named fields of each message (dotted names select
+nested fields, e.g. channel.name); --compact drops the bulky rendering fields
+(blocks, attachments, profiles, ...) and keeps everything else. Projections
+apply to each message before it is serialized, including the replies nested
+under harvested threads.
+
+Streamed output is encoded with orjson when it is installed.
+"""
+
+import argparse
+import json
+from typing import Callable
+
+try:
+    import orjson  # type: ignore[import-not-found]
+except ImportError:  # optional: pip install 'slack-clacks[fast]'
+    orjson = None  # type: ignore[assignment]
+
+# Rich rendering and profile data that make up most of a message's size but
+# are rarely needed to process it.
+COMPACT_DROPPED_FIELDS = frozenset(
+    {
+        "attachments",
+        "blocks",
+        "bot_profile",
+        "files",
+        "metadata",
+        "reactions",
+        "user_profile",
+    }
+)
+
+Projection = Callable[[dict], dict]
+
+
+def select_fields(record: dict, fields: list[list[str]]) -> dict:
+    result: dict = {}
+    for path in fields:
+        value = record
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = result
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = value
+    return result
+
+
+def make_projection(fields: str | None = None, compact: bool = False) -> Projection:
+    """
+    Projection for a --fields value (comma-separated) and --compact flag.
+    Nested "replies" are projected with the same fields.
+    """
+    paths = None
+    if fields:
+        names = (name.strip() for name in fields.split(","))
+        paths = [name.split(".") for name in names if name]
+
+    def project(record: dict) -> dict:
+        projected = record
+        if paths is not None:
+            projected = select_fields(record, paths)
+            if "replies" in record and isinstance(record["replies"], list):
+                projected["replies"] = record["replies"]
+        if compact:
+            projected = {
+                key: value
+                for key, value in projected.items()
+                if key not in COMPACT_DROPPED_FIELDS
+            }
+        if isinstance(projected.get("replies"), list):
+            projected["replies"] = [
+                project(reply) if isinstance(reply, dict) else reply
+                for reply in projected["replies"]
+            ]
+        return projected
+
+    if paths is None and not compact:
+        return lambda record: record
+    return project
+
+
+def add_projection_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--fields",
+        type=str,
+        help=(
+            "Comma-separated message fields to output, e.g. ts,user,text "
+            "(dotted names select nested fields) (default: all)"
+        ),
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Drop blocks, attachments, files, reactions, metadata and profiles",
+    )
+
+
+def encode(record: dict) -> bytes:
+    """Serialize a record as JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record).encode()
@@ -0,0 +1,408 @@
+"""
+Output sinks for commands that stream NDJSON.
+
+By default records go to the command's --outfile. With --segment-dir they are
+written to a directory of numbered segment files instead, rotated by size or
+age and optionally compressed, alongside an index.json that records each
+completed segment's record count and ts range so that downstream jobs can
+pick the segments they need.
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import IO, Any, Callable
+
+from slack_clacks.messaging.records import ts_to_micros
+from slack_clacks.projection import Projection, encode, make_projection
+
+INDEX_FILE = "index.json"
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_FSYNC_INTERVAL = 5.0
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+DEFAULT_TEXT_BATCH_SIZE = 500
+COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+SEGMENT_NAME = re.compile(r"segment-(\d+)\.ndjson(?:\.gz|\.zst)?")
+
+
+class StreamSink:
+    """Writes records as NDJSON to an open text file, e.g. --outfile."""
+
+    def __init__(
+        self, fp: IO[str], flush: bool = False, project: Projection | None = None
+    ) -> None:
+        self.fp = fp
+        self.flush_each = flush
+        self.project = project or make_projection()
+
+    def write(self, record: dict) -> None:
+        self.fp.write(encode(self.project(record)).decode())
+        self.fp.write("\n")
+        if self.flush_each:
+            self.fp.flush()
+
+    def flush(self) -> None:
+        self.fp.flush()
+
+    def close(self) -> None:
+        self.fp.close()
+
+    def __enter__(self) -> "StreamSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class TextSink:
+    """
+    Writes records as text lines produced by render, e.g. a TextRenderer.
+    Records are rendered in batches of batch_size, so that render can look up
+    what a whole batch needs at once; flush=True renders every record as soon
+    as it is written.
+    """
+
+    def __init__(
+        self,
+        fp: IO[str],
+        render: Callable[[list[dict]], list[str]],
+        flush: bool = False,
+        batch_size: int = DEFAULT_TEXT_BATCH_SIZE,
+    ) -> None:
+        self.fp = fp
+        self.render = render
+        self.flush_each = flush
+        self.batch_size = batch_size
+        self.pending: list[dict] = []
+
+    def write(self, record: dict) -> None:
+        self.pending.append(record)
+        if self.flush_each or len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.pending:
+            for line in self.render(self.pending):
+                self.fp.write(line)
+                self.fp.write("\n")
+            self.pending = []
+        self.fp.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.fp.close()
+
+    def __enter__(self) -> "TextSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def import_zstandard():
+    try:
+        import zstandard  # type: ignore[import-not-found]
+    except ImportError:
+        raise ValueError(
+            "zstd compression requires the zstandard package. "
+            "Install with: pip install 'slack-clacks[zstd]'"
+        )
+    return zstandard
+
+
+class Segment:
+    """One open segment file and the index entry describing it."""
+
+    def __init__(
+        self, path: Path, sequence: int, compression: str, buffer_size: int
+    ) -> None:
+        # Never overwrite a segment, even one the index does not list.
+        self.raw = io.BufferedWriter(io.FileIO(path, "xb"), buffer_size=buffer_size)
+        self.writer: io.BufferedIOBase = self.raw
+        if compression == "gzip":
+            self.writer = gzip.GzipFile(fileobj=self.raw, mode="wb")
+        elif compression == "zstd":
+            compressor = import_zstandard().ZstdCompressor()
+            self.writer = compressor.stream_writer(self.raw, closefd=False)
+        self.entry: dict[str, Any] = {
+            "sequence": sequence,
+            "path": path.name,
+            "compression": compression,
+            "records": 0,
+            "bytes": 0,
+            "oldest_ts": None,
+            "latest_ts": None,
+        }
+        # oldest_ts and latest_ts as integer microseconds, for comparison.
+        self.oldest: int | None = None
+        self.latest: int | None = None
+
+    def write(self, record: dict) -> None:
+        line = encode(record) + b"\n"
+        self.writer.write(line)
+        self.entry["records"] += 1
+        self.entry["bytes"] += len(line)
+
+        ts = record.get("ts")
+        if ts is None:
+            return
+        micros = ts_to_micros(ts)
+        if self.oldest is None or micros < self.oldest:
+            self.oldest = micros
+            self.entry["oldest_ts"] = ts
+        if self.latest is None or micros > self.latest:
+            self.latest = micros
+            self.entry["latest_ts"] = ts
+
+    def sync(self) -> None:
+        self.writer.flush()
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+
+    def close(self) -> None:
+        if self.writer is not self.raw:
+            # Writes the compressed stream's trailer; leaves raw open.
+            self.writer.close()
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+        self.raw.close()
+
+
+class SegmentedSink:
+    """
+    Writes records as NDJSON to rotating segment files in a directory.
+
+    A new segment is started once the current one holds max_bytes of
+    (uncompressed) NDJSON or has been open for max_seconds; age is checked as
+    records are written. Writes are buffered, and flushed and fsynced at most
+    every fsync_interval seconds and whenever a segment is closed. index.json
+    lists completed segments only, so every segment it names is whole.
+    Segments from earlier runs in the same directory are kept; numbering
+    continues after them, including any left out of the index by a run that
+    was killed before closing its last segment.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        max_bytes: int = DEFAULT_SEGMENT_BYTES,
+        max_seconds: float | None = None,
+        compression: str = "none",
+        fsync_interval: float = DEFAULT_FSYNC_INTERVAL,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+        project: Projection | None = None,
+    ) -> None:
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown compression: {compression}")
+        if compression == "zstd":
+            import_zstandard()
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.compression = compression
+        self.fsync_interval = fsync_interval
+        self.buffer_size = buffer_size
+        self.clock = clock
+        self.project = project or make_projection()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segments: list[dict[str, Any]] = []
+        index_path = self.directory / INDEX_FILE
+        if index_path.exists():
+            self.segments = json.loads(index_path.read_text())["segments"]
+        self.sequence = max(
+            [
+                *(s["sequence"] for s in self.segments),
+                *(
+                    int(match.group(1))
+                    for path in self.directory.glob("segment-*.ndjson*")
+                    if (match := SEGMENT_NAME.fullmatch(path.name))
+                ),
+            ],
+            default=0,
+        )
+
+        self.segment: Segment | None = None
+        self.opened_at = 0.0
+        self.synced_at = 0.0
+
+    def write(self, record: dict) -> None:
+        if self.segment is not None and self._should_rotate(self.segment):
+            self._close_segment(self.segment)
+        if self.segment is None:
+            self.segment = self._open_segment()
+
+        self.segment.write(self.project(record))
+        if self.clock() - self.synced_at >= self.fsync_interval:
+            self.segment.sync()
+            self.synced_at = self.clock()
+
+    def flush(self) -> None:
+        if self.segment is not None:
+            self.segment.sync()
+            self.synced_at = self.clock()
+
+    def close(self) -> None:
+        if self.segment is not None:
+            self._close_segment(self.segment)
+
+    def __enter__(self) -> "SegmentedSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _should_rotate(self, segment: Segment) -> bool:
+        if segment.entry["bytes"] >= self.max_bytes:
+            return True
+        return (
+            self.max_seconds is not None
+            and self.clock() - self.opened_at >= self.max_seconds
+        )
+
+    def _open_segment(self) -> Segment:
+        self.sequence += 1
+        suffix = COMPRESSION_SUFFIXES[self.compression]
+        path = self.directory / f"segment-{self.sequence:06d}.ndjson{suffix}"
+        self.opened_at = self.synced_at = self.clock()
+        return Segment(path, self.sequence, self.compression, self.buffer_size)
+
+    def _close_segment(self, segment: Segment) -> None:
+        segment.close()
+        self.segment = None
+        self.segments.append(segment.entry)
+
+        # Replace the index atomically so readers never see a partial one.
+        index_path = self.directory / INDEX_FILE
+        tmp_path = index_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as ofp:
+            json.dump({"segments": self.segments}, ofp, indent=2)
+            ofp.flush()
+            os.fsync(ofp.fileno())
+        os.replace(tmp_path, index_path)
+
+
+def add_sink_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add --format, --segment-dir and its options to a command's parser."""
+    parser.add_argument(
+        "--format",
+        choices=["json", "text"],
+        default="json",
+        help=(
+            "Output JSON, or plain text lines with mentions expanded to names "
+            "(default: json)"
+        ),
+    )
+    parser.add_argument(
+        "--segment-dir",
+        type=str,
+        help=(
+            "Write NDJSON to rotating segment files in this directory, with an "
+            "index.json of their ts ranges, instead of --outfile"
+        ),
+    )
+    parser.add_argument(
+        "--segment-bytes",
+        type=int,
+        default=DEFAULT_SEGMENT_BYTES,
+        help=(
+            "Start a new segment after this many uncompressed bytes "
+            f"(default: {DEFAULT_SEGMENT_BYTES})"
+        ),
+    )
+    parser.add_argument(
+        "--segment-seconds",
+        type=float,
+        help="Start a new segment after this many seconds (default: no limit)",
+    )
+    parser.add_argument(
+        "--compress",
+        choices=list(COMPRESSION_SUFFIXES),
+        default="none",
+        help="Compress segments (zstd needs the zstd extra) (default: none)",
+    )
+    parser.add_argument(
+        "--fsync-interval",
+        type=float,
+        default=DEFAULT_FSYNC_INTERVAL,
+        help=(
+            "Flush and fsync segments at most this often, in seconds "
+            f"(default: {DEFAULT_FSYNC_INTERVAL:g})"
+        ),
+    )
+
+
+def open_sink(
+    args: argparse.Namespace,
+    flush: bool = False,
+    render: Callable[[list[dict]], list[str]] | None = None,
+) -> StreamSink | SegmentedSink | TextSink:
+    """
+    The sink selected by a command's arguments, projecting records with its
+    --fields/--compact. flush=True flushes --outfile after every record, for
+    commands that tail. render is required for --format text.
+    """
+    if args.format == "text":
+        if args.segment_dir:
+            raise ValueError("--format text cannot be combined with --segment-dir.")
+        if render is None:
+            raise ValueError("--format text is not supported by this command.")
+        return TextSink(args.outfile, render, flush=flush)
+
+    project = make_projection(args.fields, args.compact)
+    if args.segment_dir:
+        return SegmentedSink(
+            args.segment_dir,
+            max_bytes=args.segment_bytes,
+            max_seconds=args.segment_seconds,
+            compression=args.compress,
+            fsync_interval=args.fsync_interval,
+            project=project,
+        )
+    return StreamSink(args.outfile, flush=flush, project=project)
+
+
+def select_segments(
+    directory: str | Path, oldest: str | None = None, latest: str | None = None
+) -> list[Path]:
+    """
+    Paths of the completed segments whose ts range overlaps [oldest, latest],
+    in order. Segments without ts values are always included.
+    """
+    index_path = Path(directory) / INDEX_FILE
+    if not index_path.exists():
+        return []
+    oldest_micros = ts_to_micros(oldest) if oldest is not None else None
+    latest_micros = ts_to_micros(latest) if latest is not None else None
+    paths = []
+    for segment in json.loads(index_path.read_text())["segments"]:
+        if segment["oldest_ts"] is not None:
+            if (
+                latest_micros is not None
+                and ts_to_micros(segment["oldest_ts"]) > latest_micros
+            ):
+                continue
+            if (
+                oldest_micros is not None
+                and ts_to_micros(segment["latest_ts"]) < oldest_micros
+            ):
+                continue
+        paths.append(Path(directory) / segment["path"])
+    return paths
+
+
+def open_segment(path: str | Path) -> IO[str]:
+    """Open a segment for reading as text, decompressing it if needed."""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt")
+    if path.suffix == ".zst":
+        reader = import_zstandard().ZstdDecompressor().stream_reader(open(path, "rb"))
+        return io.TextIOWrapper(reader)
+    return open(path)
@@ -0,0 +1,138 @@
+"""
+Per-invocation tracing.
+
+With clacks --trace FILE (or CLACKS_TRACE=FILE), the phases of the invocation
+and every Slack Web API call made through create_client() are recorded as
+spans, and written to FILE in the Chrome trace event format when the command
+finishes. The file can be opened in Perfetto (https://ui.perfetto.dev) or
+chrome://tracing, where each thread is a track of its own.
+
+When tracing is off, span() does nothing but yield.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Iterator, ParamSpec, TypeVar
+
+# When clacks started importing; the origin of every trace.
+IMPORT_STARTED = time.perf_counter()
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+class Tracer:
+    """Spans recorded, from any thread, as Chrome trace complete events."""
+
+    def __init__(self, origin: float = IMPORT_STARTED) -> None:
+        self.origin = origin
+        self.events: list[dict] = []
+        self.threads: dict[int, str] = {}
+        self.lock = threading.Lock()
+
+    def record(
+        self,
+        name: str,
+        category: str,
+        started: float,
+        finished: float,
+        args: dict | None = None,
+    ) -> None:
+        """Record a span between two time.perf_counter() readings."""
+        thread = threading.current_thread()
+        tid = threading.get_ident()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((started - self.origin) * 1e6, 1),
+            "dur": round((finished - started) * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": args or {},
+        }
+        with self.lock:
+            self.events.append(event)
+            self.threads[tid] = thread.name
+
+    def spans(self, category: str | None = None) -> list[dict]:
+        with self.lock:
+            return [e for e in self.events if category in (None, e["cat"])]
+
+    def to_dict(self) -> dict:
+        pid = os.getpid()
+        with self.lock:
+            metadata = [
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+                for tid, name in self.threads.items()
+            ]
+            events = sorted(self.events, key=lambda e: e["ts"])
+        return {"traceEvents": [*metadata, *events], "displayTimeUnit": "ms"}
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as ofp:
+            json.dump(self.to_dict(), ofp)
+
+
+# The tracer of this invocation, if tracing is on.
+tracer: Tracer | None = None
+
+
+def start(origin: float = IMPORT_STARTED) -> Tracer:
+    global tracer
+    tracer = Tracer(origin)
+    return tracer
+
+
+def stop() -> Tracer | None:
+    """Stop tracing, returning the tracer that was recording, if any."""
+    global tracer
+    stopped, tracer = tracer, None
+    return stopped
+
+
+@contextmanager
+def span(name: str, category: str = "clacks", **args) -> Iterator[dict]:
+    """
+    Record the enclosed block as a span, if tracing is on. Yields the span's
+    args, to which the block may add. If the block raises, the exception's
+    type is recorded as the span's error.
+    """
+    current = tracer
+    if current is None:
+        yield args
+        return
+    started = time.perf_counter()
+    try:
+        yield args
+    except BaseException as e:
+        args.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        current.record(name, category, started, time.perf_counter(), args)
+
+
+def traced(category: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Record every call of the decorated function as a span."""
+
+    def decorate(func: Callable[P, R]) -> Callable[P, R]:
+        @wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if tracer is None:
+                return func(*args, **kwargs)
+            with span(func.__name__, category):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,244 @@
+"""
+Local stand-in for Slack's Socket Mode, for tests.
+
+Serves the apps.connections.open and conversations.history Web API methods,
+and the WebSocket endpoint that apps.connections.open hands out. Messages posted with
+post_message() are stored in the channel history and pushed as events_api
+envelopes to every open connection.
+"""
+
+import base64
+import hashlib
+import http.server
+import json
+import select
+import socket
+import struct
+import threading
+import time
+from queue import Empty, Queue
+from urllib.parse import parse_qs
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+
+def encode_frame(opcode: int, payload: bytes) -> bytes:
+    """Unmasked server-to-client frame."""
+    header = bytes([0x80 | opcode])
+    if len(payload) < 126:
+        header += bytes([len(payload)])
+    elif len(payload) < 1 << 16:
+        header += bytes([126]) + struct.pack("!H", len(payload))
+    else:
+        header += bytes([127]) + struct.pack("!Q", len(payload))
+    return header + payload
+
+
+def receive_exactly(sock: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        data += chunk
+    return data
+
+
+def decode_frame(sock: socket.socket) -> tuple[int, bytes]:
+    """Read one (masked) client-to-server frame."""
+    first, second = receive_exactly(sock, 2)
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", receive_exactly(sock, 2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", receive_exactly(sock, 8))
+    mask = receive_exactly(sock, 4) if second & 0x80 else b"\0\0\0\0"
+    payload = receive_exactly(sock, length)
+    return first & 0x0F, bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+
+class SocketModeHandler(http.server.BaseHTTPRequestHandler):
+    server: "StandInServer"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        params = {
+            key: values[0]
+            for key, values in parse_qs(self.rfile.read(length).decode()).items()
+        }
+        if self.path.endswith("/apps.connections.open"):
+            # Refusing here rather than at the WebSocket handshake keeps the
+            # client from opening sockets that it would never close.
+            if not self.server.stand_in.accepting:
+                self.send_json({"ok": False, "error": "service_unavailable"})
+                return
+            port = self.server.server_port
+            self.send_json(
+                {"ok": True, "url": f"ws://127.0.0.1:{port}/link/?ticket=stand-in"}
+            )
+        elif self.path.endswith("/conversations.history"):
+            self.server.stand_in.history_calls += 1
+            self.send_json(self.server.stand_in.read_history(params))
+        else:
+            self.send_json({"ok": False, "error": "unknown_method"})
+
+    def do_GET(self):
+        if self.path.startswith("/link"):
+            self.serve_websocket()
+        else:
+            self.send_json({"ok": False, "error": "unknown_method"})
+
+    def send_json(self, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def serve_websocket(self):
+        stand_in = self.server.stand_in
+        self.close_connection = True
+        if not stand_in.accepting:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        key = self.headers["Sec-WebSocket-Key"]
+        accept = base64.b64encode(
+            hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()
+        ).decode()
+        self.send_response(101)
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept)
+        self.end_headers()
+        self.wfile.flush()
+
+        sock = self.connection
+        outgoing = Queue()
+        stand_in.connections.append(outgoing)
+        try:
+            self.send_text(sock, {"type": "hello", "num_connections": 1})
+            while stand_in.accepting:
+                readable, _, _ = select.select([sock], [], [], 0.02)
+                if readable:
+                    opcode, payload = decode_frame(sock)
+                    if opcode == OPCODE_PING:
+                        sock.sendall(encode_frame(OPCODE_PONG, payload))
+                    elif opcode == OPCODE_TEXT:
+                        stand_in.acks.append(json.loads(payload)["envelope_id"])
+                    elif opcode == OPCODE_CLOSE:
+                        return
+                try:
+                    while True:
+                        self.send_text(sock, outgoing.get_nowait())
+                except Empty:
+                    pass
+            sock.sendall(encode_frame(OPCODE_CLOSE, struct.pack("!H", 1001)))
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            stand_in.connections.remove(outgoing)
+
+    def send_text(self, sock: socket.socket, body: dict):
+        sock.sendall(encode_frame(OPCODE_TEXT, json.dumps(body).encode()))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    stand_in: "SocketModeStandIn"
+
+
+class SocketModeStandIn:
+    """
+    Run with `with SocketModeStandIn() as stand_in:`; point a WebClient at
+    stand_in.base_url for both the socket client and history reads.
+    """
+
+    def __init__(self) -> None:
+        self.history: dict[str, list[dict]] = {}
+        self.acks: list[str] = []
+        self.history_calls = 0
+        self.accepting = True
+        self.connections: list[Queue[dict]] = []
+        self.envelopes = 0
+        self.server = StandInServer(("127.0.0.1", 0), SocketModeHandler)
+        self.server.stand_in = self
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}/api/"
+
+    def __enter__(self) -> "SocketModeStandIn":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.accepting = False
+        self.server.shutdown()
+        self.server.server_close()
+
+    def post_message(self, channel: str, message: dict, push: bool = True) -> None:
+        """Add a message to a channel, pushing it to open connections."""
+        self.history.setdefault(channel, []).append(message)
+        if not push:
+            return
+        self.envelopes += 1
+        envelope = {
+            "type": "events_api",
+            "envelope_id": f"envelope-{self.envelopes}",
+            "accepts_response_payload": False,
+            "payload": {
+                "type": "event_callback",
+                "event": {
+                    "type": "message",
+                    "channel": channel,
+                    "channel_type": "channel",
+                    "event_ts": message["ts"],
+                    **message,
+                },
+            },
+        }
+        for outgoing in list(self.connections):
+            outgoing.put(envelope)
+
+    def read_history(self, params: dict) -> dict:
+        """conversations.history: top-level messages newer than oldest."""
+        oldest = float(params.get("oldest", 0))
+        messages = [
+            message
+            for message in self.history.get(params["channel"], [])
+            if float(message["ts"]) > oldest
+            and message.get("thread_ts", message["ts"]) == message["ts"]
+        ]
+        messages.sort(key=lambda m: float(m["ts"]), reverse=True)
+        return {"ok": True, "messages": messages, "has_more": False}
+
+    def disconnect(self) -> None:
+        """Close open connections and refuse new ones until reconnect()."""
+        self.accepting = False
+        wait_for(lambda: not self.connections)
+
+    def reconnect(self) -> None:
+        self.accepting = True
+
+    def wait_for_connection(self) -> None:
+        wait_for(lambda: bool(self.connections))
+
+
+def wait_for(condition, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("condition not met")
+        time.sleep(0.01)
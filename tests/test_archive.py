@@ -0,0 +1,603 @@
+import json
+import tempfile
+import unittest
+import zlib
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from slack_clacks.archive import codec as payload_codec
+from slack_clacks.archive.codec import PayloadCodec
+from slack_clacks.archive.maintenance import (
+    compact_archive,
+    incremental_vacuum,
+    prune_archive,
+)
+from slack_clacks.archive.pipeline import sync_channels
+from slack_clacks.archive.query import plan_query, run_query
+from slack_clacks.archive.stats import (
+    compute_stats,
+    load_columns,
+    load_shard_columns,
+    np,
+)
+from slack_clacks.archive.store import (
+    MESSAGE_COLUMNS,
+    MESSAGE_SOURCE,
+    Archive,
+    get_channel_state,
+    get_retention_cutoff,
+    open_archive,
+    row_to_message,
+    set_channel_state,
+    set_retention,
+    store_messages,
+)
+from slack_clacks.archive.sync import sync_channel
+
+PARENT = {
+    "ts": "100.000000",
+    "thread_ts": "100.000000",
+    "user": "U1",
+    "text": "question",
+    "reply_count": 2,
+    "latest_reply": "160.000000",
+    "reactions": [{"name": "eyes", "count": 2}],
+}
+REPLIES = [
+    {"ts": "130.000000", "thread_ts": "100.000000", "user": "U2", "text": "a"},
+    {"ts": "160.000000", "thread_ts": "100.000000", "user": "U1", "text": "b"},
+]
+
+
+def history(channel, oldest=None, cursor=None, **kwargs):
+    messages = [PARENT, {"ts": "50.000000", "user": "U2", "edited": {"user": "U2"}}]
+    return {
+        "messages": [
+            m for m in messages if oldest is None or float(m["ts"]) > float(oldest)
+        ],
+        "response_metadata": {"next_cursor": ""},
+    }
+
+
+def replies(channel, ts, oldest=None, cursor=None, **kwargs):
+    return {"messages": [PARENT, *REPLIES]}
+
+
+class TestSyncChannel(unittest.TestCase):
+    def setUp(self):
+        self.archive = Archive(":memory:")
+        self.client = MagicMock()
+        self.client.conversations_history.side_effect = history
+        self.client.conversations_replies.side_effect = replies
+
+    def tearDown(self):
+        self.archive.close()
+
+    def test_archives_messages_and_replies_then_resumes(self):
+        result = sync_channel(self.archive, self.client, "T1", "C1", name="general")
+        self.assertEqual(
+            result, {"channel_id": "C1", "shard": 0, "messages": 4, "threads": 1}
+        )
+
+        rows = self.archive.catalog.execute(
+            f"SELECT {MESSAGE_COLUMNS}, reply_count, reaction_count, edited "
+            f"FROM {MESSAGE_SOURCE} ORDER BY ts"
+        ).fetchall()
+        self.assertEqual(
+            [row[1] for row in rows],
+            [50_000_000, 100_000_000, 130_000_000, 160_000_000],
+        )
+        self.assertEqual(rows[1][6:], (2, 2, 0))
+        self.assertEqual(rows[0][8], 1)
+        self.assertEqual(
+            row_to_message(*rows[1][:6], codec=self.archive.codec()),
+            {**PARENT, "channel_id": "C1"},
+        )
+        self.assertEqual(
+            get_channel_state(self.archive.catalog, "T1", "C1"), 100_000_000
+        )
+
+        result = sync_channel(self.archive, self.client, "T1", "C1")
+        self.assertEqual(result["messages"], 0)
+        self.assertEqual(result["threads"], 0)
+        self.assertEqual(
+            self.client.conversations_history.call_args.kwargs["oldest"], "100.000000"
+        )
+        self.assertEqual(self.client.conversations_replies.call_count, 1)
+
+
+class TestSyncPipeline(unittest.TestCase):
+    def setUp(self):
+        self.archive = Archive(":memory:")
+        self.client = MagicMock()
+        self.client.conversations_history.side_effect = history
+        self.client.conversations_replies.side_effect = replies
+
+    def tearDown(self):
+        self.archive.close()
+
+    def sync(self, **kwargs):
+        results = []
+        stages = sync_channels(
+            self.archive,
+            self.client,
+            "T1",
+            [("C1", "general"), ("C2", None)],
+            on_channel=results.append,
+            **kwargs,
+        )
+        return sorted(results, key=lambda r: r["channel_id"]), stages
+
+    def test_archives_channels_through_stages(self):
+        for processes in [1, 2]:
+            with self.subTest(processes=processes):
+                self.archive.catalog.executescript(
+                    "DELETE FROM messages; DELETE FROM channels; DELETE FROM threads"
+                )
+                results, stages = self.sync(
+                    processes=processes, queue_size=1, commit_size=1
+                )
+                self.assertEqual(
+                    results,
+                    [
+                        {"channel_id": c, "shard": 0, "messages": 4, "threads": 1}
+                        for c in ["C1", "C2"]
+                    ],
+                )
+                self.assertEqual(
+                    [(s["stage"], s["messages"]) for s in stages],
+                    [("fetch", 8), ("transform", 8), ("write", 8)],
+                )
+                plan = plan_query(self.archive, "T1", channel_ids=["C1"])
+                self.assertEqual(
+                    list(run_query(self.archive, plan))[1],
+                    {**PARENT, "channel_id": "C1"},
+                )
+                self.assertEqual(
+                    get_channel_state(self.archive.catalog, "T1", "C2"), 100_000_000
+                )
+
+        results, _ = self.sync()
+        self.assertEqual([r["messages"] for r in results], [0, 0])
+
+    def test_fetch_errors_stop_the_pipeline(self):
+        self.client.conversations_history.side_effect = RuntimeError("boom")
+        with self.assertRaisesRegex(RuntimeError, "boom"):
+            self.sync()
+        self.assertIsNone(get_channel_state(self.archive.catalog, "T1", "C1"))
+
+
+class TestQuery(unittest.TestCase):
+    def setUp(self):
+        self.archive = Archive(":memory:")
+        store_messages(
+            self.archive.catalog,
+            "T1",
+            "C1",
+            [
+                PARENT,
+                *REPLIES,
+                {"ts": "200.000000", "user": "U2", "edited": {"user": "U2"}},
+            ],
+        )
+        store_messages(
+            self.archive.catalog,
+            "T1",
+            "C2",
+            [
+                {"ts": "110.000000", "user": "U1", "reply_count": 1},
+                {"ts": "120.000000", "user": "U1"},
+            ],
+        )
+        store_messages(
+            self.archive.catalog, "T2", "C3", [{"ts": "1.000000", "user": "U1"}]
+        )
+        set_channel_state(self.archive.catalog, "T1", "C1", "general", None)
+        set_channel_state(self.archive.catalog, "T1", "C2", None, None)
+
+    def tearDown(self):
+        self.archive.close()
+
+    def query(self, **filters):
+        plan = plan_query(self.archive, "T1", **filters)
+        return plan.index_name, [m["ts"] for m in run_query(self.archive, plan)]
+
+    def test_merges_scans_in_ts_order(self):
+        self.assertEqual(
+            self.query(),
+            (
+                "messages_channel_ts",
+                ["100.000000", "110.000000", "120.000000", "130.000000"]
+                + ["160.000000", "200.000000"],
+            ),
+        )
+
+    def test_filters_by_user_and_flags(self):
+        self.assertEqual(
+            self.query(user_ids=["U1"], has_thread=True),
+            ("messages_user_ts", ["100.000000", "110.000000"]),
+        )
+        self.assertEqual(
+            self.query(user_ids=["U1", "U2"], channel_ids=["C1"], oldest="130"),
+            ("messages_channel_ts", ["130.000000", "160.000000", "200.000000"]),
+        )
+        self.assertEqual(self.query(channel_ids=["C1"], edited=True)[1], ["200.000000"])
+        self.assertEqual(self.query(has_reaction=True)[1], ["100.000000"])
+        self.assertEqual(self.query(user_ids=["U9"])[1], [])
+
+    def test_thread(self):
+        index, ts = self.query(thread_ts="100.000000", latest="130")
+        self.assertEqual(index, "messages_thread_ts")
+        self.assertEqual(ts, ["100.000000", "130.000000"])
+
+    def test_scans_use_the_planned_index(self):
+        plan = plan_query(self.archive, "T1", user_ids=["U1"], has_thread=True)
+        _, sql, params = plan.scans[0]
+        details = " ".join(
+            row[-1]
+            for row in self.archive.catalog.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        )
+        self.assertIn("messages_user_ts", details)
+        self.assertNotIn("TEMP B-TREE", details)
+
+
+class TestShardedArchive(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "archive.sqlite"
+        self.archive = Archive(self.path, shards=4)
+
+        def channel_history(channel, oldest=None, cursor=None, **kwargs):
+            index = int(channel[1:])
+            return {
+                "messages": [
+                    {"ts": f"{index + 10 * i}.000000", "user": f"U{i % 3}"}
+                    for i in range(5)
+                ]
+            }
+
+        self.client = MagicMock()
+        self.client.conversations_history.side_effect = channel_history
+        self.channels = [f"C{i}" for i in range(8)]
+        for channel_id in self.channels:
+            sync_channel(self.archive, self.client, "T1", channel_id)
+
+    def tearDown(self):
+        self.archive.close()
+        self.directory.cleanup()
+
+    def test_spreads_channels_over_shard_files(self):
+        shards = dict(
+            self.archive.catalog.execute("SELECT channel_id, shard FROM channels")
+        )
+        self.assertEqual(set(shards), set(self.channels))
+        self.assertGreater(len(set(shards.values())), 1)
+        for channel_id, shard in shards.items():
+            (count,) = (
+                self.archive.shard(shard)
+                .execute(
+                    "SELECT count(*) FROM messages WHERE channel_id = ?", (channel_id,)
+                )
+                .fetchone()
+            )
+            self.assertEqual(count, 5)
+        self.assertTrue((Path(self.directory.name) / "archive-003.sqlite").exists())
+
+        with self.assertRaises(ValueError):
+            Archive(self.path, shards=2)
+        reopened = Archive(self.path)
+        self.assertEqual(reopened.shard_count, 4)
+        reopened.close()
+
+    def test_queries_fan_out_across_shards(self):
+        plan = plan_query(self.archive, "T1", user_ids=["U1"])
+        messages = list(run_query(self.archive, plan, batch_size=2))
+        self.assertEqual(len(messages), 16)
+        ts = [float(m["ts"]) for m in messages]
+        self.assertEqual(ts, sorted(ts))
+        self.assertEqual({m["user"] for m in messages}, {"U1"})
+
+        plan = plan_query(self.archive, "T1")
+        stream = run_query(self.archive, plan, batch_size=1)
+        self.assertEqual(
+            [next(stream)["ts"] for _ in range(3)], ["0.000000", "1.000000", "2.000000"]
+        )
+        stream.close()
+
+    @unittest.skipUnless(np is not None, "requires numpy")
+    def test_stats_combine_shards(self):
+        stats = compute_stats(load_columns(self.archive, "T1"))
+        self.assertEqual(stats["messages"], 40)
+        self.assertEqual(
+            stats["top_posters"],
+            [
+                {"user": "U0", "messages": 16},
+                {"user": "U1", "messages": 16},
+                {"user": "U2", "messages": 8},
+            ],
+        )
+        self.assertEqual(
+            sorted(c["channel_id"] for c in stats["channels"]), self.channels
+        )
+
+
+@unittest.skipUnless(np is not None, "requires numpy")
+class TestStats(unittest.TestCase):
+    def setUp(self):
+        self.archive = Archive(":memory:")
+        hour = 3600
+        store_messages(
+            self.archive.catalog,
+            "T1",
+            "C1",
+            [
+                # Thursday 1970-01-01 00:00 UTC, a thread answered after 60s.
+                {"ts": "0.000000", "thread_ts": "0.000000", "user": "U1"},
+                {"ts": "60.000000", "thread_ts": "0.000000", "user": "U2"},
+                {"ts": "90.000000", "thread_ts": "0.000000", "user": "U1"},
+                # A thread answered after an hour.
+                {"ts": f"{hour}.000000", "thread_ts": f"{hour}.000000", "user": "U1"},
+                {
+                    "ts": f"{2 * hour}.000000",
+                    "thread_ts": f"{hour}.000000",
+                    "user": "U3",
+                },
+                {"ts": "5.000000", "subtype": "channel_join"},
+            ],
+        )
+        store_messages(
+            self.archive.catalog,
+            "T1",
+            "C2",
+            [{"ts": f"{24 * hour}.000000", "user": "U2"}],
+        )
+        store_messages(
+            self.archive.catalog, "T2", "C3", [{"ts": "1.000000", "user": "U9"}]
+        )
+
+    def tearDown(self):
+        self.archive.close()
+
+    def test_loads_columns_in_batches_from_one_snapshot(self):
+        expected = load_columns(self.archive, "T1")
+        with patch("slack_clacks.archive.stats.LOAD_BATCH_SIZE", 2):
+            batched = load_columns(self.archive, "T1")
+        for name in ["ts", "user", "channel", "thread_ts"]:
+            np.testing.assert_array_equal(
+                getattr(batched, name), getattr(expected, name)
+            )
+        self.assertEqual(batched.channels, expected.channels)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "archive.sqlite"
+            archive = Archive(path)
+            messages = [{"ts": f"{i}.000000", "user": "U1"} for i in range(5)]
+            store_messages(archive.catalog, "T1", "C1", messages)
+            archive.catalog.commit()
+            writer = open_archive(path)
+            written = []
+
+            class WrittenDuringScan:
+                """The archive, with a sync committing after the first batch."""
+
+                @property
+                def in_transaction(self):
+                    return archive.catalog.in_transaction
+
+                def rollback(self):
+                    archive.catalog.rollback()
+
+                def execute(self, sql, params=()):
+                    cursor = archive.catalog.execute(sql, params)
+                    if "FROM messages" not in sql:
+                        return cursor
+
+                    def fetchmany(size):
+                        rows = cursor.fetchmany(size)
+                        if not written:
+                            store_messages(
+                                writer, "T1", "C2", [{"ts": "9.0", "user": "U2"}]
+                            )
+                            writer.commit()
+                            written.append(True)
+                        return rows
+
+                    return MagicMock(fetchmany=fetchmany)
+
+            with patch("slack_clacks.archive.stats.LOAD_BATCH_SIZE", 2):
+                columns = load_shard_columns(
+                    WrittenDuringScan(),  # type: ignore[arg-type]
+                    "T1",
+                )
+            writer.close()
+            archive.close()
+
+        # Neither the new message nor its new user is seen.
+        self.assertEqual(len(columns.ts), 5)
+        self.assertEqual((columns.channels, columns.users), (["C1"], ["", "U1"]))
+
+    def test_computes_aggregates(self):
+        columns = load_columns(self.archive, "T1")
+        self.assertEqual(columns.users, ["", "U1", "U2", "U3", "U9"])
+        self.assertEqual(columns.channels, ["C1", "C2"])
+
+        stats = compute_stats(columns, top=2, channel_names={"C1": "general"})
+
+        self.assertEqual(stats["messages"], 7)
+        self.assertEqual(
+            stats["top_posters"],
+            [{"user": "U1", "messages": 3}, {"user": "U2", "messages": 2}],
+        )
+        c1, c2 = stats["channels"]
+        self.assertEqual(
+            (c1["channel_id"], c1["channel_name"], c1["messages"]), ("C1", "general", 6)
+        )
+        self.assertEqual(
+            c1["top_posters"],
+            [{"user": "U1", "messages": 3}, {"user": "U2", "messages": 1}],
+        )
+        self.assertEqual(c1["response_latency"]["threads"], 2)
+        self.assertEqual(c1["response_latency"]["median_seconds"], (60 + 3600) / 2)
+        self.assertEqual(c2["response_latency"]["threads"], 0)
+        self.assertEqual(stats["response_latency"]["threads"], 2)
+
+        counts = stats["heatmap"]["counts"]
+        self.assertEqual(counts[3][0], 4)
+        self.assertEqual(counts[3][1], 1)
+        self.assertEqual(counts[3][2], 1)
+        self.assertEqual(counts[4][0], 1)
+        self.assertEqual(sum(map(sum, counts)), 7)
+
+    def test_filters_channels_and_time(self):
+        columns = load_columns(self.archive, "T1", channel_ids=["C1"], oldest="60")
+        self.assertEqual(
+            sorted(columns.ts.tolist()),
+            [60_000_000, 90_000_000, 3_600_000_000, 7_200_000_000],
+        )
+
+        stats = compute_stats(columns, utc_offset_hours=-1)
+        self.assertEqual(stats["heatmap"]["counts"][2][23], 2)
+
+    def test_empty_archive(self):
+        stats = compute_stats(load_columns(self.archive, "T0"))
+        self.assertEqual(stats["messages"], 0)
+        self.assertEqual(stats["channels"], [])
+        self.assertIsNone(stats["response_latency"]["median_seconds"])
+
+
+def chatty_message(index: int) -> dict:
+    return {
+        "ts": f"{1000 + index}.000000",
+        "user": "U1",
+        "text": f"message {index}",
+        "blocks": [
+            {
+                "type": "rich_text",
+                "block_id": f"b{index}",
+                "elements": [{"type": "text", "text": f"message {index}"}] * 4,
+            }
+        ],
+        "team": "T1",
+        "client_msg_id": f"00000000-0000-0000-0000-{index:012d}",
+    }
+
+
+class TestPayloadCompression(unittest.TestCase):
+    def test_codec_round_trips_every_format(self):
+        codec = PayloadCodec()
+        payload = json.dumps(chatty_message(1)).encode()
+        compressed = codec.compress(payload)
+        self.assertLess(len(compressed), len(payload))
+        self.assertEqual(codec.decompress(compressed), payload)
+        self.assertEqual(codec.decompress(payload), payload)
+        self.assertEqual(codec.decompress(zlib.compress(payload)), payload)
+        self.assertEqual(codec.compress(b'{"a":1}'), b'{"a":1}')
+        self.assertEqual(codec.compress(b""), b"")
+
+    def test_sync_and_query_store_compressed_payloads(self):
+        archive = Archive(":memory:")
+        client = MagicMock()
+        client.conversations_history.return_value = {
+            "messages": [chatty_message(i) for i in range(3)]
+        }
+        sync_channel(archive, client, "T1", "C1")
+        payloads = [
+            row[0] for row in archive.catalog.execute("SELECT payload FROM messages")
+        ]
+        self.assertTrue(all(not p.startswith(b"{") for p in payloads))
+        self.assertEqual(
+            list(run_query(archive, plan_query(archive, "T1"))),
+            [{**chatty_message(i), "channel_id": "C1"} for i in range(3)],
+        )
+        archive.close()
+
+    def test_compact_compresses_old_payloads(self):
+        archive = Archive(":memory:")
+        messages = [chatty_message(i) for i in range(50)]
+        store_messages(archive.catalog, "T1", "C1", messages)
+        set_channel_state(archive.catalog, "T1", "C1", None, None)
+        result = compact_archive(archive, "T1", batch_size=7)
+        self.assertEqual(result["messages"], 50)
+        self.assertLess(result["payload_bytes_after"], result["payload_bytes_before"])
+        self.assertEqual(
+            [m["blocks"] for m in run_query(archive, plan_query(archive, "T1"))],
+            [m["blocks"] for m in messages],
+        )
+        archive.close()
+
+    @unittest.skipUnless(payload_codec.zstandard is not None, "requires zstandard")
+    def test_trained_dictionary(self):
+        archive = Archive(":memory:")
+        messages = [chatty_message(i) for i in range(2000)]
+        store_messages(archive.catalog, "T1", "C1", messages)
+        set_channel_state(archive.catalog, "T1", "C1", None, None)
+        result = compact_archive(archive, "T1")
+        self.assertIsNotNone(result["dictionary_id"])
+        self.assertEqual(
+            [m["client_msg_id"] for m in run_query(archive, plan_query(archive, "T1"))],
+            [m["client_msg_id"] for m in messages],
+        )
+        archive.close()
+
+
+class TestRetention(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.archive = Archive(Path(self.directory.name) / "archive.sqlite")
+        self.day = 86400
+        for channel_id in ["C1", "C2"]:
+            store_messages(
+                self.archive.catalog,
+                "T1",
+                channel_id,
+                [
+                    {**chatty_message(0), "ts": f"{day * self.day}.000000"}
+                    for day in range(10)
+                ],
+            )
+            set_channel_state(self.archive.catalog, "T1", channel_id, None, None)
+        self.archive.catalog.commit()
+        self.now = 10 * self.day
+
+    def tearDown(self):
+        self.archive.close()
+        self.directory.cleanup()
+
+    def count(self, channel_id):
+        return self.archive.catalog.execute(
+            "SELECT count(*) FROM messages WHERE channel_id = ?", (channel_id,)
+        ).fetchone()[0]
+
+    def test_channel_policy_overrides_workspace_default(self):
+        set_retention(self.archive.catalog, "T1", None, 7)
+        set_retention(self.archive.catalog, "T1", "C2", 3)
+        self.assertEqual(
+            get_retention_cutoff(self.archive.catalog, "T1", "C1", self.now),
+            3 * self.day * 1_000_000,
+        )
+        with self.assertRaises(ValueError):
+            set_retention(self.archive.catalog, "T1", "C1", 0)
+
+        result = prune_archive(self.archive, "T1", now=self.now, batch_size=2)
+        self.assertEqual(
+            [(c["channel_id"], c["deleted"]) for c in result["channels"]],
+            [("C1", 3), ("C2", 7)],
+        )
+        self.assertTrue(result["incremental_vacuum"])
+        self.assertEqual((self.count("C1"), self.count("C2")), (7, 3))
+        self.assertEqual(incremental_vacuum(self.archive.catalog), 0)
+
+    def test_sync_skips_messages_outside_retention(self):
+        set_retention(self.archive.catalog, "T1", "C3", 2)
+        client = MagicMock()
+        client.conversations_history.return_value = {"messages": []}
+        with patch("time.time", return_value=self.now):
+            sync_channel(self.archive, client, "T1", "C3")
+        self.assertEqual(
+            client.conversations_history.call_args.kwargs["oldest"],
+            f"{8 * self.day}.000000",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
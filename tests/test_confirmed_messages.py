@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy.orm import Session
+
+from slack_clacks.configuration.database import (
+    CONFIRMED_MESSAGE_TTL,
+    get_engine,
+    is_message_confirmed,
+    record_confirmed_messages,
+    run_migrations,
+    utcnow,
+)
+from slack_clacks.messaging.exceptions import ClacksMessageNotFoundError
+from slack_clacks.messaging.operations import read_message
+
+
+class TestConfirmedMessages(unittest.TestCase):
+    def setUp(self):
+        self.engine = get_engine(config_dir=":memory:")
+        with self.engine.connect() as connection:
+            run_migrations(connection)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_recorded_messages_are_confirmed(self):
+        with Session(self.engine) as session:
+            record_confirmed_messages(session, "T1", "C1", ["1.000100", "2.000200"])
+            session.commit()
+
+        with Session(self.engine) as session:
+            self.assertTrue(is_message_confirmed(session, "T1", "C1", "1.000100"))
+            self.assertTrue(is_message_confirmed(session, "T1", "C1", "2.000200"))
+            self.assertFalse(is_message_confirmed(session, "T1", "C1", "3.000300"))
+            self.assertFalse(is_message_confirmed(session, "T2", "C1", "1.000100"))
+
+    def test_expired_entries_are_not_confirmed(self):
+        expired = utcnow() - CONFIRMED_MESSAGE_TTL * 2
+        with Session(self.engine) as session:
+            with patch(
+                "slack_clacks.configuration.database.utcnow", return_value=expired
+            ):
+                record_confirmed_messages(session, "T1", "C1", ["1.000100"])
+            session.commit()
+
+        with Session(self.engine) as session:
+            self.assertFalse(is_message_confirmed(session, "T1", "C1", "1.000100"))
+
+    def test_rerecording_refreshes_entry(self):
+        with Session(self.engine) as session:
+            record_confirmed_messages(session, "T1", "C1", ["1.000100"])
+            record_confirmed_messages(session, "T1", "C1", ["1.000100"])
+            session.commit()
+            self.assertTrue(is_message_confirmed(session, "T1", "C1", "1.000100"))
+
+
+class TestReadMessage(unittest.TestCase):
+    def test_single_call_fetches_and_validates(self):
+        client = MagicMock()
+        client.conversations_history.return_value = {
+            "messages": [{"ts": "1.000100", "text": "hi"}]
+        }
+
+        response = read_message(client, "C1", "1.000100")
+
+        self.assertEqual(response["messages"][0]["text"], "hi")
+        client.conversations_history.assert_called_once_with(
+            channel="C1",
+            limit=1,
+            latest="1.000100",
+            oldest="1.000100",
+            inclusive=True,
+        )
+
+    def test_missing_message_raises(self):
+        client = MagicMock()
+        client.conversations_history.return_value = {"messages": []}
+        with self.assertRaises(ClacksMessageNotFoundError):
+            read_message(client, "C1", "1.000100")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from unittest.mock import MagicMock
+
+from sqlalchemy.orm import Session
+
+from slack_clacks.configuration.database import (
+    commit_consumer_offset,
+    get_consumer_offset,
+    get_engine,
+    run_migrations,
+)
+from slack_clacks.messaging.operations import read_messages_since
+
+
+class TestConsumerOffsets(unittest.TestCase):
+    def setUp(self):
+        self.engine = get_engine(config_dir=":memory:")
+        with self.engine.connect() as connection:
+            run_migrations(connection)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_offsets_are_per_consumer_and_channel(self):
+        with Session(self.engine) as session:
+            self.assertIsNone(get_consumer_offset(session, "etl", "T1", "C1"))
+            commit_consumer_offset(session, "etl", "T1", "C1", "1.000100")
+            commit_consumer_offset(session, "etl", "T1", "C1", "2.000200")
+            commit_consumer_offset(session, "alerts", "T1", "C1", "1.000100")
+
+        with Session(self.engine) as session:
+            self.assertEqual(
+                get_consumer_offset(session, "etl", "T1", "C1"), "2.000200"
+            )
+            self.assertEqual(
+                get_consumer_offset(session, "alerts", "T1", "C1"), "1.000100"
+            )
+            self.assertIsNone(get_consumer_offset(session, "etl", "T1", "C2"))
+
+
+class TestReadMessagesSince(unittest.TestCase):
+    def test_paginates_backlog_oldest_first(self):
+        client = MagicMock()
+        client.conversations_history.side_effect = [
+            {
+                "messages": [{"ts": "5.0"}, {"ts": "4.0"}],
+                "response_metadata": {"next_cursor": "next"},
+            },
+            {"messages": [{"ts": "3.0"}], "response_metadata": {"next_cursor": ""}},
+        ]
+
+        messages = read_messages_since(client, "C1", oldest="2.0")
+
+        self.assertEqual([m["ts"] for m in messages], ["3.0", "4.0", "5.0"])
+        first_call = client.conversations_history.call_args_list[0].kwargs
+        self.assertEqual(first_call["oldest"], "2.0")
+        self.assertFalse(first_call["inclusive"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from slack_sdk.errors import SlackApiError
+from sqlalchemy.orm import Session
+
+from slack_clacks.configuration.database import (
+    get_engine,
+    get_export_checkpoints,
+    run_migrations,
+)
+from slack_clacks.export.operations import export_workspace
+
+CONVERSATIONS = [
+    {"id": "C1", "name": "general"},
+    {"id": "D1", "is_im": True, "user": "U2"},
+]
+PAGES = {
+    None: {
+        "messages": [
+            {"ts": "30.000000", "text": "c", "reply_count": 1},
+            {"ts": "20.000000", "text": "b"},
+        ],
+        "response_metadata": {"next_cursor": "page2"},
+    },
+    "page2": {"messages": [{"ts": "10.000000", "text": "a"}]},
+}
+
+
+class TestExportWorkspace(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.config_dir = Path(self.directory.name) / "config"
+        self.export_dir = Path(self.directory.name) / "export"
+        self.engine = get_engine(config_dir=self.config_dir)
+        with self.engine.connect() as connection:
+            run_migrations(connection)
+
+        self.failures = {"D1": 1}
+        self.client = MagicMock()
+        self.client.conversations_list.return_value = {"channels": CONVERSATIONS}
+        self.client.conversations_history.side_effect = self.history
+        self.client.conversations_replies.return_value = {
+            "messages": [{"ts": "30.000000"}, {"ts": "31.000000", "text": "reply"}]
+        }
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def history(self, channel, cursor=None, latest=None, **kwargs):
+        if self.failures.get(channel):
+            self.failures[channel] -= 1
+            raise SlackApiError("failed", {"ok": False, "error": "ratelimited"})
+        if channel == "C1" and cursor == "page2" and self.failures.get("C1-page2"):
+            self.failures["C1-page2"] -= 1
+            raise RuntimeError("connection reset")
+        if latest is not None:
+            # Resuming: the page after the checkpointed ts.
+            return PAGES["page2"] if latest == "20.000000" else {"messages": []}
+        return PAGES[cursor]
+
+    def export(self, **kwargs):
+        return export_workspace(
+            self.client,
+            lambda: Session(self.engine),
+            "T1",
+            self.export_dir,
+            ["public_channel", "im"],
+            **kwargs,
+        )
+
+    def lines(self, channel_id):
+        text = (self.export_dir / f"{channel_id}.ndjson").read_text()
+        return [json.loads(line)["ts"] for line in text.splitlines()]
+
+    def test_exports_conversations_and_resumes_failures(self):
+        manifest = self.export()
+        self.assertFalse(manifest["complete"])
+        c1, d1 = manifest["conversations"]
+        self.assertEqual(
+            (c1["channel_id"], c1["name"], c1["type"]),
+            ("C1", "general", "public_channel"),
+        )
+        self.assertEqual((c1["messages"], c1["threads"], c1["complete"]), (4, 1, True))
+        self.assertEqual(
+            (d1["type"], d1["error"], d1["complete"]), ("im", "ratelimited", False)
+        )
+        self.assertEqual(
+            self.lines("C1"), ["30.000000", "31.000000", "20.000000", "10.000000"]
+        )
+        self.assertEqual(
+            json.loads((self.export_dir / "manifest.json").read_text()), manifest
+        )
+
+        history_calls = self.client.conversations_history.call_count
+        manifest = self.export()
+        self.assertTrue(manifest["complete"])
+        # C1 was complete, so only D1 was fetched again.
+        self.assertEqual(
+            self.client.conversations_history.call_count, history_calls + 2
+        )
+        self.assertEqual(manifest["conversations"][0]["messages"], 4)
+
+    def test_resumes_interrupted_conversation_from_checkpoint(self):
+        self.failures = {"C1-page2": 1}
+        manifest = self.export(max_workers=1)
+        c1, d1 = manifest["conversations"]
+        self.assertEqual(
+            (c1["error"], c1["complete"]), ("RuntimeError: connection reset", False)
+        )
+        # The failure did not stop the other conversation.
+        self.assertTrue(d1["complete"])
+        self.assertFalse(manifest["complete"])
+        with Session(self.engine) as session:
+            checkpoint = get_export_checkpoints(session, str(self.export_dir), "T1")[
+                "C1"
+            ]
+            self.assertEqual(checkpoint.cursor, "20.000000")
+            self.assertIsNone(checkpoint.completed_at)
+
+        # Simulate a partial write after the checkpoint.
+        with open(self.export_dir / "C1.ndjson", "a") as ofp:
+            ofp.write('{"ts": "15.0')
+
+        manifest = self.export(max_workers=1)
+        self.assertTrue(manifest["complete"])
+        self.assertEqual(
+            self.lines("C1"), ["30.000000", "31.000000", "20.000000", "10.000000"]
+        )
+        c1_calls = [
+            call.kwargs
+            for call in self.client.conversations_history.call_args_list
+            if call.kwargs["channel"] == "C1"
+        ]
+        self.assertEqual(c1_calls[-1]["latest"], "20.000000")
+
+        manifest = self.export(restart=True)
+        self.assertEqual(manifest["conversations"][0]["messages"], 4)
+        self.assertEqual(len(self.lines("C1")), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import http.server
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from slack_clacks.files.operations import (
+    download_file,
+    get_download_path,
+    upload_file,
+)
+
+CONTENT = bytes(range(256)) * 64
+
+
+class FileHandler(http.server.BaseHTTPRequestHandler):
+    uploaded: list[bytes] = []
+
+    def do_GET(self):
+        if self.headers.get("Authorization") != "Bearer xoxp-test":
+            self.send_response(403)
+            self.end_headers()
+            return
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header:
+            start = int(range_header.removeprefix("bytes=").rstrip("-"))
+            if start >= len(CONTENT):
+                self.send_response(416)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        body = CONTENT[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        FileHandler.uploaded.append(self.rfile.read(length))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestFileTransfers(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.HTTPServer(("127.0.0.1", 0), FileHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/file"
+        self.file = {
+            "id": "F123",
+            "name": "build log.txt",
+            "size": len(CONTENT),
+            "url_private_download": self.url,
+        }
+        FileHandler.uploaded = []
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_download_is_stored_by_file_id(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            result = download_file("xoxp-test", self.file, tmpdir)
+            self.assertEqual(result["status"], "downloaded")
+            self.assertEqual(
+                Path(result["path"]), Path(tmpdir) / "F123" / "build_log.txt"
+            )
+            self.assertEqual(Path(result["path"]).read_bytes(), CONTENT)
+
+            again = download_file("xoxp-test", self.file, tmpdir)
+            self.assertEqual(again["status"], "exists")
+
+    def test_download_resumes_partial_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = get_download_path(tmpdir, self.file)
+            path.parent.mkdir(parents=True)
+            path.with_name(path.name + ".part").write_bytes(CONTENT[:1000])
+
+            result = download_file("xoxp-test", self.file, tmpdir)
+
+            self.assertEqual(result["status"], "resumed")
+            self.assertEqual(path.read_bytes(), CONTENT)
+            self.assertFalse(path.with_name(path.name + ".part").exists())
+
+    def test_download_restarts_when_partial_file_is_too_long(self):
+        unknown_size = {k: v for k, v in self.file.items() if k != "size"}
+        for file in [self.file, unknown_size]:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                path = get_download_path(tmpdir, file)
+                path.parent.mkdir(parents=True)
+                path.with_name(path.name + ".part").write_bytes(CONTENT + b"extra")
+
+                result = download_file("xoxp-test", file, tmpdir)
+
+                self.assertEqual(result["status"], "downloaded")
+                self.assertEqual(path.read_bytes(), CONTENT)
+                self.assertFalse(path.with_name(path.name + ".part").exists())
+
+    def test_download_error_is_reported(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            result = download_file("wrong-token", self.file, tmpdir)
+            self.assertEqual(result["status"], "error")
+            self.assertIsNotNone(result["error"])
+
+    def test_upload_streams_file_contents(self):
+        client = MagicMock()
+        client.files_getUploadURLExternal.return_value = {
+            "upload_url": self.url,
+            "file_id": "F456",
+        }
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "artifact.bin"
+            path.write_bytes(CONTENT)
+
+            uploaded = upload_file(client, path)
+
+        self.assertEqual(uploaded, {"id": "F456", "title": "artifact.bin"})
+        client.files_getUploadURLExternal.assert_called_once_with(
+            filename="artifact.bin", length=len(CONTENT)
+        )
+        self.assertEqual(FileHandler.uploaded, [CONTENT])
+
+
+if __name__ == "__main__":
+    unittest.main()
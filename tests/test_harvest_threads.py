@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import MagicMock
+
+from slack_clacks.messaging.operations import harvest_threads, paginate
+
+
+def history_pages(**kwargs):
+    if kwargs.get("cursor") is None:
+        return {
+            "messages": [
+                {"ts": "3.0", "reply_count": 2, "latest_reply": "3.2"},
+                {"ts": "2.0"},
+            ],
+            "response_metadata": {"next_cursor": "page2"},
+        }
+    return {
+        "messages": [{"ts": "1.0", "reply_count": 1, "latest_reply": "1.1"}],
+        "response_metadata": {"next_cursor": ""},
+    }
+
+
+def replies(channel, ts, oldest=None, cursor=None, **kwargs):
+    thread = {
+        "3.0": [{"ts": "3.0"}, {"ts": "3.1"}, {"ts": "3.2"}],
+        "1.0": [{"ts": "1.0"}, {"ts": "1.1"}],
+    }[ts]
+    return {
+        "messages": [
+            m for m in thread if oldest is None or float(m["ts"]) > float(oldest)
+        ]
+    }
+
+
+class TestPaginate(unittest.TestCase):
+    def test_follows_cursor_until_empty(self):
+        method = MagicMock(side_effect=history_pages)
+        pages = list(paginate(method, channel="C1"))
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(method.call_args_list[1].kwargs["cursor"], "page2")
+
+
+class TestHarvestThreads(unittest.TestCase):
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.conversations_history.side_effect = history_pages
+        self.client.conversations_replies.side_effect = replies
+
+    def test_fetches_replies_for_every_thread(self):
+        parents = {p["ts"]: p for p in harvest_threads(self.client, "C1")}
+        self.assertEqual(set(parents), {"3.0", "1.0"})
+        self.assertEqual([r["ts"] for r in parents["3.0"]["replies"]], ["3.1", "3.2"])
+        self.assertEqual([r["ts"] for r in parents["1.0"]["replies"]], ["1.1"])
+
+    def test_skips_unchanged_and_fetches_only_new_replies(self):
+        parents = list(
+            harvest_threads(self.client, "C1", harvested={"3.0": "3.1", "1.0": "1.1"})
+        )
+        self.assertEqual(len(parents), 1)
+        self.assertEqual(parents[0]["ts"], "3.0")
+        self.assertEqual([r["ts"] for r in parents[0]["replies"]], ["3.2"])
+        self.client.conversations_replies.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
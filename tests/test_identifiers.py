@@ -0,0 +1,55 @@
+import unittest
+
+from slack_clacks.messaging.exceptions import ClacksInvalidPermalinkError
+from slack_clacks.messaging.identifiers import (
+    is_channel_id,
+    is_permalink,
+    is_user_id,
+    parse_permalink,
+)
+
+
+class TestIdentifierShapes(unittest.TestCase):
+    def test_channel_ids(self):
+        for identifier in ["C0123ABCD", "G0123ABCD", "D0123ABCD"]:
+            self.assertTrue(is_channel_id(identifier), identifier)
+        for identifier in ["Cats", "general", "#C0123ABCD", "U0123ABCD", "C12"]:
+            self.assertFalse(is_channel_id(identifier), identifier)
+
+    def test_user_ids(self):
+        self.assertTrue(is_user_id("U0123ABCD"))
+        self.assertTrue(is_user_id("W0123ABCD"))
+        self.assertFalse(is_user_id("Umberto"))
+        self.assertFalse(is_user_id("@U0123ABCD"))
+
+
+class TestParsePermalink(unittest.TestCase):
+    def test_top_level_message(self):
+        url = "https://acme.slack.com/archives/C0123ABCD/p1700000000123456"
+        self.assertTrue(is_permalink(url))
+        self.assertEqual(parse_permalink(url), ("C0123ABCD", "1700000000.123456", None))
+
+    def test_thread_reply(self):
+        url = (
+            "https://acme.slack.com/archives/C0123ABCD/p1700000000123456"
+            "?thread_ts=1699999999.000100&cid=C0123ABCD"
+        )
+        self.assertEqual(
+            parse_permalink(url),
+            ("C0123ABCD", "1700000000.123456", "1699999999.000100"),
+        )
+
+    def test_rejects_non_permalinks(self):
+        self.assertFalse(is_permalink("1700000000.123456"))
+        for url in [
+            "https://example.com/archives/C0123ABCD/p1700000000123456",
+            "https://acme.slack.com/archives/general/p1700000000123456",
+            "https://acme.slack.com/archives/C0123ABCD",
+            "https://acme.slack.com/archives/C0123ABCD/p1700000000123456?thread_ts=abc",
+        ]:
+            with self.assertRaises(ClacksInvalidPermalinkError, msg=url):
+                parse_permalink(url)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+import json
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from slack_sdk.web import SlackResponse
+
+from slack_clacks.configuration.database import (
+    add_context,
+    ensure_db_updated,
+    get_db_path,
+    get_session,
+    is_message_confirmed,
+    set_current_context,
+)
+from slack_clacks.messaging.cli import (
+    CONFIRMED_MESSAGES_PER_READ,
+    generate_read_parser,
+    generate_send_parser,
+    generate_watch_parser,
+)
+
+HISTORY = {
+    "ok": True,
+    "messages": [
+        {
+            "ts": "1700000000.000100",
+            "user": "U1",
+            "text": "deploying <#C0123ABCD>",
+            "blocks": [{"type": "rich_text"}],
+        }
+    ],
+}
+
+
+def slack_response(data: dict) -> SlackResponse:
+    return SlackResponse(
+        client=None,
+        http_verb="POST",
+        api_url="https://slack.com/api/test",
+        req_args={},
+        data=data,
+        headers={},
+        status_code=200,
+    )
+
+
+class TestMessagingHandlers(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.config_dir = str(Path(self.directory.name) / "config")
+        self.outfile = Path(self.directory.name) / "out.json"
+        ensure_db_updated(config_dir=self.config_dir)
+        with get_session(self.config_dir) as session:
+            add_context(session, "work", "xoxp-test", "U0", "T1", "clacks")
+            set_current_context(session, "work")
+
+        self.client = MagicMock()
+        self.client.chat_postMessage.return_value = slack_response(
+            {"ok": True, "channel": "C0123ABCD", "ts": "1700000000.000200"}
+        )
+        self.client.conversations_history.return_value = slack_response(
+            json.loads(json.dumps(HISTORY))
+        )
+        self.client.conversations_list.return_value = slack_response(
+            {"ok": True, "channels": [{"id": "C0123ABCD", "name": "general"}]}
+        )
+        self.client.conversations_info.return_value = slack_response(
+            {"ok": True, "channel": {"id": "C0123ABCD", "name": "general"}}
+        )
+        self.client.users_info.return_value = slack_response(
+            {"ok": True, "user": {"id": "U1", "name": "alice"}}
+        )
+        patcher = patch(
+            "slack_clacks.messaging.cli.create_client", return_value=self.client
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_command(self, parser, argv: list[str]) -> str:
+        args = parser.parse_args(
+            [*argv, "-D", self.config_dir, "-o", str(self.outfile)]
+        )
+        args.func(args)
+        return self.outfile.read_text()
+
+    def test_send(self):
+        output = self.run_command(
+            generate_send_parser(), ["-c", "C0123ABCD", "-m", "hi"]
+        )
+        self.assertEqual(json.loads(output)["ts"], "1700000000.000200")
+        self.client.chat_postMessage.assert_called_once_with(
+            channel="C0123ABCD", text="hi", thread_ts=None
+        )
+
+    def test_read_projects_messages(self):
+        output = self.run_command(
+            generate_read_parser(), ["-c", "C0123ABCD", "--fields", "ts,text,blocks"]
+        )
+        (message,) = json.loads(output)["messages"]
+        self.assertEqual(
+            message,
+            {
+                "ts": "1700000000.000100",
+                "text": "deploying <#C0123ABCD>",
+                "blocks": [{"type": "rich_text"}],
+            },
+        )
+
+        self.outfile.unlink()
+        output = self.run_command(
+            generate_read_parser(), ["-c", "C0123ABCD", "--compact"]
+        )
+        (message,) = json.loads(output)["messages"]
+        self.assertNotIn("blocks", message)
+        self.assertEqual(message["text"], "deploying <#C0123ABCD>")
+
+    def test_read_format_text(self):
+        output = self.run_command(
+            generate_read_parser(), ["-c", "#general", "--format", "text"]
+        )
+        self.assertIn("alice", output)
+        self.assertIn("deploying #general", output)
+        self.assertNotIn("{", output)
+
+    def test_read_enrich(self):
+        output = self.run_command(
+            generate_read_parser(),
+            ["-c", "#general", "--enrich", "--fields", "ts,user_name,text"],
+        )
+        (message,) = json.loads(output)["messages"]
+        self.assertEqual(
+            message,
+            {
+                "ts": "1700000000.000100",
+                "user_name": "alice",
+                "text": "deploying <#C0123ABCD>",
+            },
+        )
+
+        self.outfile.unlink()
+        output = self.run_command(
+            generate_read_parser(), ["-c", "#general", "--enrich"]
+        )
+        (message,) = json.loads(output)["messages"]
+        self.assertEqual(
+            (message["user_name"], message["channel_name"]), ("alice", "general")
+        )
+
+    def test_read_lookups_honour_no_cache_and_refresh(self):
+        for flags, calls in [([], 1), ([], 1), (["--no-cache"], 2), (["--refresh"], 3)]:
+            self.run_command(
+                generate_read_parser(), ["-c", "C0123ABCD", "--enrich", *flags]
+            )
+            self.assertEqual(self.client.users_info.call_count, calls)
+        self.run_command(generate_read_parser(), ["-c", "C0123ABCD", "--enrich"])
+        self.assertEqual(self.client.users_info.call_count, 3)
+
+    def test_read_confirms_only_the_newest_messages(self):
+        timestamps = [f"17000000{n:02d}.000100" for n in range(30, 0, -1)]
+        self.client.conversations_history.return_value = slack_response(
+            {"ok": True, "messages": [{"ts": ts} for ts in timestamps]}
+        )
+        self.run_command(generate_read_parser(), ["-c", "C0123ABCD", "-l", "30"])
+        with get_session(self.config_dir) as session:
+            confirmed = [
+                is_message_confirmed(session, "T1", "C0123ABCD", ts)
+                for ts in timestamps
+            ]
+        self.assertEqual(
+            confirmed,
+            [True] * CONFIRMED_MESSAGES_PER_READ
+            + [False] * (30 - CONFIRMED_MESSAGES_PER_READ),
+        )
+
+    def test_watch_does_not_hold_the_configuration_database(self):
+        cached = []
+
+        def poll_channels(client, high_water_marks, **kwargs):
+            for message in [*HISTORY["messages"], *HISTORY["messages"]]:
+                # Another command must be able to write meanwhile, and names
+                # looked up for earlier messages are already committed.
+                other = sqlite3.connect(get_db_path(self.config_dir), timeout=0)
+                other.execute("BEGIN IMMEDIATE")
+                cached.append(
+                    other.execute("SELECT COUNT(*) FROM api_cache").fetchone()
+                )
+                other.rollback()
+                other.close()
+                yield {**message, "channel_id": "C0123ABCD"}
+
+        with patch("slack_clacks.messaging.cli.poll_channels", poll_channels):
+            output = self.run_command(
+                generate_watch_parser(), ["-c", "C0123ABCD", "--format", "text"]
+            )
+        self.assertIn("@alice: deploying #general", output)
+        self.assertEqual(cached, [(0,), (2,)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import argparse
+import io
+import json
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from slack_clacks.messaging.cli import stream_across_contexts
+
+
+class UnclosableStringIO(io.StringIO):
+    def close(self):
+        pass
+
+
+class TestStreamAcrossContexts(unittest.TestCase):
+    def test_merges_by_ts_and_tags_context(self):
+        contexts = [
+            SimpleNamespace(name="work", access_token="t1", workspace_id="T1"),
+            SimpleNamespace(name="oss", access_token="t2", workspace_id="T2"),
+            SimpleNamespace(name="broken", access_token="t3", workspace_id="T3"),
+        ]
+        messages = {
+            "t1": [{"ts": "5.0"}, {"ts": "1.0"}],
+            "t2": [{"ts": "3.0"}, {"ts": "6.0"}],
+        }
+
+        def fetch(context, client):
+            if context.name == "broken":
+                raise ValueError("channel_not_found")
+            return messages[client]
+
+        outfile = UnclosableStringIO()
+        args = argparse.Namespace(
+            outfile=outfile,
+            format="json",
+            segment_dir=None,
+            fields=None,
+            compact=False,
+        )
+        with (
+            patch("slack_clacks.messaging.cli.create_client", side_effect=str),
+            patch("sys.stderr", new_callable=io.StringIO) as stderr,
+        ):
+            stream_across_contexts(args, contexts, fetch)  # type: ignore[arg-type]
+
+        lines = [json.loads(line) for line in outfile.getvalue().splitlines()]
+        self.assertEqual([m["ts"] for m in lines], ["6.0", "5.0", "3.0", "1.0"])
+        self.assertEqual([m["context"] for m in lines], ["oss", "work", "oss", "work"])
+        self.assertEqual(lines[0]["workspace_id"], "T2")
+        self.assertIn("broken", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
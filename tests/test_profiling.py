@@ -0,0 +1,69 @@
+import cProfile
+import io
+import json
+import pstats
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+from slack_clacks import main, tracing
+from slack_clacks.profiling import phase_breakdown
+
+
+class TestProfiling(unittest.TestCase):
+    def test_phase_breakdown(self):
+        tracer = tracing.Tracer(origin=0.0)
+        tracer.record("parse_args", "clacks", 0.0, 0.5)
+        tracer.record("conversations.list", "slack", 1.0, 1.25)
+        tracer.record("conversations.info", "slack", 1.0, 1.5)
+        tracer.record("resolve_channel_id", "resolve", 1.0, 1.25)
+        tracer.record("command", "clacks", 0.5, 2.0)
+        profiler = cProfile.Profile()
+        profiler.runcall(lambda: [json.dumps({"n": n}) for n in range(3)])
+
+        phases = {p["phase"]: p for p in phase_breakdown(tracer, profiler)}
+        self.assertEqual(phases["argument parsing"]["seconds"], 0.5)
+        self.assertEqual(
+            (phases["network"]["seconds"], phases["network"]["count"]), (0.75, 2)
+        )
+        self.assertEqual(phases["name resolution"]["seconds"], 0.25)
+        self.assertEqual(phases["session open"]["count"], 0)
+        self.assertEqual(phases["serialization"]["count"], 3)
+        self.assertEqual(phases["command"]["seconds"], 1.5)
+
+    def test_profile_flag(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "clacks.pstats"
+            argv = [
+                "clacks",
+                "--profile",
+                str(path),
+                "config",
+                "contexts",
+                "-D",
+                str(Path(directory) / "config"),
+            ]
+            stderr = io.StringIO()
+            with (
+                patch("sys.argv", argv),
+                redirect_stdout(io.StringIO()),
+                redirect_stderr(stderr),
+            ):
+                main()
+
+            functions = [name for _, _, name in pstats.Stats(str(path)).stats]  # type: ignore[attr-defined]
+            self.assertIn("handle_contexts", functions)
+
+        phases = {
+            line.split("  ")[0]: line.split()[-2:]
+            for line in stderr.getvalue().splitlines()[1:]
+        }
+        self.assertEqual(phases["ensure_db_updated"][1], "1")
+        self.assertEqual(phases["session open"][1], "1")
+        self.assertIsNone(tracing.tracer)
+
+
+if __name__ == "__main__":
+    unittest.main()
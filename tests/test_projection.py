@@ -0,0 +1,51 @@
+import json
+import unittest
+
+from slack_clacks.projection import encode, make_projection
+
+MESSAGE = {
+    "ts": "1.0",
+    "user": "U1",
+    "text": "hello",
+    "blocks": [{"type": "rich_text"}],
+    "reactions": [{"name": "tada", "count": 1}],
+    "channel": {"id": "C1", "name": "general"},
+}
+
+
+class TestProjection(unittest.TestCase):
+    def test_no_projection_returns_record_unchanged(self):
+        self.assertIs(make_projection()(MESSAGE), MESSAGE)
+
+    def test_fields_select_top_level_and_nested_values(self):
+        project = make_projection("ts, text,channel.name,missing")
+        self.assertEqual(
+            project(MESSAGE),
+            {"ts": "1.0", "text": "hello", "channel": {"name": "general"}},
+        )
+
+    def test_blank_field_names_are_ignored(self):
+        project = make_projection("ts, ,text,")
+        self.assertEqual(project({**MESSAGE, "": "x"}), {"ts": "1.0", "text": "hello"})
+
+    def test_compact_drops_bulky_fields(self):
+        projected = make_projection(compact=True)(MESSAGE)
+        self.assertNotIn("blocks", projected)
+        self.assertNotIn("reactions", projected)
+        self.assertEqual(projected["text"], "hello")
+        self.assertIn("blocks", MESSAGE)
+
+    def test_replies_are_kept_and_projected(self):
+        thread = {**MESSAGE, "replies": [dict(MESSAGE, ts="2.0")]}
+        projected = make_projection("ts,user")(thread)
+        self.assertEqual(
+            projected,
+            {"ts": "1.0", "user": "U1", "replies": [{"ts": "2.0", "user": "U1"}]},
+        )
+
+    def test_encode_round_trips(self):
+        self.assertEqual(json.loads(encode(MESSAGE)), MESSAGE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import io
+import unittest
+from unittest.mock import MagicMock
+
+from slack_sdk.errors import SlackApiError
+
+from slack_clacks.messaging.cli import parse_react_batch
+from slack_clacks.messaging.operations import react_batch
+
+
+class TestParseReactBatch(unittest.TestCase):
+    def test_parses_triples_and_skips_blank_lines(self):
+        lines = io.StringIO("C123 1700000000.000100 thumbsup\n\n#general 1.2 :eyes:\n")
+        self.assertEqual(
+            parse_react_batch(lines),
+            [
+                ("C123", "1700000000.000100", "thumbsup"),
+                ("#general", "1.2", ":eyes:"),
+            ],
+        )
+
+    def test_rejects_malformed_line(self):
+        with self.assertRaises(ValueError):
+            parse_react_batch(io.StringIO("C123 1700000000.000100\n"))
+
+
+class TestReactBatch(unittest.TestCase):
+    def test_reports_per_item_status_in_order(self):
+        client = MagicMock()
+
+        def reactions_add(channel, timestamp, name):
+            if timestamp == "2.0":
+                raise SlackApiError(
+                    "message_not_found", {"ok": False, "error": "message_not_found"}
+                )
+            if timestamp == "4.0":
+                raise TimeoutError("timed out")
+            return {"ok": True}
+
+        client.reactions_add.side_effect = reactions_add
+
+        results = react_batch(
+            client,
+            [
+                ("C1", "1.0", ":thumbsup:"),
+                ("C1", "2.0", "eyes"),
+                ("C2", "3.0", "x"),
+                ("C2", "4.0", "x"),
+            ],
+            max_workers=3,
+        )
+
+        self.assertEqual([r["ts"] for r in results], ["1.0", "2.0", "3.0", "4.0"])
+        self.assertEqual([r["ok"] for r in results], [True, False, True, False])
+        self.assertEqual(results[0]["emoji"], "thumbsup")
+        self.assertEqual(results[1]["error"], "message_not_found")
+        self.assertEqual(results[3]["error"], "TimeoutError: timed out")
+        self.assertEqual(client.reactions_add.call_count, 4)
+        client.conversations_history.assert_not_called()
+
+    def test_remove_uses_reactions_remove(self):
+        client = MagicMock()
+        results = react_batch(client, [("C1", "1.0", "eyes")], remove=True)
+        self.assertTrue(results[0]["ok"])
+        client.reactions_remove.assert_called_once_with(
+            channel="C1", timestamp="1.0", name="eyes"
+        )
+        client.reactions_add.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
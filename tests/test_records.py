@@ -0,0 +1,62 @@
+import unittest
+from unittest.mock import MagicMock
+
+from slack_clacks.messaging.operations import read_records_since
+from slack_clacks.messaging.records import MessageRecord, micros_to_ts, ts_to_micros
+
+MESSAGE = {
+    "type": "message",
+    "user": "U123ABC",
+    "text": "hello",
+    "ts": "1712345678.000100",
+    "thread_ts": "1712345600.000000",
+    "blocks": [{"type": "rich_text", "elements": []}],
+    "reactions": [{"name": "tada", "count": 2}],
+}
+
+
+class TestMessageRecord(unittest.TestCase):
+    def test_ts_conversion_is_exact(self):
+        self.assertEqual(ts_to_micros("1712345678.000100"), 1712345678000100)
+        self.assertEqual(ts_to_micros("5"), 5_000_000)
+        self.assertEqual(micros_to_ts(1712345678000100), "1712345678.000100")
+
+    def test_round_trips_api_dicts(self):
+        record = MessageRecord.from_dict(MESSAGE)
+        self.assertEqual(record.ts, 1712345678000100)
+        self.assertEqual(record.thread_ts, 1712345600000000)
+        self.assertEqual(record.to_dict(), MESSAGE)
+
+        odd = {"ts": "3.0", "channel_id": "C1"}
+        self.assertEqual(MessageRecord.from_dict(odd).to_dict(), odd)
+
+    def test_ts_str_keeps_the_ts_as_sent(self):
+        self.assertEqual(MessageRecord.from_dict(MESSAGE).ts_str, MESSAGE["ts"])
+        self.assertEqual(MessageRecord.from_dict({"ts": "3.0"}).ts_str, "3.0")
+        nested = {"ts": "4.000000", "attachments": [{"ts": "1.0"}]}
+        self.assertEqual(MessageRecord.from_dict(nested).ts_str, "4.000000")
+
+    def test_ids_are_interned(self):
+        user = "".join(["U123", "ABC"])
+        first = MessageRecord.from_dict(MESSAGE)
+        second = MessageRecord.from_dict({**MESSAGE, "user": user})
+        self.assertIs(first.user, second.user)
+
+    def test_read_records_since_sorts_by_ts(self):
+        client = MagicMock()
+        client.conversations_history.side_effect = [
+            {
+                "messages": [{"ts": "10.000002"}, {"ts": "10.000010"}],
+                "response_metadata": {"next_cursor": "c2"},
+            },
+            {"messages": [{"ts": "9.999999"}], "response_metadata": {}},
+        ]
+        records = read_records_since(client, "C1", oldest="1.0")
+        self.assertEqual(
+            [r.to_dict()["ts"] for r in records],
+            ["9.999999", "10.000002", "10.000010"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import unittest
+from unittest.mock import MagicMock
+
+from slack_sdk.errors import SlackApiError
+from sqlalchemy.orm import Session
+
+from slack_clacks.configuration.cache import ResponseCache
+from slack_clacks.configuration.database import get_engine, run_migrations
+from slack_clacks.messaging.directory import Directory, enrich_messages
+from slack_clacks.messaging.render import TextRenderer, render_text
+
+USERS = {
+    "U1": {"id": "U1", "name": "alice", "profile": {"display_name": "alice"}},
+    "U2": {"id": "U2", "name": "bob", "profile": {"real_name": "Bob B"}},
+}
+CHANNELS = {
+    "C1": {"id": "C1", "name": "general"},
+    "D1": {"id": "D1", "is_im": True, "user": "U2"},
+}
+
+
+def make_client():
+    def users_info(user):
+        if user not in USERS:
+            raise SlackApiError("user_not_found", {"error": "user_not_found"})
+        return MagicMock(data={"ok": True, "user": USERS[user]})
+
+    client = MagicMock()
+    client.users_info.side_effect = users_info
+    client.conversations_info.side_effect = lambda channel: MagicMock(
+        data={"ok": True, "channel": CHANNELS[channel]}
+    )
+    return client
+
+
+class TestRenderText(unittest.TestCase):
+    def test_expands_tokens(self):
+        names = {"U1": "alice"}
+        text = (
+            "hi <@U1> and <@U9> in <#C1|general> <!here> <!subteam^S1|@oncall> "
+            "<!subteam^S2> <!date^1^{date}|Jan 1> <https://x.io|docs> "
+            "<mailto:a@b.c> &lt;tag&gt; &amp;"
+        )
+        self.assertEqual(
+            render_text(text, names.get, lambda _: None),
+            "hi @alice and @U9 in #general @here @oncall @S2 Jan 1 docs a@b.c <tag> &",
+        )
+
+
+class TestTextRenderer(unittest.TestCase):
+    def setUp(self):
+        self.engine = get_engine(config_dir=":memory:")
+        with self.engine.connect() as connection:
+            run_migrations(connection)
+        self.session = Session(self.engine)
+        self.client = make_client()
+        self.directory = Directory(ResponseCache(self.session, "t"), self.client)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def test_looks_up_each_unknown_id_once_per_batch(self):
+        render = TextRenderer(default=self.directory)
+        messages = [
+            {"ts": "0", "user": "U1", "text": "ping <@U2>", "channel_id": "C1"},
+            {"ts": "60", "user": "U2", "text": "pong <@U1>\nbye", "channel_id": "D1"},
+            {"ts": "120", "user": "U3", "text": "<#C1>", "channel_id": "C1"},
+        ]
+
+        lines = render(messages)
+
+        self.assertEqual(
+            lines,
+            [
+                "1970-01-01 00:00:00 #general @alice: ping @Bob B",
+                "1970-01-01 00:01:00 @Bob B @Bob B: pong @alice\n    bye",
+                "1970-01-01 00:02:00 #general @U3: #general",
+            ],
+        )
+        self.assertEqual(self.client.users_info.call_count, 3)
+        self.assertEqual(self.client.conversations_info.call_count, 2)
+
+        render(messages)
+        self.assertEqual(self.client.users_info.call_count, 3)
+
+    def test_renders_thread_replies_indented(self):
+        render = TextRenderer(default=self.directory)
+        thread = {
+            "ts": "0",
+            "user": "U1",
+            "text": "question",
+            "replies": [{"ts": "1", "user": "U2", "text": "answer"}],
+        }
+        self.assertEqual(
+            render([thread]),
+            [
+                "1970-01-01 00:00:00 @alice: question\n"
+                "    1970-01-01 00:00:01 @Bob B: answer"
+            ],
+        )
+
+
+class TestEnrichMessages(unittest.TestCase):
+    def setUp(self):
+        self.engine = get_engine(config_dir=":memory:")
+        with self.engine.connect() as connection:
+            run_migrations(connection)
+        self.session = Session(self.engine)
+        self.client = make_client()
+        self.directory = Directory(ResponseCache(self.session, "t"), self.client)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def test_adds_names_with_one_lookup_per_id(self):
+        messages = [
+            {"ts": "1", "user": "U1", "channel_id": "C1", "channel_name": "C1"},
+            {"ts": "2", "user": "U1", "channel_id": "D1"},
+            {"ts": "3", "user": "U9", "replies": [{"ts": "4", "user": "U2"}]},
+        ]
+
+        enrich_messages(self.directory, messages, channel_id="C1")
+
+        self.assertEqual(messages[0]["user_name"], "alice")
+        self.assertEqual(messages[0]["channel_name"], "general")
+        self.assertEqual(messages[1]["dm_partner"], "U2")
+        self.assertEqual(messages[1]["dm_partner_name"], "Bob B")
+        self.assertEqual(messages[1]["channel_name"], "Bob B")
+        self.assertNotIn("user_name", messages[2])
+        self.assertEqual(messages[2]["channel_name"], "general")
+        self.assertEqual(messages[2]["replies"][0]["user_name"], "Bob B")
+        self.assertEqual(self.client.users_info.call_count, 3)
+        self.assertEqual(self.client.conversations_info.call_count, 2)
+
+        # A second directory over the same database is served from the cache,
+        # once the first one's entries are committed; only the failed lookup is
+        # retried.
+        self.session.commit()
+        client = make_client()
+        enrich_messages(Directory(ResponseCache(self.session, "t"), client), messages)
+        client.users_info.assert_called_once_with(user="U9")
+
+
+if __name__ == "__main__":
+    unittest.main()
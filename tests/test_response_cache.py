@@ -0,0 +1,235 @@
+import sqlite3
+import tempfile
+import unittest
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from slack_sdk.errors import SlackApiError
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from slack_clacks.configuration.cache import (
+    SESSION_CACHES,
+    ResponseCache,
+    cache_key,
+    clear_cache,
+    fetch_all,
+    get_cache_stats,
+    write_caches,
+)
+from slack_clacks.configuration.database import (
+    get_db_path,
+    get_engine,
+    run_migrations,
+    utcnow,
+)
+
+
+def make_client():
+    client = MagicMock()
+    client.users_info.side_effect = lambda user: MagicMock(
+        data={"ok": True, "user": {"id": user, "real_name": f"name-{user}"}}
+    )
+    return client
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.engine = get_engine(config_dir=":memory:")
+        with self.engine.connect() as connection:
+            run_migrations(connection)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_key_depends_on_token_method_and_params(self):
+        key = cache_key("t1", "users.info", {"user": "U1"})
+        self.assertEqual(key, cache_key("t1", "users.info", {"user": "U1"}))
+        self.assertNotEqual(key, cache_key("t2", "users.info", {"user": "U1"}))
+        self.assertNotEqual(key, cache_key("t1", "users.info", {"user": "U2"}))
+        self.assertNotIn("t1", key)
+
+    def test_second_call_is_served_from_cache(self):
+        client = make_client()
+        with Session(self.engine) as session:
+            cache = ResponseCache(session, "t1")
+            first = cache.call(client, "users.info", user="U1")
+            second = cache.call(client, "users.info", user="U1")
+            session.commit()
+
+            self.assertEqual(first, second)
+            client.users_info.assert_called_once_with(user="U1")
+            self.assertEqual(
+                get_cache_stats(session),
+                [
+                    {
+                        "method": "users.info",
+                        "entries": 1,
+                        "bytes": len(
+                            '{"ok": true, "user": {"id": "U1", "real_name": "name-U1"}}'
+                        ),
+                        "hits": 1,
+                        "misses": 1,
+                    }
+                ],
+            )
+
+    def test_no_cache_and_refresh(self):
+        client = make_client()
+        with Session(self.engine) as session:
+            ResponseCache(session, "t1", enabled=False).call(
+                client, "users.info", user="U1"
+            )
+            self.assertEqual(get_cache_stats(session), [])
+
+            ResponseCache(session, "t1").call(client, "users.info", user="U1")
+            ResponseCache(session, "t1", refresh=True).call(
+                client, "users.info", user="U1"
+            )
+            self.assertEqual(client.users_info.call_count, 3)
+
+    def test_expired_entries_are_misses(self):
+        client = make_client()
+        with Session(self.engine) as session:
+            cache = ResponseCache(session, "t1")
+            with patch(
+                "slack_clacks.configuration.cache.utcnow",
+                return_value=utcnow() - timedelta(days=2),
+            ):
+                cache.call(client, "users.info", user="U1")
+            cache.call(client, "users.info", user="U1")
+            self.assertEqual(client.users_info.call_count, 2)
+
+    def test_lookups_do_not_lock_the_database(self):
+        client = make_client()
+        with tempfile.TemporaryDirectory() as directory:
+            engine = get_engine(config_dir=directory)
+            with engine.connect() as connection:
+                run_migrations(connection)
+            with Session(engine) as session:
+                cache = ResponseCache(session, "t1")
+                cache.call(client, "users.info", user="U1")
+                cache.call(client, "users.info", user="U1")
+                self.assertIsNone(cache.get("users.info", {"user": "U2"}))
+
+                other = sqlite3.connect(get_db_path(directory), timeout=0)
+                other.execute("BEGIN IMMEDIATE")
+                other.rollback()
+                other.close()
+                self.assertEqual(get_cache_stats(session), [])
+
+                session.commit()
+                (stats,) = get_cache_stats(session)
+                self.assertEqual(
+                    (stats["entries"], stats["hits"], stats["misses"]), (1, 1, 2)
+                )
+            engine.dispose()
+
+    def test_caches_of_a_session_are_written_by_one_listener(self):
+        client = make_client()
+        with Session(self.engine) as session:
+            first = ResponseCache(session, "t1")
+            second = ResponseCache(session, "t2")
+            self.assertEqual(session.info[SESSION_CACHES], [first, second])
+            self.assertTrue(event.contains(session, "before_commit", write_caches))
+
+            first.call(client, "users.info", user="U1")
+            second.call(client, "users.info", user="U2")
+            session.commit()
+            (stats,) = get_cache_stats(session)
+            self.assertEqual((stats["entries"], stats["misses"]), (2, 2))
+
+    def test_evicts_least_recently_used(self):
+        client = make_client()
+        with Session(self.engine) as session:
+            cache = ResponseCache(session, "t1", max_bytes=150)
+            cache.call(client, "users.info", user="U1")
+            cache.call(client, "users.info", user="U2")
+            cache.call(client, "users.info", user="U1")
+            cache.call(client, "users.info", user="U3")
+            session.commit()
+
+            self.assertIsNotNone(cache.get("users.info", {"user": "U1"}))
+            self.assertIsNotNone(cache.get("users.info", {"user": "U3"}))
+            self.assertIsNone(cache.get("users.info", {"user": "U2"}))
+
+            clear_cache(session)
+            self.assertEqual(get_cache_stats(session), [])
+
+
+class TestFetchAll(unittest.TestCase):
+    def setUp(self):
+        self.engine = get_engine(config_dir=":memory:")
+        with self.engine.connect() as connection:
+            run_migrations(connection)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_concurrent_calls_across_tokens(self):
+        client = make_client()
+        client.auth_test.side_effect = SlackApiError(
+            "invalid_auth", {"ok": False, "error": "invalid_auth"}
+        )
+        with Session(self.engine) as session:
+            first = ResponseCache(session, "t1")
+            second = ResponseCache(session, "t2")
+            results = fetch_all(
+                [
+                    (first, client, "users.info", {"user": "U1"}),
+                    (second, client, "users.info", {"user": "U2"}),
+                    (second, client, "auth.test", {}),
+                ]
+            )
+
+            self.assertEqual(results[0]["user"]["id"], "U1")
+            self.assertEqual(results[1]["user"]["id"], "U2")
+            self.assertIsInstance(results[2], SlackApiError)
+            self.assertIsNotNone(first.get("users.info", {"user": "U1"}))
+            self.assertIsNone(first.get("users.info", {"user": "U2"}))
+
+    def test_failures_are_returned_per_call(self):
+        client = make_client()
+        unreachable = make_client()
+        unreachable.users_info.side_effect = TimeoutError("timed out")
+        with Session(self.engine) as session:
+            first = ResponseCache(session, "t1")
+            second = ResponseCache(session, "t2")
+            results = fetch_all(
+                [
+                    (first, client, "users.info", {"user": "U1"}),
+                    (second, unreachable, "users.info", {"user": "U2"}),
+                ]
+            )
+
+            self.assertEqual(results[0]["user"]["id"], "U1")
+            self.assertIsInstance(results[1], TimeoutError)
+            self.assertIsNone(second.get("users.info", {"user": "U2"}))
+
+    def test_stale_entries_are_served_once_then_fetched_again(self):
+        client = make_client()
+        with Session(self.engine) as session:
+            with patch(
+                "slack_clacks.configuration.cache.utcnow",
+                return_value=utcnow() - timedelta(days=2),
+            ):
+                ResponseCache(session, "t1").call(client, "users.info", user="U1")
+            session.commit()
+
+            cache = ResponseCache(session, "t1", serve_stale=True)
+            results = fetch_all([(cache, client, "users.info", {"user": "U1"})])
+            self.assertEqual(results[0]["user"]["id"], "U1")
+            self.assertEqual(client.users_info.call_count, 1)
+            session.commit()
+
+            cache = ResponseCache(session, "t1", serve_stale=True)
+            fetch_all([(cache, client, "users.info", {"user": "U1"})])
+            self.assertEqual(client.users_info.call_count, 2)
+            session.commit()
+            self.assertIsNotNone(
+                ResponseCache(session, "t1").get("users.info", {"user": "U1"})
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import io
+import unittest
+from contextlib import redirect_stderr
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from sqlalchemy.orm import Session
+
+from slack_clacks.configuration.database import (
+    get_cached_search_page,
+    get_engine,
+    run_migrations,
+    store_search_page,
+)
+from slack_clacks.messaging.cli import generate_search_parser
+from slack_clacks.messaging.operations import search_messages
+
+
+def search_page(query, sort, sort_dir, count, page):
+    response = MagicMock()
+    response.data = {
+        "messages": {
+            "matches": [{"ts": f"{page}.{i}"} for i in range(2)],
+            "paging": {"count": count, "total": 6, "page": page, "pages": 3},
+        }
+    }
+    return response
+
+
+class TestSearchMessages(unittest.TestCase):
+    def test_fetches_all_pages_in_order(self):
+        client = MagicMock()
+        client.search_messages.side_effect = search_page
+
+        matches = list(search_messages(client, "deploy", count=2))
+
+        self.assertEqual(
+            [m["ts"] for m in matches], ["1.0", "1.1", "2.0", "2.1", "3.0", "3.1"]
+        )
+        self.assertEqual(client.search_messages.call_count, 3)
+
+    def test_max_pages(self):
+        client = MagicMock()
+        client.search_messages.side_effect = search_page
+        matches = list(search_messages(client, "deploy", count=2, max_pages=2))
+        self.assertEqual(len(matches), 4)
+
+    def test_cached_pages_skip_requests(self):
+        client = MagicMock()
+        client.search_messages.side_effect = search_page
+        cache = {2: {"messages": {"matches": [{"ts": "cached"}]}}}
+        stored = []
+
+        def store(page, response):
+            stored.append(page)
+            cache[page] = response
+
+        matches = list(
+            search_messages(
+                client, "deploy", count=2, get_cached=cache.get, store=store
+            )
+        )
+
+        self.assertEqual(
+            [m["ts"] for m in matches], ["1.0", "1.1", "cached", "3.0", "3.1"]
+        )
+        self.assertEqual(sorted(stored), [1, 3])
+        requested = [c.kwargs["page"] for c in client.search_messages.call_args_list]
+        self.assertEqual(sorted(requested), [1, 3])
+
+
+class TestSearchCache(unittest.TestCase):
+    def setUp(self):
+        self.engine = get_engine(config_dir=":memory:")
+        with self.engine.connect() as connection:
+            run_migrations(connection)
+        self.key = {
+            "workspace_id": "T1",
+            "user_id": "U1",
+            "query": "deploy",
+            "sort": "score",
+            "sort_dir": "desc",
+            "count": 100,
+        }
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_round_trip_and_expiry(self):
+        ttl = timedelta(minutes=5)
+        with Session(self.engine) as session:
+            store_search_page(
+                session, page=1, response={"ok": True}, max_age=ttl, **self.key
+            )
+            session.commit()
+
+        with Session(self.engine) as session:
+            self.assertEqual(
+                get_cached_search_page(session, page=1, max_age=ttl, **self.key),
+                {"ok": True},
+            )
+            self.assertIsNone(
+                get_cached_search_page(session, page=2, max_age=ttl, **self.key)
+            )
+            self.assertIsNone(
+                get_cached_search_page(
+                    session, page=1, max_age=timedelta(seconds=-1), **self.key
+                )
+            )
+
+
+class TestSearchParser(unittest.TestCase):
+    def test_remote_is_required(self):
+        parser = generate_search_parser()
+        self.assertTrue(parser.parse_args(["deploy", "--remote"]).remote)
+        with redirect_stderr(io.StringIO()) as stderr:
+            with self.assertRaises(SystemExit):
+                parser.parse_args(["deploy"])
+        self.assertIn("--remote", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
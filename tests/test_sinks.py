@@ -0,0 +1,122 @@
+import importlib.util
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from slack_clacks.projection import encode
+from slack_clacks.sinks import SegmentedSink, open_segment, select_segments
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def read_all(directory, oldest=None, latest=None):
+    records = []
+    for path in select_segments(directory, oldest=oldest, latest=latest):
+        with open_segment(path) as ifp:
+            records.extend(json.loads(line) for line in ifp)
+    return records
+
+
+class TestSegmentedSink(unittest.TestCase):
+    def test_rotates_by_size_and_indexes_ts_ranges(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            records = [{"ts": f"{i}.000000", "text": "x" * 50} for i in range(1, 11)]
+            line_size = len(encode(records[0])) + 1
+            with SegmentedSink(
+                tmpdir, max_bytes=3 * line_size, compression="gzip"
+            ) as sink:
+                for record in records:
+                    sink.write(record)
+
+            index = json.loads((Path(tmpdir) / "index.json").read_text())
+            segments = index["segments"]
+            self.assertEqual([s["records"] for s in segments], [3, 3, 3, 1])
+            self.assertEqual(segments[0]["path"], "segment-000001.ndjson.gz")
+            self.assertEqual(
+                [(s["oldest_ts"], s["latest_ts"]) for s in segments][:2],
+                [("1.000000", "3.000000"), ("4.000000", "6.000000")],
+            )
+
+            self.assertEqual(read_all(tmpdir), records)
+            self.assertEqual(
+                [r["ts"] for r in read_all(tmpdir, oldest="5.0", latest="6.5")],
+                ["4.000000", "5.000000", "6.000000"],
+            )
+
+    def test_rotates_by_age_and_continues_numbering(self):
+        clock = FakeClock()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with SegmentedSink(tmpdir, max_seconds=60, clock=clock) as sink:
+                sink.write({"ts": "1.0"})
+                clock.now = 30
+                sink.write({"ts": "2.0"})
+                clock.now = 61
+                sink.write({"ts": "3.0"})
+
+            with SegmentedSink(tmpdir) as sink:
+                sink.write({"ts": "4.0"})
+
+            segments = json.loads((Path(tmpdir) / "index.json").read_text())["segments"]
+            self.assertEqual([s["records"] for s in segments], [2, 1, 1])
+            self.assertEqual(segments[-1]["path"], "segment-000003.ndjson")
+            self.assertEqual(
+                [r["ts"] for r in read_all(tmpdir)], ["1.0", "2.0", "3.0", "4.0"]
+            )
+
+    def test_numbering_skips_segments_missing_from_the_index(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with SegmentedSink(tmpdir) as sink:
+                sink.write({"ts": "1.0"})
+            # A run killed before closing its segment leaves it unindexed.
+            killed = SegmentedSink(tmpdir, fsync_interval=0)
+            killed.write({"ts": "2.0"})
+            killed.segment.raw.close()
+
+            with SegmentedSink(tmpdir) as sink:
+                sink.write({"ts": "3.0"})
+
+            self.assertEqual(
+                sorted(p.name for p in Path(tmpdir).glob("segment-*")),
+                [
+                    "segment-000001.ndjson",
+                    "segment-000002.ndjson",
+                    "segment-000003.ndjson",
+                ],
+            )
+            self.assertEqual(
+                json.loads((Path(tmpdir) / "segment-000002.ndjson").read_text()),
+                {"ts": "2.0"},
+            )
+            self.assertEqual([r["ts"] for r in read_all(tmpdir)], ["1.0", "3.0"])
+
+    def test_index_only_lists_closed_segments(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            sink = SegmentedSink(tmpdir, fsync_interval=0)
+            sink.write({"ts": "1.0"})
+            self.assertEqual(select_segments(tmpdir), [])
+            self.assertEqual(
+                json.loads((Path(tmpdir) / "segment-000001.ndjson").read_text()),
+                {"ts": "1.0"},
+            )
+            sink.close()
+            self.assertEqual(len(select_segments(tmpdir)), 1)
+
+    @unittest.skipUnless(
+        importlib.util.find_spec("zstandard"), "zstandard is not installed"
+    )
+    def test_zstd_segments_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with SegmentedSink(tmpdir, compression="zstd") as sink:
+                sink.write({"ts": "1.0"})
+            self.assertEqual(read_all(tmpdir), [{"ts": "1.0"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
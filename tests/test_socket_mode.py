@@ -0,0 +1,110 @@
+import io
+import threading
+import unittest
+from queue import Queue
+from unittest.mock import patch
+
+from slack_sdk import WebClient
+from socket_mode_server import SocketModeStandIn, wait_for
+
+from slack_clacks.messaging.watch import create_socket_client, stream_channel_events
+
+
+class TestSocketModeWatch(unittest.TestCase):
+    def setUp(self):
+        self.stand_in = SocketModeStandIn().__enter__()
+        self.addCleanup(self.stand_in.__exit__)
+        self.client = WebClient(token="xoxp-test", base_url=self.stand_in.base_url)
+        self.socket_client = create_socket_client(
+            "xapp-test",
+            web_client=WebClient(base_url=self.stand_in.base_url),
+            ping_interval=0.1,
+        )
+        self.addCleanup(self.socket_client.close)
+        self.received = Queue()
+        self.stop = threading.Event()
+
+    def follow(self, marks):
+        def run():
+            for message in stream_channel_events(
+                self.socket_client,
+                self.client,
+                marks,
+                min_interval=0.05,
+                max_interval=0.05,
+                should_stop=self.stop.is_set,
+            ):
+                self.received.put(message)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+
+        def finish():
+            self.stop.set()
+            thread.join(timeout=10)
+
+        self.addCleanup(finish)
+
+    def next_text(self):
+        return self.received.get(timeout=10)["text"]
+
+    def test_streams_events_and_falls_back_to_polling(self):
+        self.stand_in.post_message("C1", {"ts": "100.000001", "text": "before"})
+        marks = {"C1": "100.000000"}
+        self.follow(marks)
+
+        self.assertEqual(self.next_text(), "before")
+        self.stand_in.wait_for_connection()
+
+        self.stand_in.post_message("C1", {"ts": "101.000000", "text": "pushed"})
+        self.stand_in.post_message("C2", {"ts": "101.000001", "text": "elsewhere"})
+        self.stand_in.post_message(
+            "C1", {"ts": "101.000002", "thread_ts": "101.000000", "text": "reply"}
+        )
+        self.assertEqual(self.next_text(), "pushed")
+        wait_for(lambda: len(self.stand_in.acks) == 3)
+
+        calls = self.stand_in.history_calls
+        self.stand_in.disconnect()
+        wait_for(lambda: not self.socket_client.is_connected())
+        self.stand_in.post_message(
+            "C1", {"ts": "102.000000", "text": "polled"}, push=False
+        )
+        self.assertEqual(self.next_text(), "polled")
+        self.assertGreater(self.stand_in.history_calls, calls)
+
+        self.stand_in.reconnect()
+        self.stand_in.wait_for_connection()
+        self.stand_in.post_message("C1", {"ts": "103.000000", "text": "again"})
+        self.assertEqual(self.next_text(), "again")
+
+        self.assertTrue(self.received.empty())
+        self.assertEqual(marks, {"C1": "103.000000"})
+
+    def test_polls_until_the_first_connection_succeeds(self):
+        self.stand_in.disconnect()
+        self.stand_in.post_message(
+            "C1", {"ts": "6.000000", "text": "polled"}, push=False
+        )
+        with patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            self.follow({"C1": "5.000000"})
+            self.assertEqual(self.next_text(), "polled")
+        self.assertIn("Socket Mode connection failed", stderr.getvalue())
+
+        self.stand_in.reconnect()
+        self.stand_in.wait_for_connection()
+        self.stand_in.post_message("C1", {"ts": "7.000000", "text": "pushed"})
+        self.assertEqual(self.next_text(), "pushed")
+
+    def test_backfills_messages_missed_before_connecting(self):
+        self.stand_in.post_message("C1", {"ts": "5.000000", "text": "old"})
+        self.stand_in.post_message("C1", {"ts": "6.000000", "text": "missed"})
+        self.follow({"C1": "5.000000"})
+
+        message = self.received.get(timeout=10)
+        self.assertEqual(message["text"], "missed")
+        self.assertEqual(message["channel_id"], "C1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import json
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from email.message import Message
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import patch
+from urllib.error import HTTPError
+from urllib.parse import parse_qs
+
+from slack_sdk import WebClient
+
+from slack_clacks import tracing
+from slack_clacks.client import TracingWebClient, create_client
+from slack_clacks.messaging.exceptions import ClacksChannelNotFoundError
+from slack_clacks.messaging.operations import paginate, resolve_channel_id
+
+
+def response(body: dict, **headers) -> dict:
+    return {"status": 200, "headers": headers, "body": json.dumps(body)}
+
+
+def rate_limited(retry_after: str) -> HTTPError:
+    headers = Message()
+    headers["Retry-After"] = retry_after
+    return HTTPError(
+        "https://slack.com/api/users.list", 429, "Too Many Requests", headers, BytesIO()
+    )
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.tracer = tracing.start()
+        self.addCleanup(tracing.stop)
+
+    def test_spans_are_recorded_only_while_tracing(self):
+        with tracing.span("outer", "test", label="a") as args:
+            args["added"] = 1
+        with self.assertRaises(ValueError):
+            with tracing.span("failing", "test"):
+                raise ValueError()
+        tracing.stop()
+        with tracing.span("ignored", "test"):
+            pass
+
+        outer, failing = self.tracer.spans("test")
+        self.assertEqual((outer["name"], outer["ph"]), ("outer", "X"))
+        self.assertEqual(outer["args"], {"label": "a", "added": 1})
+        self.assertGreaterEqual(outer["dur"], 0)
+        self.assertEqual(failing["args"], {"error": "ValueError"})
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "trace.json"
+            self.tracer.write(str(path))
+            events = json.loads(path.read_text())["traceEvents"]
+        self.assertEqual(events[0]["ph"], "M")
+        self.assertEqual([e["name"] for e in events[1:]], ["outer", "failing"])
+
+    def test_create_client_traces_only_while_tracing(self):
+        self.assertIsInstance(create_client("xoxp-test"), TracingWebClient)
+        tracing.stop()
+        self.assertIs(type(create_client("xoxp-test")), WebClient)
+
+    def test_api_calls_record_pages_bytes_and_rate_limits(self):
+        bodies = [
+            response(
+                {"ok": True, "channels": [], "response_metadata": {"next_cursor": "c"}}
+            ),
+            response({"ok": True, "channels": [{"id": "C1", "name": "general"}]}),
+        ]
+        client = create_client("xoxp-test")
+        with patch.object(
+            WebClient, "_perform_urllib_http_request_internal", side_effect=bodies
+        ):
+            pages = list(paginate(client.conversations_list, limit=1))
+        self.assertEqual(len(pages), 2)
+
+        first, second = self.tracer.spans("slack")
+        self.assertEqual(first["name"], "conversations.list")
+        self.assertEqual(
+            (first["args"]["page"], second["args"]["page"], second["args"]["retries"]),
+            (1, 2, 0),
+        )
+        self.assertEqual(second["args"]["bytes"], len(bodies[1]["body"]))
+
+    def test_pages_of_concurrent_listings(self):
+        def listing(url, req):
+            cursor = parse_qs(req.data.decode()).get("cursor", [""])[0]
+            channel, _, page = cursor.partition("-")
+            channel = channel or parse_qs(req.data.decode())["types"][0]
+            page = int(page or 1)
+            metadata = {"next_cursor": f"{channel}-{page + 1}" if page < 3 else ""}
+            return response({"ok": True, "channels": [], "response_metadata": metadata})
+
+        client = create_client("xoxp-test")
+        with (
+            patch.object(
+                WebClient, "_perform_urllib_http_request_internal", side_effect=listing
+            ),
+            ThreadPoolExecutor(max_workers=4) as executor,
+        ):
+            for pages in executor.map(
+                lambda types: list(paginate(client.conversations_list, types=types)),
+                ["a", "b", "c", "d"],
+            ):
+                self.assertEqual(len(pages), 3)
+
+        spans = self.tracer.spans("slack")
+        self.assertEqual(
+            sorted(s["args"]["page"] for s in spans), [1] * 4 + [2] * 4 + [3] * 4
+        )
+        self.assertEqual(client.pages, {})
+
+    def test_retries_and_errors_are_recorded(self):
+        client = create_client("xoxp-test")
+        with (
+            patch.object(
+                WebClient,
+                "_perform_urllib_http_request_internal",
+                side_effect=[
+                    rate_limited("0"),
+                    response({"ok": False, "error": "invalid_auth"}),
+                ],
+            ),
+            patch("slack_sdk.http_retry.builtin_handlers.time.sleep"),
+        ):
+            with self.assertRaises(ClacksChannelNotFoundError):
+                resolve_channel_id(client, "#general")
+
+        (call,) = self.tracer.spans("slack")
+        self.assertEqual(call["args"]["retries"], 1)
+        self.assertEqual(call["args"]["error"], "invalid_auth")
+        self.assertEqual(call["args"]["rate_limit"], {"retry-after": "0"})
+        (resolution,) = self.tracer.spans("resolve")
+        self.assertEqual(resolution["name"], "resolve_channel_id")
+        self.assertEqual(resolution["args"], {"error": "ClacksChannelNotFoundError"})
+
+
+if __name__ == "__main__":
+    unittest.main()
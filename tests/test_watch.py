@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import MagicMock
+
+from slack_clacks.messaging.records import MessageRecord
+from slack_clacks.messaging.watch import poll_channels, read_new_messages
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestPollChannels(unittest.TestCase):
+    def test_emits_new_messages_and_backs_off_quiet_channels(self):
+        clock = FakeClock()
+        polls = []
+        arrivals = {"C_HOT": [["1.0"], ["2.0"], ["3.0"]], "C_QUIET": []}
+
+        def history(channel, oldest, **kwargs):
+            polls.append((clock.now, channel, oldest))
+            batches = arrivals[channel]
+            new = batches.pop(0) if batches else []
+            return {"messages": [{"ts": ts} for ts in reversed(new)]}
+
+        client = MagicMock()
+        client.conversations_history.side_effect = history
+        marks = {"C_HOT": "0.5", "C_QUIET": "0.5"}
+
+        messages = list(
+            poll_channels(
+                client,
+                marks,
+                min_interval=1,
+                max_interval=8,
+                should_stop=lambda: clock.now >= 30,
+                clock=clock,
+                sleep=clock.sleep,
+            )
+        )
+
+        self.assertEqual([m["ts"] for m in messages], ["1.0", "2.0", "3.0"])
+        self.assertTrue(all(m["channel_id"] == "C_HOT" for m in messages))
+        self.assertEqual(marks, {"C_HOT": "3.0", "C_QUIET": "0.5"})
+
+        hot_polls = [(t, oldest) for t, c, oldest in polls if c == "C_HOT"]
+        self.assertEqual(hot_polls[:3], [(0.0, "0.5"), (1.0, "1.0"), (2.0, "2.0")])
+
+        quiet_times = [t for t, c, _ in polls if c == "C_QUIET"]
+        gaps = [b - a for a, b in zip(quiet_times, quiet_times[1:])]
+        self.assertEqual(gaps[:4], [2.0, 4.0, 8.0, 8.0])
+
+    def test_backlog_is_held_as_records(self):
+        client = MagicMock()
+        client.conversations_history.return_value = {
+            "messages": [{"ts": "2.000001", "text": "b"}, {"ts": "1.5", "text": "a"}]
+        }
+        marks = {"C1": "1.0"}
+
+        records = read_new_messages(client, "C1", marks)
+
+        self.assertTrue(all(isinstance(r, MessageRecord) for r in records))
+        self.assertEqual(
+            [r.to_dict() for r in records],
+            [
+                {"ts": "1.5", "text": "a", "channel_id": "C1"},
+                {"ts": "2.000001", "text": "b", "channel_id": "C1"},
+            ],
+        )
+        self.assertEqual(marks, {"C1": "2.000001"})
+
+
+if __name__ == "__main__":
+    unittest.main()